@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for ps4_scraper.py
+
+Starts local stand-ins for Sony (HMAC-signed ver.xml paths, manifest JSON,
+injected latency and 503s) and SerialStation (paginated titles table), then
+runs the real scraper and update code paths against them at several worker
+counts and chunk sizes. Each case runs in its own process so peak RSS is
+per case, and the mock data, latency and errors are deterministic so the
+numbers can be compared across commits.
+
+Usage:
+    python bench_ps4_scraper.py
+    python bench_ps4_scraper.py --titles 5000 --latency-ms 50 --error-rate 0.02
+    python bench_ps4_scraper.py --quick
+
+Results are printed as a table and appended as JSON lines to bench_output.txt.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    # Pas de module resource sous Windows : RSS non mesuré
+    RESOURCE_AVAILABLE = False
+
+import ps4_scraper
+
+def path_fraction(*parts):
+    """Deterministic number in [0, 1) for a request path"""
+    digest = hashlib.md5('|'.join(str(p) for p in parts).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2**64
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Shared plumbing for the mock servers: latency, injected errors, stats"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body=b'', content_type='text/plain'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate(self):
+        """Sleep for the injected latency, returns True if this request should fail with 503"""
+        config = self.server.config
+        with self.server.lock:
+            self.server.requests += 1
+            attempt = self.server.attempts.get(self.path, 0)
+            self.server.attempts[self.path] = attempt + 1
+
+        # Latence déterministe par chemin, avec 1% de requêtes 10x plus lentes
+        fraction = path_fraction(self.path)
+        latency = config['latency_ms'] / 1000 * (0.5 + fraction)
+        if fraction > 0.99:
+            latency *= 10
+        time.sleep(latency)
+
+        # Erreur transitoire au premier essai seulement, pour exercer les reprises
+        if attempt == 0 and path_fraction(self.path, 'error') < config['error_rate']:
+            with self.server.lock:
+                self.server.errors += 1
+            self.send_body(503, b'Service Unavailable')
+            return True
+        return False
+
+class SonyMockHandler(MockHandler):
+    """ver.xml behind the HMAC-signed path, manifest JSON pieces"""
+
+    HMAC_KEY = bytearray.fromhex(ps4_scraper.PS4UpdateDownloader.UPDATE_HMAC_KEY)
+
+    def do_GET(self):
+        if self.simulate():
+            return
+        parts = self.path.strip('/').split('/')
+
+        # /plo/np/CUSAxxxxx/<hmac>/CUSAxxxxx-ver.xml
+        if len(parts) == 5 and parts[:2] == ['plo', 'np'] and parts[4] == f"{parts[2]}-ver.xml":
+            title_id = parts[2]
+            expected = hmac.new(self.HMAC_KEY, f"np_{title_id}".encode('utf-8'), hashlib.sha256).hexdigest()
+            if parts[3] != expected:
+                self.send_body(403, b'Forbidden')
+                return
+            number = int(title_id[4:]) if title_id[4:].isdigit() else 0
+            if number % 3 == 0:
+                self.send_body(404, b'Not Found')
+                return
+
+            host = self.headers.get('Host')
+            packages = ''.join(
+                f'<package version="01.{v:02d}" manifest_url="http://{host}/manifest/{title_id}/{v}.json">'
+                f'<paramsfo><title>Mock Game {title_id}</title></paramsfo></package>'
+                for v in range(1, number % 3 + 2))
+            body = f'<?xml version="1.0"?><titlepatch titleid="{title_id}"><tag name="{title_id}_00">{packages}</tag></titlepatch>'
+            self.send_body(200, body.encode('utf-8'), 'application/xml')
+
+        # /manifest/CUSAxxxxx/<v>.json
+        elif len(parts) == 3 and parts[0] == 'manifest':
+            title_id, version = parts[1], parts[2][:-len('.json')]
+            pieces = []
+            for i in range(1 + int(path_fraction(title_id, version) * 3)):
+                name = f"{title_id}_{version}_{i}"
+                pieces.append({
+                    'url': f"http://{self.headers.get('Host')}/pkg/{name}.pkg",
+                    'fileSize': 1024 * 1024 * (1 + int(path_fraction(name) * 4096)),
+                    'hashValue': hashlib.sha1(name.encode('utf-8')).hexdigest(),
+                    'pieceNumber': i
+                })
+            body = json.dumps({'originalFileSize': sum(p['fileSize'] for p in pieces),
+                               'numberOfSplitFiles': len(pieces), 'pieces': pieces})
+            self.send_body(200, body.encode('utf-8'), 'application/json')
+
+        else:
+            self.send_body(404, b'Not Found')
+
+class SerialStationMockHandler(MockHandler):
+    """Paginated titles table like https://www.serialstation.com/titles/"""
+
+    def do_GET(self):
+        if self.simulate():
+            return
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/titles':
+            self.send_body(404, b'Not Found')
+            return
+
+        config = self.server.config
+        page = int(parse_qs(url.query).get('page', ['1'])[0])
+        first = (page - 1) * config['per_page'] + 1
+        rows = ''.join(
+            f'<tr><td><a href="/titles/CUSA/{n:05d}">CUSA-{n:05d}</a></td>'
+            f'<td>Mock Game {n}</td><td>Standard, Digital</td><td>2017</td></tr>'
+            for n in range(first, min(first + config['per_page'], config['titles'] + 1)))
+        body = (f'<html><head><title>Titles</title></head><body><nav>page {page}</nav>'
+                f'<table class="table"><thead><tr><th>Title ID</th><th>Name</th><th>Editions</th><th>Year</th></tr></thead>'
+                f'<tbody>{rows}</tbody></table></body></html>')
+        self.send_body(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+
+def start_server(handler, config):
+    """Start a threaded mock server on a free local port"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    server.config = config
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.errors = 0
+    server.attempts = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def reset_server(server):
+    with server.lock:
+        server.requests = 0
+        server.errors = 0
+        server.attempts = {}
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def peak_rss_mb():
+    if not RESOURCE_AVAILABLE:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en Ko ailleurs
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def timed_downloader(base_class, latencies):
+    """Subclass of a downloader engine recording the latency of every title"""
+
+    class TimedDownloader(base_class):
+        def process_single_title(self, title_data):
+            start = time.perf_counter()
+            result = super().process_single_title(title_data)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+        async def async_process_single_title(self, http, title_data, slots):
+            start = time.perf_counter()
+            result = await super().async_process_single_title(http, title_data, slots)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+    return TimedDownloader
+
+class UnlimitedLimiter:
+    """Stand-in for AdaptiveHostLimiter that never waits (limiter=off cases)"""
+
+    def warm_start(self, concurrency):
+        pass
+
+    def acquire(self, host):
+        pass
+
+    async def acquire_async(self, host):
+        pass
+
+    def release(self, host, status):
+        pass
+
+    def summary(self):
+        return []
+
+def run_titles_case(case):
+    """Scrape every mock page in browserless mode"""
+    latencies = []
+
+    class TimedScraper(ps4_scraper.PS4TitlesScraper):
+        def fetch_page_http(self, page_num, max_retries=3):
+            start = time.perf_counter()
+            result = super().fetch_page_http(page_num, max_retries)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+    scraper = TimedScraper(use_browser=False)
+    scraper.base_url = case['base_url']
+
+    start = time.perf_counter()
+    pages = scraper.scrape_pages_http(list(range(1, case['pages'] + 1)), max_workers=case['workers'], rate=case['rate'])
+    duration = time.perf_counter() - start
+
+    titles = sum(len(games or []) for games in pages.values())
+    return titles, duration, latencies
+
+def run_updates_case(case):
+    """Collect update links for the mock titles CSV"""
+    latencies = []
+    engine = ps4_scraper.AsyncPS4UpdateDownloader if case['engine'] == 'async' else ps4_scraper.PS4UpdateDownloader
+    downloader_class = timed_downloader(engine, latencies)
+    downloader_class.UPDATE_BASE_URL = case['base_url']
+
+    with tempfile.TemporaryDirectory() as download_path:
+        limiter = UnlimitedLimiter() if case['limiter'] == 'off' else None
+        downloader = downloader_class(download_path, limiter=limiter)
+        downloader.retry_base_delay = case['retry_delay']
+
+        start = time.perf_counter()
+        downloader.batch_get_update_links(case['titles_csv'], max_workers=case['workers'], max_titles=case['titles'],
+                                          chunk_size=case['chunk_size'], return_results=False)
+        duration = time.perf_counter() - start
+        processed = downloader.stats['processed'] if downloader.stats else 0
+
+    return processed, duration, latencies
+
+def run_case(case):
+    """Run one benchmark case in this process, returns its metrics"""
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        if case['kind'] == 'titles':
+            count, duration, latencies = run_titles_case(case)
+        else:
+            count, duration, latencies = run_updates_case(case)
+
+    return {
+        'count': count,
+        'seconds': round(duration, 3),
+        'per_second': round(count / duration, 1) if duration > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1) if RESOURCE_AVAILABLE else None,
+    }
+
+def write_titles_csv(path, count):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write('Title_ID,Name,Editions\n')
+        for n in range(1, count + 1):
+            f.write(f'CUSA{n:05d},Mock Game {n},Standard\n')
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def build_cases(args, sony_url, serialstation_url, titles_csv):
+    cases = []
+    for workers in args.page_workers:
+        cases.append({'kind': 'titles', 'engine': 'http', 'workers': workers, 'chunk_size': None,
+                      'pages': args.pages, 'rate': args.page_rate, 'base_url': serialstation_url})
+
+    for engine in args.engines:
+        if engine == 'async' and not ps4_scraper.AIOHTTP_AVAILABLE:
+            print("⚠️  aiohttp not installed, skipping the async engine")
+            continue
+        workers_list = args.async_workers if engine == 'async' else args.workers
+        for workers in workers_list:
+            for chunk_size in args.chunk_sizes:
+                for limiter in args.limiters:
+                    cases.append({'kind': 'updates', 'engine': engine, 'workers': workers, 'chunk_size': chunk_size,
+                                  'limiter': limiter, 'titles': args.titles, 'titles_csv': titles_csv,
+                                  'retry_delay': args.retry_delay, 'base_url': sony_url})
+    return cases
+
+def parse_args(argv=None):
+    int_list = lambda value: [int(v) for v in value.split(',') if v.strip()]
+    parser = argparse.ArgumentParser(description="Benchmark ps4_scraper.py against local mock servers")
+    parser.add_argument('--titles', type=int, default=2000, help="titles in the mock catalog (default 2000)")
+    parser.add_argument('--pages', type=int, default=20, help="titles pages to scrape (default 20)")
+    parser.add_argument('--per-page', type=int, default=100, help="titles per page (default 100)")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="mean injected latency per request (default 20)")
+    parser.add_argument('--error-rate', type=float, default=0.01, help="share of paths failing once with 503 (default 0.01)")
+    parser.add_argument('--workers', type=int_list, default=[8, 32], help="threaded engine worker counts (default 8,32)")
+    parser.add_argument('--async-workers', type=int_list, default=[64, 200], help="async engine worker counts (default 64,200)")
+    parser.add_argument('--chunk-sizes', type=int_list, default=[100, 1000], help="chunk sizes (default 100,1000)")
+    parser.add_argument('--page-workers', type=int_list, default=[1, 4, 16], help="titles scraping worker counts (default 1,4,16)")
+    parser.add_argument('--page-rate', type=float, default=1000.0, help="titles scraping rate limit in pages/s (default 1000)")
+    parser.add_argument('--engines', type=lambda v: v.split(','), default=['sync', 'async'], help="update engines (default sync,async)")
+    parser.add_argument('--limiters', type=lambda v: v.split(','), default=['adaptive', 'off'],
+                        help="update cases with the adaptive per-host limiter and/or without any (default adaptive,off)")
+    parser.add_argument('--retry-delay', type=float, default=0.2, help="base delay of the retry rounds in seconds (default 0.2)")
+    parser.add_argument('--quick', action='store_true', help="small catalog and a single configuration per engine")
+    parser.add_argument('--output', default=str(Path(__file__).parent / 'bench_output.txt'), help="JSON lines results file")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.titles, args.pages = 300, 5
+        args.workers, args.async_workers, args.chunk_sizes, args.page_workers = [8], [64], [100], [4]
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Mode interne : un seul cas, lancé par le processus parent
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return 0
+
+    config = {'latency_ms': args.latency_ms, 'error_rate': args.error_rate,
+              'titles': args.pages * args.per_page, 'per_page': args.per_page}
+    sony = start_server(SonyMockHandler, config)
+    serialstation = start_server(SerialStationMockHandler, config)
+    sony_url = f"http://127.0.0.1:{sony.server_address[1]}"
+    serialstation_url = f"http://127.0.0.1:{serialstation.server_address[1]}/titles/"
+
+    revision = git_revision()
+    print(f"🏁 PS4 scraper benchmark ({revision or 'no git revision'})")
+    print(f"🔧 {args.titles:,} titles, {args.pages} pages, {args.latency_ms:.0f} ms latency, "
+          f"{args.error_rate * 100:.1f}% transient errors")
+    print("=" * 100)
+    print(f"{'Case':<36} {'Items':>7} {'Seconds':>9} {'Items/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8} {'Reqs':>7}")
+    print("-" * 100)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        titles_csv = str(Path(work_dir) / 'ps4_titles.csv')
+        write_titles_csv(titles_csv, args.titles)
+
+        for case in build_cases(args, sony_url, serialstation_url, titles_csv):
+            server = serialstation if case['kind'] == 'titles' else sony
+            reset_server(server)
+
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case)],
+                                  capture_output=True, text=True, cwd=work_dir)
+            name = f"{case['kind']}/{case['engine']} w={case['workers']}"
+            if case['chunk_size']:
+                name += f" chunk={case['chunk_size']}"
+            if case.get('limiter') == 'off':
+                name += " nolim"
+            if proc.returncode != 0:
+                print(f"❌ {name}: case failed\n{proc.stderr.strip()[-2000:]}")
+                continue
+
+            metrics = json.loads(proc.stdout.strip().splitlines()[-1])
+            metrics.update({'requests': server.requests, 'injected_errors': server.errors})
+            rss = f"{metrics['peak_rss_mb']:.0f}" if metrics['peak_rss_mb'] is not None else 'n/a'
+            print(f"{name:<36} {metrics['count']:>7,} {metrics['seconds']:>9.2f} {metrics['per_second']:>9.1f} "
+                  f"{metrics['p50_ms']:>9.1f} {metrics['p99_ms']:>9.1f} {rss:>8} {metrics['requests']:>7,}")
+
+            case_info = {k: v for k, v in case.items() if k not in ('base_url', 'titles_csv')}
+            results.append({'revision': revision, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                            'latency_ms': args.latency_ms, 'error_rate': args.error_rate,
+                            'case': case_info, 'metrics': metrics})
+
+    sony.shutdown()
+    serialstation.shutdown()
+
+    with open(args.output, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result) + '\n')
+    print("=" * 100)
+    print(f"📄 {len(results)} results appended to {args.output}")
+    return 0 if results else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 import requests
-import pandas as pd
+from requests.adapters import HTTPAdapter
+import socket
+import importlib
 import time
 import hashlib
 import hmac
@@ -9,29 +11,942 @@ import os
 import sys
 from pathlib import Path
 import random
+import math
+import argparse
 from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import mmap
 import threading
+import csv
+import queue
+import asyncio
+import sqlite3
+import shutil
+import bisect
+import collections
+import re
+import unicodedata
+import contextlib
+import functools
+from html.parser import HTMLParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
-# Import Selenium
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.webdriver.chrome.options import Options
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
-    print("⚠️  Selenium not available. Installing...")
-    os.system("pip install selenium")
+class OptionalImport:
+    """Module imported on first attribute access, so startup stays fast
+    
+    bool() tells whether the module can be imported (trying it the first
+    time); attribute access on a missing module raises its ImportError.
+    """
+    
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._error = None
+    
+    def _load(self):
+        if self._module is None and self._error is None:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError as e:
+                self._error = e
+        if self._module is None:
+            raise self._error
+        return self._module
+    
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+    
+    def __bool__(self):
+        try:
+            self._load()
+            return True
+        except ImportError:
+            return False
+
+# Dépendances lourdes importées au premier usage ; les flags *_AVAILABLE
+# sont vrais si l'import réussit (tenté au premier test)
+pd = OptionalImport('pandas')
+
+# Selenium (optional, browser scraping)
+webdriver = OptionalImport('selenium.webdriver')
+selenium_ui = OptionalImport('selenium.webdriver.support.ui')
+selenium_exceptions = OptionalImport('selenium.common.exceptions')
+SELENIUM_AVAILABLE = webdriver
+
+# lxml (optional, fast HTML parsing for the HTTP scraping mode)
+lxml_html = OptionalImport('lxml.html')
+LXML_AVAILABLE = lxml_html
+
+# pyarrow (optional, columnar Parquet catalog)
+pa = OptionalImport('pyarrow')
+pa_csv = OptionalImport('pyarrow.csv')
+pq = OptionalImport('pyarrow.parquet')
+ARROW_AVAILABLE = pq
+
+# aiohttp (optional, async batch engine)
+aiohttp = OptionalImport('aiohttp')
+AIOHTTP_AVAILABLE = aiohttp
 
 requests.packages.urllib3.disable_warnings()
 
-class PS4TitlesScraper:
-    """Enhanced PS4 Titles scraper for the new endpoint"""
+class TransientError(Exception):
+    """Retryable failure talking to Sony (timeout, connection error, 429/5xx)"""
+
+class Record:
+    """Slotted record with read-only dict-style access
+    
+    Subclasses list their fields in __slots__. record['field'],
+    record.get('field') and 'field' in record keep working where plain
+    dicts were used, and a field never set reads as a missing key. Fields
+    named in INTERNED hold strings repeated across records (IDs, names,
+    versions) and are stored once through sys.intern.
+    """
+    
+    __slots__ = ()
+    INTERNED = ()
+    
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            if name in self.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, name, value)
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+    
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+    
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+    
+    def __contains__(self, name):
+        return name in self.__slots__ and hasattr(self, name)
+    
+    def keys(self):
+        return [name for name in self.__slots__ if hasattr(self, name)]
+    
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.keys()]
+    
+    def to_dict(self):
+        """Plain dict of the set fields, in __slots__ order"""
+        return dict(self.items())
+    
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+def record_json(value):
+    """json.dumps default= hook: records as dicts, anything else as str"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    return str(value)
+
+class TitleRecord(Record):
+    """One row of the titles CSV: 56 bytes plus its strings, against 184 as a dict"""
+    __slots__ = ('Title_ID', 'Name', 'Editions')
+    INTERNED = ('Editions',)
+
+class UpdatePiece(Record):
+    """One update file of a manifest
+    
+    88 bytes plus its own url, hash and filename strings, against 272 for
+    the equivalent dict; game_name, title_id and version are interned and
+    shared by every piece of a title. size stays an int (None if Sony did
+    not give one).
+    """
+    __slots__ = ('game_name', 'version', 'url', 'hash', 'size', 'title_id', 'filename')
+    INTERNED = ('game_name', 'version', 'title_id')
+
+class UpdateResult(Record):
+    """Result of one title (found, no_updates, retry or error)
+    
+    128 bytes plus its UpdatePiece list, against 464 as a dict (272 for a
+    result without updates). With three pieces a found title takes about
+    2.1 KB including its strings, against 3.0 KB with dicts. Fields a
+    status does not use stay unset, so to_dict() gives the same JSON.
+    """
+    __slots__ = ('title_id', 'title_name', 'sony_game_name', 'editions', 'has_updates', 'update_count',
+                 'latest_version', 'total_size_bytes', 'total_size_mb', 'updates', 'status', 'error')
+    INTERNED = ('title_id', 'sony_game_name', 'editions', 'latest_version', 'status')
+    
+    @classmethod
+    def from_dict(cls, data):
+        if 'updates' in data:
+            data = dict(data, updates=[UpdatePiece.from_dict(update) for update in data['updates']])
+        return cls(**data)
+
+# Selenium: la table est prête quand elle a au moins une ligne de données
+TABLE_READY_JS = """
+const table = document.querySelector('table');
+return !!table && table.rows.length > 1;
+"""
+
+# Selenium: texte de toutes les cellules <td> de la première table, sans l'en-tête
+TABLE_ROWS_JS = """
+const table = document.querySelector('table');
+if (!table) return null;
+return Array.from(table.rows).slice(1).map(
+    row => Array.from(row.cells).filter(cell => cell.tagName === 'TD').map(cell => cell.innerText));
+"""
+
+class RateLimiter:
+    """Thread-safe limiter allowing at most `rate` calls per second"""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_time = 0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        """Block until the next call is allowed"""
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+class AdaptiveHostLimiter:
+    """Per-host token bucket with AIMD-adjusted rate and concurrency
+    
+    Hosts start open, at max_rate requests/s and max_concurrency requests
+    in flight, so a healthy run is never slowed down. Congestion means 429
+    responses, or 5xx responses and network errors once they are sustained
+    (error_threshold of the last error_window requests): a single 503 is
+    retried like any transient error without touching the limits. Each
+    congestion event halves the rate and concurrency actually reached (at
+    most once per second), then both climb back quickly to where they were
+    (slow start) and by about +1 per round of requests beyond. Waiters
+    sleep until a slot is released or the next token is due.
+    """
+    
+    def __init__(self, max_rate=1000.0, max_concurrency=64, min_rate=0.5,
+                 initial_rate=None, initial_concurrency=None, error_window=20, error_threshold=3):
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.min_rate = min_rate
+        # None : démarrer au plafond
+        self.initial_rate = initial_rate
+        self.initial_concurrency = initial_concurrency
+        self.error_window = error_window
+        self.error_threshold = error_threshold
+        self.hosts = {}
+        self.lock = threading.Lock()
+        self.slot_freed = threading.Condition(self.lock)
+    
+    def warm_start(self, concurrency):
+        """Start hosts not contacted yet at least at concurrency requests in flight and per second"""
+        with self.lock:
+            if self.initial_concurrency is not None:
+                self.initial_concurrency = max(self.initial_concurrency, concurrency)
+            if self.initial_rate is not None:
+                self.initial_rate = max(self.initial_rate, float(concurrency))
+    
+    def host_state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            rate = self.max_rate if self.initial_rate is None else min(self.initial_rate, self.max_rate)
+            limit = self.max_concurrency if self.initial_concurrency is None else min(self.initial_concurrency, self.max_concurrency)
+            state = self.hosts[host] = {
+                'rate': float(rate),
+                'tokens': 1.0,
+                'updated': time.monotonic(),
+                'limit': float(limit),
+                'in_flight': 0,
+                'slow_start': True,
+                'recover_rate': 0.0,
+                'last_decrease': 0.0,
+                'outcomes': collections.deque(maxlen=self.error_window),
+                'finished': collections.deque(maxlen=256),
+                'requests': 0,
+                'throttled': 0,
+                'waiters': collections.deque(),
+            }
+        return state
+    
+    def take(self, state):
+        """Take a token and a slot (lock held), returns 0, the seconds until the next token, or None while every slot is busy"""
+        now = time.monotonic()
+        state['tokens'] = min(state['rate'], state['tokens'] + (now - state['updated']) * state['rate'])
+        state['tokens'] = max(state['tokens'], 0.0)
+        state['updated'] = now
+        
+        if state['in_flight'] >= int(state['limit']):
+            return None
+        if state['tokens'] < 1:
+            return (1 - state['tokens']) / state['rate']
+        
+        state['tokens'] -= 1
+        state['in_flight'] += 1
+        return 0
+    
+    def acquire(self, host):
+        """Block until a request to host is allowed"""
+        with self.slot_freed:
+            state = self.host_state(host)
+            while True:
+                delay = self.take(state)
+                if delay == 0:
+                    return
+                # Réveillé par release() quand un slot se libère, sinon au prochain jeton
+                self.slot_freed.wait(delay)
+    
+    async def acquire_async(self, host):
+        """Asyncio version of acquire"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.lock:
+                state = self.host_state(host)
+                delay = self.take(state)
+                if delay is None:
+                    waiter = loop.create_future()
+                    state['waiters'].append(waiter)
+            if delay == 0:
+                return
+            if delay is None:
+                try:
+                    await waiter
+                except asyncio.CancelledError:
+                    # Réveillé puis annulé : passer le slot libre au suivant
+                    if waiter.done() and not waiter.cancelled():
+                        with self.lock:
+                            self.wake(state)
+                    raise
+            else:
+                await asyncio.sleep(delay)
+    
+    def wake(self, state):
+        """Wake as many waiters as there are free slots (lock held)"""
+        free = int(state['limit']) - state['in_flight']
+        if free > 0:
+            self.slot_freed.notify(free)
+        while free > 0 and state['waiters']:
+            waiter = state['waiters'].popleft()
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(self.resolve, waiter)
+                free -= 1
+    
+    @staticmethod
+    def resolve(waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+    
+    def reached_rate(self, state, now):
+        """Requests/s actually completed over the last few hundred requests (lock held)"""
+        finished = state['finished']
+        if len(finished) < 2 or now - finished[0] <= 0:
+            return state['rate']
+        return len(finished) / (now - finished[0])
+    
+    def decrease(self, state, factor):
+        """Multiplicative decrease of what the host actually served, at most once per second"""
+        now = time.monotonic()
+        state['slow_start'] = False
+        if now - state['last_decrease'] < 1.0:
+            return
+        state['last_decrease'] = now
+        state['outcomes'].clear()
+        # Partir du débit et du parallélisme atteints, pas des plafonds jamais utilisés
+        rate = min(state['rate'], self.reached_rate(state, now))
+        limit = min(state['limit'], state['in_flight'] + 1.0)
+        # Le débit d'avant la baisse sera retrouvé vite (comme en slow start), au-delà +1 par tour
+        state['recover_rate'] = rate
+        state['limit'] = max(1.0, limit * factor)
+        state['rate'] = max(self.min_rate, rate * factor)
+    
+    def release(self, host, status):
+        """Report a finished request (status None for a network error) and adapt"""
+        with self.lock:
+            state = self.host_state(host)
+            state['in_flight'] -= 1
+            state['requests'] += 1
+            state['finished'].append(time.monotonic())
+            
+            failed = status is None or status >= 500
+            state['outcomes'].append(failed)
+            if status == 429 or (failed and sum(state['outcomes']) >= self.error_threshold):
+                state['throttled'] += 1
+                self.decrease(state, 0.5)
+            elif not failed:
+                if state['slow_start'] or state['rate'] < state['recover_rate']:
+                    state['rate'] = min(self.max_rate, state['rate'] + 1)
+                    state['limit'] = min(float(self.max_concurrency), state['limit'] + 1)
+                else:
+                    # Additive increase, about +1 per round of requests
+                    state['rate'] = min(self.max_rate, state['rate'] + 1 / state['rate'])
+                    state['limit'] = min(float(self.max_concurrency), state['limit'] + 1 / state['limit'])
+            self.wake(state)
+    
+    def summary(self):
+        """One line per host with the current rate and concurrency"""
+        with self.lock:
+            return [f"{host}: {state['rate']:.1f} req/s, {int(state['limit'])} in flight, "
+                    f"{state['requests']:,} requests, {state['throttled']:,} throttled"
+                    for host, state in sorted(self.hosts.items())]
+
+class TitlesTableParser(HTMLParser):
+    """Pure-Python fallback parser collecting the cell texts of the first <table>"""
     
     def __init__(self):
+        super().__init__()
+        self.rows = []
+        self.seen_table = False
+        self.table_depth = 0
+        self.done = False
+        self.cell = None
+    
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == 'table':
+            self.seen_table = True
+            self.table_depth += 1
+        elif self.table_depth == 1 and tag == 'tr':
+            self.rows.append([])
+        elif self.table_depth == 1 and tag in ('td', 'th') and self.rows:
+            self.cell = []
+    
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag in ('td', 'th') and self.cell is not None:
+            self.rows[-1].append((tag, ' '.join(''.join(self.cell).split())))
+            self.cell = None
+        elif tag == 'table':
+            self.table_depth -= 1
+            if self.table_depth == 0:
+                self.done = True
+    
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+
+class ColumnarCatalog:
+    """Typed Parquet copies of the titles, update summary and download links CSVs
+    
+    Every CSV gets a sibling .parquet file (same name, new extension) which
+    is preferred on load whenever it is at least as recent as the CSV, read
+    memory-mapped and limited to the requested columns. Without pyarrow
+    everything falls back to pandas.read_csv.
+    """
+    
+    # Colonnes typées ; tout ce qui n'est pas listé est lu comme texte
+    COLUMN_TYPES = {
+        'summary': {'Has_Updates': 'bool', 'Update_Count': 'int64', 'Total_Size_MB': 'float64'},
+        'links': {'Size_MB': 'float64', 'Size_Bytes': 'int64'},
+        'titles': {},
+    }
+    
+    def kind(self, csv_file):
+        """Guess which table a CSV holds from its name"""
+        name = Path(csv_file).name
+        if name.endswith('update_summary.csv'):
+            return 'summary'
+        if name.endswith('download_links.csv'):
+            return 'links'
+        return 'titles'
+    
+    def parquet_path(self, csv_file):
+        return Path(csv_file).with_suffix('.parquet')
+    
+    def is_fresh(self, csv_file):
+        """True if the Parquet copy exists and is not older than the CSV
+        
+        A Parquet copy without its CSV is never fresh: it may describe a
+        file since deleted, loading then raises FileNotFoundError.
+        """
+        parquet_file = self.parquet_path(csv_file)
+        if not parquet_file.exists() or not Path(csv_file).exists():
+            return False
+        return parquet_file.stat().st_mtime >= Path(csv_file).stat().st_mtime
+    
+    def read_csv_table(self, csv_file):
+        """Parse a CSV with pyarrow using the typed schema, empty strings stay ''"""
+        types = self.COLUMN_TYPES[self.kind(csv_file)]
+        with open(csv_file, 'r', encoding='utf-8') as f:
+            header = next(csv.reader(f))
+        column_types = {column: pa.type_for_alias(types.get(column, 'string')) for column in header}
+        return pa_csv.read_csv(csv_file, convert_options=pa_csv.ConvertOptions(
+            column_types=column_types, strings_can_be_null=False))
+    
+    def export(self, csv_file):
+        """Write (or refresh) the Parquet copy of a CSV, returns its path or None"""
+        if not ARROW_AVAILABLE or not Path(csv_file).exists():
+            return None
+        
+        parquet_file = self.parquet_path(csv_file)
+        tmp_file = parquet_file.with_name(parquet_file.name + '.tmp')
+        pq.write_table(self.read_csv_table(csv_file), tmp_file)
+        os.replace(tmp_file, parquet_file)
+        return parquet_file
+    
+    def ensure_parquet(self, csv_file):
+        """True once the Parquet copy is fresh, False if it cannot be written"""
+        if self.is_fresh(csv_file):
+            return True
+        try:
+            return self.export(csv_file) is not None
+        except OSError:
+            # Dossier en lecture seule, disque plein... : on lira le CSV directement
+            return False
+    
+    def load_table(self, csv_file, columns=None):
+        """Load a catalog as a pyarrow Table, Parquet first (requires pyarrow)"""
+        if self.ensure_parquet(csv_file):
+            return pq.read_table(self.parquet_path(csv_file), columns=columns, memory_map=True)
+        table = self.read_csv_table(csv_file)
+        return table.select(columns) if columns else table
+    
+    def load_records(self, csv_file, columns=None, max_rows=None):
+        """Load a catalog as a list of dicts, only the requested columns"""
+        if ARROW_AVAILABLE:
+            table = self.load_table(csv_file, columns)
+            if max_rows:
+                table = table.slice(0, max_rows)
+            return table.to_pylist()
+        
+        if self.kind(csv_file) == 'titles':
+            df = pd.read_csv(csv_file, usecols=columns, nrows=max_rows, dtype=str, keep_default_na=False)
+        else:
+            df = pd.read_csv(csv_file, usecols=columns, nrows=max_rows)
+        return df.to_dict('records')
+    
+    def count(self, csv_file):
+        """Number of rows in a catalog, from the Parquet footer when possible"""
+        if ARROW_AVAILABLE:
+            if self.ensure_parquet(csv_file):
+                return pq.ParquetFile(self.parquet_path(csv_file)).metadata.num_rows
+            return self.read_csv_table(csv_file).num_rows
+        return len(self.load_records(csv_file, columns=[0]))
+
+class CatalogIndex:
+    """In-memory index over the titles, update summary and download links CSVs
+    
+    get() is a dict lookup by Title_ID once build() ran; lookup() answers a
+    single Title_ID straight from the CSVs without building anything, for
+    one-shot commands. is_hit() tells whether a record can stand in for a
+    live check. search() finds name prefixes with
+    bisect over the sorted normalized names, then substrings with str.find
+    over one string holding every name, so a query over the whole catalog
+    stays well under a millisecond. Names are matched on Name and
+    Sony_Game_Name, case-insensitive and ignoring ®/™ marks.
+    """
+    
+    def __init__(self, titles_csv='ps4_titles.csv', download_path='./ps4_titles_updates/'):
+        download_path = Path(download_path)
+        self.titles_csv = Path(titles_csv)
+        self.summary_csv = download_path / "ps4_titles_update_summary.csv"
+        self.links_csv = download_path / "ps4_titles_download_links.csv"
+        self.records = {}
+        self.sorted_names = []  # (nom normalisé, Title_ID) triés pour les préfixes
+        self.names_text = ''    # tous les noms séparés par \n pour les sous-chaînes
+        self.name_offsets = []
+        self.name_owners = []
+        self.mtimes = None
+    
+    def source_mtimes(self):
+        return tuple(path.stat().st_mtime if path.exists() else None
+                     for path in (self.titles_csv, self.summary_csv, self.links_csv))
+    
+    def is_stale(self):
+        """True if a source CSV changed since build()"""
+        return self.mtimes != self.source_mtimes()
+    
+    def normalize_name(self, name):
+        name = str(name or '').casefold()
+        for mark in ('®', '™', '©'):
+            name = name.replace(mark, '')
+        return ' '.join(name.split())
+    
+    def text(self, value):
+        # pandas lit les cellules vides en NaN
+        return '' if value is None or value != value else str(value)
+    
+    def new_record(self, title_id, name='', editions=''):
+        return {'Title_ID': title_id, 'Name': name, 'Editions': editions, 'Sony_Game_Name': '',
+                'Has_Updates': None, 'Update_Count': 0, 'Latest_Version': '', 'Total_Size_MB': 0.0,
+                'Status': '', 'updates': []}
+    
+    def apply_summary(self, record, row):
+        """Copy the update summary columns of a row into a record"""
+        record.update({
+            'Sony_Game_Name': self.text(row['Sony_Game_Name']),
+            'Has_Updates': row['Has_Updates'] in (True, 'True'),
+            'Update_Count': int(row['Update_Count'] or 0),
+            'Latest_Version': self.text(row['Latest_Version']),
+            'Total_Size_MB': float(row['Total_Size_MB'] or 0),
+            'Status': self.text(row['Status']),
+        })
+    
+    def add_link(self, record, row):
+        # Même forme que les entrées de get_update_info
+        record['updates'].append(UpdatePiece(
+            game_name=self.text(row['Sony_Game_Name']),
+            version=self.text(row['Version']),
+            url=self.text(row['Download_URL']),
+            hash=self.text(row['SHA1_Hash']),
+            size=int(row['Size_Bytes'] or 0),
+            title_id=record['Title_ID'],
+            filename=self.text(row['Filename']),
+        ))
+    
+    def is_hit(self, record):
+        """True if a record answers an update check without asking Sony
+        
+        Titles never collected, failed ones, and titles the summary marks
+        with updates whose download links are missing (no links CSV) are
+        misses.
+        """
+        if record is None or record['Has_Updates'] is None or record['Status'] in ('error', 'retry'):
+            return False
+        return not (record['Has_Updates'] and not record['updates'])
+    
+    def lines_from(self, data, offset):
+        """Decoded lines of a memory-mapped file from a byte offset"""
+        while offset < len(data):
+            end = data.find(b'\n', offset)
+            end = len(data) if end == -1 else end + 1
+            yield data[offset:end].decode('utf-8')
+            offset = end
+    
+    def rows_for(self, path, title_id):
+        """Rows of a CSV whose Title_ID is title_id, read without pandas or pyarrow
+        
+        Title_ID is the first column of every catalog CSV: records are found
+        by a byte search for a line starting with the ID, then csv.reader
+        parses each one from its offset, so quoted fields spanning several
+        lines (names with a newline) stay in their record.
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header = next(csv.reader(self.lines_from(data, 0)), [])
+                if not header or header[0] != 'Title_ID':
+                    return [row for row in csv.DictReader(self.lines_from(data, 0)) if row.get('Title_ID') == title_id]
+                
+                rows = []
+                needle = b'\n' + title_id.encode('utf-8')
+                position = data.find(needle)
+                while position != -1:
+                    cells = next(csv.reader(self.lines_from(data, position + 1)), [])
+                    # Un début de ligne dans un champ entre guillemets ne donne pas un enregistrement complet
+                    if len(cells) == len(header) and cells[0] == title_id:
+                        rows.append(dict(zip(header, cells)))
+                    position = data.find(needle, position + 1)
+                return rows
+    
+    def lookup(self, title_id):
+        """Record of one Title_ID read straight from the CSVs, or None"""
+        record = None
+        if self.titles_csv.exists():
+            for row in self.rows_for(self.titles_csv, title_id):
+                record = self.new_record(title_id, row['Name'], row['Editions'])
+        if self.summary_csv.exists():
+            for row in self.rows_for(self.summary_csv, title_id):
+                if record is None:
+                    record = self.new_record(title_id, row['Title_Name'], row['Editions'])
+                self.apply_summary(record, row)
+        if record is not None and self.links_csv.exists():
+            for row in self.rows_for(self.links_csv, title_id):
+                self.add_link(record, row)
+        return record
+    
+    def build(self):
+        """(Re)load every available source CSV, returns self"""
+        self.mtimes = self.source_mtimes()
+        catalog = ColumnarCatalog()
+        records = {}
+        
+        if self.titles_csv.exists():
+            for row in catalog.load_records(self.titles_csv, columns=['Title_ID', 'Name', 'Editions']):
+                title_id = self.text(row['Title_ID'])
+                records[title_id] = self.new_record(title_id, self.text(row['Name']), self.text(row['Editions']))
+        
+        if self.summary_csv.exists():
+            for row in catalog.load_records(self.summary_csv):
+                title_id = self.text(row['Title_ID'])
+                record = records.get(title_id)
+                if record is None:
+                    record = records[title_id] = self.new_record(title_id, self.text(row['Title_Name']),
+                                                                 self.text(row['Editions']))
+                self.apply_summary(record, row)
+        
+        if self.links_csv.exists():
+            columns = ['Title_ID', 'Sony_Game_Name', 'Version', 'Size_Bytes', 'Filename', 'Download_URL', 'SHA1_Hash']
+            for row in catalog.load_records(self.links_csv, columns=columns):
+                record = records.get(self.text(row['Title_ID']))
+                if record is not None:
+                    self.add_link(record, row)
+        
+        names = []
+        for title_id, record in records.items():
+            for name in {self.normalize_name(record['Name']), self.normalize_name(record['Sony_Game_Name'])}:
+                if name:
+                    names.append((name, title_id))
+        
+        self.records = records
+        self.sorted_names = sorted(names)
+        self.name_offsets = []
+        self.name_owners = []
+        offset = 0
+        for name, title_id in names:
+            self.name_offsets.append(offset)
+            self.name_owners.append(title_id)
+            offset += len(name) + 1
+        self.names_text = '\n'.join(name for name, _ in names)
+        return self
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def get(self, title_id):
+        """Record of a Title_ID (CUSAxxxxx), or None"""
+        return self.records.get(title_id)
+    
+    def search(self, query, limit=20):
+        """Records whose name starts with query, then those containing it"""
+        query = self.normalize_name(query)
+        if not query:
+            return []
+        found = {}
+        
+        index = bisect.bisect_left(self.sorted_names, (query,))
+        while index < len(self.sorted_names) and len(found) < limit:
+            name, title_id = self.sorted_names[index]
+            if not name.startswith(query):
+                break
+            found.setdefault(title_id, None)
+            index += 1
+        
+        position = self.names_text.find(query)
+        while position != -1 and len(found) < limit:
+            name_index = bisect.bisect_right(self.name_offsets, position) - 1
+            found.setdefault(self.name_owners[name_index], None)
+            # Passer au nom suivant
+            next_index = name_index + 1
+            if next_index >= len(self.name_offsets):
+                break
+            position = self.names_text.find(query, self.name_offsets[next_index])
+        
+        return [self.records[title_id] for title_id in found]
+
+class GameGrouper:
+    """Group CUSA IDs into logical games from their SerialStation and Sony names
+    
+    Names are normalized (case, accents, ®/™ marks, punctuation, roman
+    numerals, a trailing edition suffix) and identical keys are merged
+    directly. Near
+    duplicates are then found with trigram Jaccard similarity, blocked by
+    prefix filtering: trigrams are sorted rarest first and two names are
+    only compared if they share one of their first few trigrams, so the
+    43k titles group in seconds instead of a pairwise O(n²) pass. Names
+    with different numbers (FIFA 19 / FIFA 20) are never merged.
+    """
+    
+    ROMAN_NUMERALS = {'ii': '2', 'iii': '3', 'iv': '4', 'v': '5', 'vi': '6', 'vii': '7',
+                      'viii': '8', 'ix': '9', 'x': '10', 'xi': '11', 'xii': '12', 'xiii': '13'}
+    EDITION_WORDS = {'edition', 'deluxe', 'digital', 'gold', 'goty', 'complete', 'definitive',
+                     'standard', 'ultimate', 'premium', 'collectors', 'limited', 'special',
+                     'bundle', 'ps4', 'playstation4', 'trial', 'full', 'game'}
+    # Un suffixe d'édition finit par l'un de ces mots ("... Gold Edition", "... GOTY", "... Trial")
+    EDITION_MARKERS = {'edition', 'goty', 'bundle', 'ps4', 'playstation4', 'trial'}
+    GAME_SUFFIX = re.compile(r' (?:the game|full game|trial ver(?:sion)?)$')
+    APOSTROPHES = re.compile(r"['’`´]")
+    SEPARATORS = re.compile(r'[\W_]+')
+    GROUP_COLUMNS = ['Game_ID', 'Game_Name', 'Title_Count', 'Title_ID', 'Title_Name',
+                     'Sony_Game_Name', 'Editions']
+    
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.parents = {}
+        self.stats = {'titles': 0, 'names': 0, 'candidates': 0, 'fuzzy_merges': 0, 'games': 0}
+    
+    def normalize_name(self, name):
+        """Comparison key of a game name, '' if nothing meaningful is left"""
+        name = str(csv_value(name))
+        for mark in ('®', '™', '©', '℠'):
+            name = name.replace(mark, ' ')  # NFKD ferait de ™ un "TM"
+        name = name.casefold()
+        if not name.isascii():
+            name = unicodedata.normalize('NFKD', name)
+            name = ''.join(char for char in name if not unicodedata.combining(char))
+        # Apostrophes collées (assassin's -> assassins), le reste de la ponctuation sépare les mots
+        name = self.APOSTROPHES.sub('', name).replace('&', ' and ').replace('playstation 4', 'playstation4')
+        words = [self.ROMAN_NUMERALS.get(word, word) for word in self.SEPARATORS.sub(' ', name).split()]
+        # "game of the year" / "edition" en fin de nom ne changent pas le jeu,
+        # ailleurs ce sont des mots du titre ("Gold Rush", "Game Dev Tycoon")
+        key = self.GAME_SUFFIX.sub('', ' '.join(words).replace('game of the year', 'goty')).split()
+        end = len(key)
+        if key and key[-1] in self.EDITION_MARKERS:
+            while end > 0 and key[end - 1] in self.EDITION_WORDS:
+                end -= 1
+        stripped = [word for word in key[:end] if word != 'the']
+        return ' '.join(stripped or key)
+    
+    def trigrams(self, key):
+        padded = f"  {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def numbers(self, key):
+        # FIFA 19 / FIFA19 : les chiffres collés comptent aussi
+        return frozenset(re.findall(r'\d+', key))
+    
+    def find(self, item):
+        parents = self.parents
+        root = item
+        while parents[root] != root:
+            root = parents[root]
+        while parents[item] != root:  # compression de chemin
+            parents[item], item = root, parents[item]
+        return root
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # La plus petite clé reste racine : Game_ID stable d'un run à l'autre
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parents[root_b] = root_a
+            return True
+        return False
+    
+    def merge_similar(self, keys):
+        """Union the keys whose trigram Jaccard similarity reaches the threshold"""
+        grams = {key: self.trigrams(key) for key in keys}
+        sizes = {key: len(key_grams) for key, key_grams in grams.items()}
+        numbers = {key: self.numbers(key) for key in keys}
+        frequency = {}
+        for key_grams in grams.values():
+            for gram in key_grams:
+                frequency[gram] = frequency.get(gram, 0) + 1
+        
+        threshold = self.threshold
+        index_ratio = 2 * threshold / (1 + threshold)
+        index = {}
+        # Du plus court au plus long : les clés déjà indexées ne sont jamais plus grandes,
+        # et celles devenues trop courtes sortent des listes pour de bon
+        for key in sorted(keys, key=lambda key: (sizes[key], key)):
+            key_grams = grams[key]
+            size = sizes[key]
+            min_size = threshold * size
+            ordered = sorted(key_grams, key=lambda gram: (frequency[gram], gram))
+            index_length = size - math.ceil(index_ratio * size) + 1
+            candidates = set()
+            for position, gram in enumerate(ordered[:size - math.ceil(min_size) + 1]):
+                postings = index.get(gram)
+                if postings:
+                    while postings and sizes[postings[0]] < min_size:
+                        postings.popleft()
+                    candidates.update(postings)
+                if position < index_length:
+                    if postings is None:
+                        postings = index[gram] = collections.deque()
+                    postings.append(key)
+            
+            self.stats['candidates'] += len(candidates)
+            key_numbers = numbers[key]
+            for other in candidates:
+                common = len(key_grams & grams[other])
+                if common >= threshold * (size + sizes[other] - common) and numbers[other] == key_numbers:
+                    if self.union(key, other):
+                        self.stats['fuzzy_merges'] += 1
+    
+    def group(self, titles):
+        """Game_ID of each title, titles being dicts with Title_ID, Title_Name, Sony_Game_Name"""
+        self.parents = {}
+        title_keys = {}
+        normalized = {}  # beaucoup de noms se répètent d'une région à l'autre
+        for title in titles:
+            keys = set()
+            for column in ('Title_Name', 'Sony_Game_Name'):
+                name = title.get(column)
+                if name not in normalized:
+                    normalized[name] = self.normalize_name(name)
+                keys.add(normalized[name])
+            keys.discard('')
+            title_keys[title['Title_ID']] = keys
+            for key in keys:
+                self.parents.setdefault(key, key)
+            # Les deux noms d'un même CUSA désignent le même jeu
+            if len(keys) == 2:
+                self.union(*keys)
+        
+        self.merge_similar(list(self.parents))
+        
+        games = {}
+        for title_id, keys in title_keys.items():
+            games[title_id] = self.find(next(iter(keys))) if keys else f"#{title_id}"
+        # Game_ID lisible : le plus petit Title_ID du groupe
+        first_ids = {}
+        for title_id, root in sorted(games.items()):
+            first_ids.setdefault(root, title_id)
+        
+        self.stats.update({'titles': len(title_keys), 'names': len(self.parents), 'games': len(first_ids)})
+        return {title_id: first_ids[root] for title_id, root in games.items()}
+    
+    def game_name(self, members):
+        """Most common Sony name of a group, else its most common SerialStation name"""
+        for column in ('Sony_Game_Name', 'Title_Name'):
+            names = [str(title.get(column) or '').strip() for title in members]
+            names = [name for name in names if name and name != 'nan']
+            if names:
+                return max(sorted(set(names)), key=names.count)
+        return ''
+    
+    def group_file(self, summary_csv, output_file=None):
+        """Group the titles of an update summary CSV and write the groups CSV
+        
+        Returns the list of written rows (one per title).
+        """
+        summary_csv = Path(summary_csv)
+        if output_file is None:
+            output_file = summary_csv.with_name('ps4_titles_game_groups.csv')
+        
+        columns = ['Title_ID', 'Title_Name', 'Sony_Game_Name', 'Editions']
+        titles = ColumnarCatalog().load_records(summary_csv, columns=columns)
+        games = self.group(titles)
+        
+        members = {}
+        for title in titles:
+            members.setdefault(games[title['Title_ID']], []).append(title)
+        
+        rows = []
+        for game_id in sorted(members):
+            group = sorted(members[game_id], key=lambda title: title['Title_ID'])
+            name = self.game_name(group)
+            for title in group:
+                rows.append({'Game_ID': game_id, 'Game_Name': name, 'Title_Count': len(group),
+                             **{column: csv_value(title.get(column)) for column in columns}})
+        
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.GROUP_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return rows
+
+class PS4TitlesScraper:
+    """Enhanced PS4 Titles scraper for the new endpoint
+    
+    With use_browser=False pages are fetched with a plain HTTP session and
+    parsed directly; Selenium is only started as a fallback for pages that
+    could not be parsed that way. With drivers > 1 the Selenium path splits
+    the page range over a SeleniumDriverPool.
+    """
+    
+    def __init__(self, use_browser=True, drivers=1, page_timeout=15):
         self.base_url = "https://www.serialstation.com/titles/"
         self.params = {
             'systems': '97ec53a2-f676-4c89-8172-e653dce5eed1',  # PS4 system ID
@@ -39,7 +954,15 @@ class PS4TitlesScraper:
         }
         self.games_data = []
         self.driver = None
-        self.setup_driver()
+        self.use_browser = use_browser
+        self.drivers = drivers
+        self.page_timeout = page_timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        })
+        if use_browser:
+            self.setup_driver()
     
     def setup_driver(self):
         """Setup Chrome driver"""
@@ -47,7 +970,7 @@ class PS4TitlesScraper:
             print("❌ Selenium not available for scraping")
             return
             
-        chrome_options = Options()
+        chrome_options = webdriver.ChromeOptions()
         chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -62,6 +985,103 @@ class PS4TitlesScraper:
             print(f"❌ Error setting up driver: {e}")
             self.driver = None
     
+    def page_url(self, page_num):
+        """Construire l'URL d'une page de titles"""
+        return f"{self.base_url}?systems={self.params['systems']}&title_id_type={self.params['title_id_type']}&page={page_num}"
+    
+    def make_title_record(self, title_id, name, editions):
+        """Build a Title_ID/Name/Editions record from raw cell texts"""
+        if not (title_id and name):
+            return None
+        
+        # Nettoyer le Title ID
+        if title_id.startswith('CUSA-'):
+            title_id = title_id.replace('CUSA-', 'CUSA')
+        
+        return {
+            'Title_ID': title_id,
+            'Name': name,
+            'Editions': editions
+        }
+    
+    def parse_titles_html(self, html):
+        """Parse the titles table out of a page, returns None if there is no table"""
+        if LXML_AVAILABLE:
+            doc = lxml_html.fromstring(html)
+            tables = doc.xpath('//table')
+            if not tables:
+                return None
+            table = tables[0]
+            rows = [[(cell.tag, ' '.join(cell.text_content().split())) for cell in tr.xpath('./td|./th')]
+                    for tr in table.iter('tr') if tr.xpath('ancestor::table[1]')[0] is table]
+        else:
+            parser = TitlesTableParser()
+            parser.feed(html)
+            if not parser.seen_table:
+                return None
+            rows = parser.rows
+        
+        page_games = []
+        # Ignorer l'en-tête, garder les lignes avec au moins 3 colonnes (Title ID, Name, Editions)
+        for row in rows[1:]:
+            cells = [text for tag, text in row if tag == 'td']
+            if len(cells) >= 3:
+                game_data = self.make_title_record(cells[0], cells[1], cells[2])
+                if game_data:
+                    page_games.append(game_data)
+        
+        return page_games
+    
+    def fetch_page_http(self, page_num, max_retries=3):
+        """Fetch and parse a page without a browser
+        
+        Returns [] for a table without rows (past the last page) and None
+        on failure or when the page has no table markup at all.
+        """
+        url = self.page_url(page_num)
+        
+        for attempt in range(max_retries):
+            try:
+                response = self.session.get(url, timeout=30)
+                if response.status_code == 200:
+                    page_games = self.parse_titles_html(response.text)
+                    # Pas de table du tout : la page est peut-être rendue en JS (None -> Selenium)
+                    return page_games
+                print(f"❌ HTTP {response.status_code} for page {page_num}")
+            except Exception as e:
+                print(f"❌ Attempt {attempt + 1} failed for page {page_num}: {e}")
+            
+            if attempt < max_retries - 1:
+                time.sleep(random.uniform(3, 6))
+        
+        return None
+    
+    def scrape_pages_http(self, pages, max_workers=8, rate=4):
+        """Fetch several pages concurrently under a rate cap, returns {page: titles}"""
+        limiter = RateLimiter(rate)
+        results = {}
+        
+        def fetch(page_num):
+            limiter.wait()
+            return self.fetch_page_http(page_num)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_page = {executor.submit(fetch, page): page for page in pages}
+            for future in as_completed(future_to_page):
+                results[future_to_page[future]] = future.result()
+        
+        # Repli sur Selenium pour les pages que le parse HTTP n'a pas pu lire
+        for page in sorted(p for p, titles in results.items() if titles is None):
+            print(f"🔁 Falling back to Selenium for page {page}")
+            if not self.driver:
+                self.setup_driver()
+            results[page] = self.scrape_page(page)
+        
+        for page in sorted(results):
+            print(f"✅ Page {page}: {len(results[page])} titles found")
+        
+        return results
+    
     def scrape_page(self, page_num):
         """Scraper une page de titles"""
         if not self.driver:
@@ -69,7 +1089,7 @@ class PS4TitlesScraper:
             return []
         
         # Construire l'URL pour cette page
-        url = f"{self.base_url}?systems={self.params['systems']}&title_id_type={self.params['title_id_type']}&page={page_num}"
+        url = self.page_url(page_num)
         
         max_retries = 3
         for attempt in range(max_retries):
@@ -77,24 +1097,24 @@ class PS4TitlesScraper:
                 print(f"🔗 Loading page {page_num}...")
                 self.driver.get(url)
                 
-                # Attendre que la page se charge
-                time.sleep(3)
+                # Attendre que la table soit prête (au lieu d'un sleep fixe)
+                try:
+                    selenium_ui.WebDriverWait(self.driver, self.page_timeout).until(
+                        lambda driver: driver.execute_script(TABLE_READY_JS))
+                except selenium_exceptions.TimeoutException:
+                    pass
                 
-                # Trouver la table des titres
-                tables = self.driver.find_elements(By.TAG_NAME, "table")
+                # Lire toute la table en un seul aller-retour WebDriver
+                rows = self.driver.execute_script(TABLE_ROWS_JS)
                 
-                if not tables:
+                if rows is None:
                     print(f"❌ No table found on page {page_num}")
                     if attempt == max_retries - 1:
                         return []
                     time.sleep(5)
                     continue
                 
-                # Prendre la première table (principale)
-                table = tables[0]
-                rows = table.find_elements(By.TAG_NAME, "tr")
-                
-                if len(rows) <= 1:
+                if not rows:
                     print(f"❌ No data rows on page {page_num}")
                     if attempt == max_retries - 1:
                         return []
@@ -103,32 +1123,13 @@ class PS4TitlesScraper:
                 
                 page_games = []
                 
-                # Parcourir les lignes (sauf l'en-tête)
-                for row_idx, row in enumerate(rows[1:], 1):
-                    try:
-                        cells = row.find_elements(By.TAG_NAME, "td")
-                        
-                        # Vérifier qu'on a au moins 3 colonnes (Title ID, Name, Editions)
-                        if len(cells) >= 3:
-                            title_id = cells[0].text.strip()
-                            name = cells[1].text.strip()
-                            editions = cells[2].text.strip()
-                            
-                            if title_id and name:
-                                # Nettoyer le Title ID
-                                if title_id.startswith('CUSA-'):
-                                    title_id = title_id.replace('CUSA-', 'CUSA')
-                                
-                                game_data = {
-                                    'Title_ID': title_id,
-                                    'Name': name,
-                                    'Editions': editions
-                                }
-                                page_games.append(game_data)
-                    
-                    except Exception as e:
-                        print(f"⚠️ Error parsing row {row_idx}: {e}")
-                        continue
+                # Parcourir les lignes (l'en-tête est déjà exclu)
+                for cells in rows:
+                    # Vérifier qu'on a au moins 3 colonnes (Title ID, Name, Editions)
+                    if len(cells) >= 3:
+                        game_data = self.make_title_record(cells[0].strip(), cells[1].strip(), cells[2].strip())
+                        if game_data:
+                            page_games.append(game_data)
                 
                 print(f"✅ Page {page_num}: {len(page_games)} titles found")
                 return page_games
@@ -149,8 +1150,7 @@ class PS4TitlesScraper:
         # Charger les données existantes si on reprend
         if start_page > 1:
             try:
-                df = pd.read_csv('ps4_titles_partial.csv')
-                self.games_data = df.to_dict('records')
+                self.games_data = ColumnarCatalog().load_records('ps4_titles_partial.csv')
                 print(f"📂 Resuming from page {start_page}, loaded {len(self.games_data)} existing titles")
             except FileNotFoundError:
                 print("📂 No partial data found, starting fresh")
@@ -164,6 +1164,16 @@ class PS4TitlesScraper:
         
         start_time = time.time()
         
+        if not self.use_browser:
+            return self.scrape_all_titles_batched(max_pages, start_page, start_time, self.scrape_pages_http)
+        
+        if self.drivers > 1:
+            pool = SeleniumDriverPool(self.drivers, first=self)
+            try:
+                return self.scrape_all_titles_batched(max_pages, start_page, start_time, pool.scrape_pages)
+            finally:
+                pool.close()
+        
         for page in range(start_page, max_pages + 1):
             # Calculer le progrès
             progress = ((page - start_page + 1) / (max_pages - start_page + 1)) * 100
@@ -197,6 +1207,43 @@ class PS4TitlesScraper:
         
         return self.games_data
     
+    def scrape_all_titles_batched(self, max_pages, start_page, start_time, scrape_pages, batch_size=20):
+        """scrape_all_titles loop for parallel modes, scrape_pages(pages) returns {page: titles}"""
+        consecutive_empty_pages = 0
+        
+        for batch_start in range(start_page, max_pages + 1, batch_size):
+            batch_end = min(batch_start + batch_size - 1, max_pages)
+            
+            elapsed = time.time() - start_time
+            done = batch_start - start_page
+            remaining = elapsed / done * (max_pages - batch_start + 1) if done else 0
+            print(f"\n📄 Pages {batch_start}-{batch_end}/{max_pages} "
+                  f"({(batch_end - start_page + 1) / (max_pages - start_page + 1) * 100:.1f}%) - ETA: {remaining/60:.1f} min")
+            
+            results = scrape_pages(range(batch_start, batch_end + 1))
+            
+            for page in range(batch_start, batch_end + 1):
+                page_data = results.get(page)
+                
+                if not page_data:
+                    consecutive_empty_pages += 1
+                    print(f"⚠️  Empty page {page} (consecutive: {consecutive_empty_pages})")
+                    
+                    if consecutive_empty_pages >= 5:
+                        print(f"🛑 Hit {consecutive_empty_pages} consecutive empty pages, stopping")
+                        return self.games_data
+                else:
+                    consecutive_empty_pages = 0
+                    self.games_data.extend(page_data)
+            
+            print(f"📊 Total titles collected: {len(self.games_data)}")
+            
+            # Sauvegarder à chaque lot
+            self.save_to_csv('ps4_titles_partial.csv')
+            print(f"💾 Saved checkpoint at page {batch_end}")
+        
+        return self.games_data
+    
     def save_to_csv(self, filename='ps4_titles.csv'):
         """Sauvegarder en CSV"""
         if self.games_data:
@@ -209,6 +1256,7 @@ class PS4TitlesScraper:
                 final_count = len(df)
                 
                 df.to_csv(filename, index=False, encoding='utf-8')
+                ColumnarCatalog().export(filename)
                 
                 if original_count != final_count:
                     print(f"💾 Saved {final_count} unique titles (removed {original_count - final_count} duplicates)")
@@ -229,368 +1277,3066 @@ class PS4TitlesScraper:
             self.driver.quit()
             print("🔒 Driver closed")
 
-class PS4UpdateDownloader:
-    """PS4 update downloader pour les titles"""
+class SeleniumDriverPool:
+    """Pool of Chrome drivers pulling pages from a shared queue"""
     
-    def __init__(self, download_path='./ps4_titles_updates/'):
-        self.download_path = Path(download_path)
-        self.download_path.mkdir(parents=True, exist_ok=True)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
-        })
+    def __init__(self, size, first=None, rate=4):
+        self.scrapers = [first] if first and first.driver else []
+        self.owned = []
+        self.limiter = RateLimiter(rate)
+        
+        while len(self.scrapers) < size:
+            scraper = PS4TitlesScraper(page_timeout=first.page_timeout if first else 15)
+            if not scraper.driver:
+                break
+            self.scrapers.append(scraper)
+            self.owned.append(scraper)
+        
+        print(f"🚗 Driver pool ready with {len(self.scrapers)} drivers")
+    
+    def scrape_pages(self, pages):
+        """Scrape pages with every driver in parallel, returns {page: titles}"""
+        pending = queue.Queue()
+        for page in pages:
+            pending.put(page)
+        results = {}
+        
+        def worker(scraper):
+            while True:
+                try:
+                    page = pending.get_nowait()
+                except queue.Empty:
+                    return
+                self.limiter.wait()
+                results[page] = scraper.scrape_page(page)
+        
+        with ThreadPoolExecutor(max_workers=max(len(self.scrapers), 1)) as executor:
+            list(executor.map(worker, self.scrapers))
+        
+        return results
+    
+    def close(self):
+        """Fermer les drivers créés par le pool"""
+        for scraper in self.owned:
+            scraper.close_driver()
+        self.owned = []
+
+class HTTPCache:
+    """Persistent on-disk HTTP cache keyed by URL
+    
+    Stores bodies with their ETag/Last-Modified validators so later runs can
+    send conditional requests; a 304 answer is served from disk. Entries are
+    evicted when older than max_age seconds or when the cache grows beyond
+    max_bytes (least recently used first).
+    """
+    
+    def __init__(self, cache_dir, max_bytes=2 * 1024**3, max_age=30 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bytes_saved': 0}
+        
+        # Index en mémoire : clé -> (taille, dernier accès)
+        self.index = {}
+        for meta_file in self.cache_dir.glob('*/*.json'):
+            body_file = meta_file.with_suffix('.body')
+            if body_file.exists():
+                stat = body_file.stat()
+                self.index[meta_file.stem] = (stat.st_size, stat.st_mtime)
+        self.total_bytes = sum(size for size, _ in self.index.values())
+        self.evict()
+    
+    def key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+    
+    def paths(self, key):
+        folder = self.cache_dir / key[:2]
+        return folder / f"{key}.json", folder / f"{key}.body"
+    
+    def load_meta(self, url):
+        """Return the stored metadata for a URL, or None"""
+        meta_file, _ = self.paths(self.key(url))
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - meta.get('stored_at', 0) > self.max_age:
+            return None
+        return meta
+    
+    def conditional_headers(self, url):
+        """Validators to send with a request for this URL"""
+        meta = self.load_meta(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+    
+    def load_body(self, url):
+        """Serve a cached body after a 304, returns None if it vanished
+        
+        The 304 confirmed the entry, so its max_age starts over.
+        """
+        key = self.key(url)
+        meta_file, body_file = self.paths(key)
+        try:
+            body = body_file.read_bytes()
+            os.utime(body_file)
+        except OSError:
+            return None
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            meta['stored_at'] = time.time()
+            self.write_meta(meta_file, meta)
+        except (OSError, ValueError):
+            pass
+        with self.lock:
+            self.stats['hits'] += 1
+            self.stats['bytes_saved'] += len(body)
+            if key in self.index:
+                self.index[key] = (self.index[key][0], time.time())
+        return body
+    
+    def store(self, url, headers, body):
+        """Store a 200 response body and its validators"""
+        with self.lock:
+            self.stats['misses'] += 1
+        
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return
+        
+        key = self.key(url)
+        meta_file, body_file = self.paths(key)
+        meta_file.parent.mkdir(exist_ok=True)
+        
+        # Écriture atomique : fichier temporaire puis os.replace
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_body = body_file.with_name(body_file.name + suffix)
+        tmp_body.write_bytes(body)
+        os.replace(tmp_body, body_file)
+        self.write_meta(meta_file, {'url': url, 'etag': etag, 'last_modified': last_modified,
+                                    'stored_at': time.time(), 'size': len(body)})
+        
+        with self.lock:
+            old_size = self.index.get(key, (0, 0))[0]
+            self.index[key] = (len(body), time.time())
+            self.total_bytes += len(body) - old_size
+            self.stats['stores'] += 1
+            over_budget = self.total_bytes > self.max_bytes
+        
+        if over_budget:
+            self.evict()
+    
+    def write_meta(self, meta_file, meta):
+        """Atomically (re)write the metadata of an entry"""
+        tmp_meta = meta_file.with_name(f"{meta_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_file)
+    
+    def remove(self, key):
+        meta_file, body_file = self.paths(key)
+        for path in (meta_file, body_file):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        size, _ = self.index.pop(key, (0, 0))
+        self.total_bytes -= size
+        self.stats['evictions'] += 1
+    
+    def evict(self):
+        """Drop expired entries, then the least recently used ones over max_bytes"""
+        with self.lock:
+            expired_before = time.time() - self.max_age
+            for key, (size, used) in list(self.index.items()):
+                if used < expired_before:
+                    self.remove(key)
+            
+            if self.total_bytes > self.max_bytes:
+                # Descendre à 90% du budget pour ne pas évincer à chaque écriture
+                target = self.max_bytes * 0.9
+                for key, _ in sorted(self.index.items(), key=lambda item: item[1][1]):
+                    if self.total_bytes <= target:
+                        break
+                    self.remove(key)
+    
+    def summary(self):
+        """One-line hit/miss summary"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        hit_rate = self.stats['hits'] / lookups * 100 if lookups else 0
+        return (f"{self.stats['hits']:,} hits, {self.stats['misses']:,} misses ({hit_rate:.1f}% hit rate), "
+                f"{self.stats['bytes_saved']/(1024**2):.1f} MB not re-downloaded, "
+                f"{len(self.index):,} entries / {self.total_bytes/(1024**2):.1f} MB on disk")
+
+class ResultStore:
+    """Crash-safe SQLite store with one committed row per processed title"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                title_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                has_updates INTEGER NOT NULL,
+                total_size_bytes INTEGER NOT NULL,
+                result TEXT NOT NULL
+            )""")
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self.conn.commit()
+    
+    def set_finished(self, finished):
+        """Record whether the last batch on this store ran to the end"""
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('finished', ?)", ('1' if finished else '0',))
+            self.conn.commit()
+    
+    def is_finished(self):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'finished'").fetchone()
+        return row is not None and row[0] == '1'
+    
+    def add(self, result):
+        """Commit one result, replacing any previous row for the title"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                (result['title_id'], result['status'], int(result['has_updates']),
+                 result.get('total_size_bytes', 0), json.dumps(result, ensure_ascii=False, default=record_json)))
+            self.conn.commit()
+    
+    def clear(self):
+        with self.lock:
+            self.conn.execute('DELETE FROM results')
+            self.conn.commit()
+    
+    def done_rows(self):
+        """(title_id, has_updates, total_size_bytes) of every title that does not need a retry"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT title_id, has_updates, total_size_bytes FROM results WHERE status != 'error'").fetchall()
+    
+    def iter_results(self, title_ids):
+        """Yield the stored results for title_ids, in that order"""
+        for title_id in title_ids:
+            with self.lock:
+                row = self.conn.execute('SELECT result FROM results WHERE title_id = ?', (title_id,)).fetchone()
+            if row:
+                yield UpdateResult.from_dict(json.loads(row[0]))
+    
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class RefreshScheduler:
+    """Per-title check history deciding which titles a refresh run re-queries
+    
+    Each recorded result updates the title's row: when it was last checked,
+    when its updates last changed (latest version or total size) and how
+    many checks in a row found nothing new. The next check is due
+    base_interval after the last one, doubled for every quiet check up to
+    max_interval. Titles patched recently come back at every run, titles
+    without any update for months (most of the catalog) only now and then.
+    """
+    
+    def __init__(self, path, base_interval=86400, max_interval=60 * 86400):
+        self.path = Path(path)
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS history (
+                title_id TEXT PRIMARY KEY,
+                last_checked REAL NOT NULL,
+                last_changed REAL,
+                latest_version TEXT NOT NULL,
+                total_size_bytes INTEGER NOT NULL,
+                quiet_checks INTEGER NOT NULL,
+                next_check REAL NOT NULL
+            )""")
+        self.conn.commit()
+    
+    def interval(self, title_id, quiet_checks):
+        """Seconds until the next check after quiet_checks checks without change"""
+        interval = min(self.base_interval * 2 ** min(quiet_checks, 32), self.max_interval)
+        # ±10% fixe par titre: les titres vérifiés ensemble ne redeviennent pas dus le même jour
+        jitter = int(hashlib.md5(title_id.encode()).hexdigest()[:4], 16) / 0xffff - 0.5
+        return interval * (1 + jitter * 0.2)
+    
+    def record(self, result, now=None):
+        """Update the history of a checked title (errors are not checks)"""
+        if result['status'] not in ('found', 'no_updates'):
+            return
+        now = time.time() if now is None else now
+        title_id = result['title_id']
+        version = result.get('latest_version') or ''
+        size = result.get('total_size_bytes', 0)
+        
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT latest_version, total_size_bytes, quiet_checks, last_changed FROM history WHERE title_id = ?',
+                (title_id,)).fetchone()
+            if row is None:
+                # Premier passage: un titre sans mise à jour commence déjà en recul
+                last_changed = now if result['has_updates'] else None
+                quiet_checks = 0 if result['has_updates'] else 1
+            elif (version, size) != (row[0], row[1]):
+                last_changed = now
+                quiet_checks = 0
+            else:
+                last_changed = row[3]
+                quiet_checks = row[2] + 1
+            
+            self.conn.execute(
+                'INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (title_id, now, last_changed, version, size, quiet_checks,
+                 now + self.interval(title_id, quiet_checks)))
+            self.conn.commit()
+    
+    def due(self, title_ids, now=None, budget=None):
+        """Title IDs to check now, most likely to have new patches first
+        
+        Never checked titles come first, then by quiet checks (recently
+        patched titles before long quiet ones) and by how overdue they are.
+        budget caps the number of titles returned.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = dict((title_id, (quiet_checks, next_check)) for title_id, quiet_checks, next_check in
+                        self.conn.execute('SELECT title_id, quiet_checks, next_check FROM history'))
+        
+        due = []
+        for title_id in title_ids:
+            row = rows.get(title_id)
+            if row is None:
+                due.append((-1, 0, title_id))
+            elif row[1] <= now:
+                due.append((row[0], row[1], title_id))
+        due.sort()
+        if budget is not None:
+            due = due[:budget]
+        return [title_id for _, _, title_id in due]
+    
+    def summary(self, now=None):
+        """Counts of tracked titles, titles due now and titles changed in the last base_interval × 7"""
+        now = time.time() if now is None else now
+        with self.lock:
+            tracked, due, recent = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(next_check <= ?), 0), COALESCE(SUM(last_changed >= ?), 0) FROM history',
+                (now, now - self.base_interval * 7)).fetchone()
+        return {'tracked': tracked, 'due': due, 'recently_changed': recent}
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class WorkQueue:
+    """SQLite queue of title shards handed out under expiring leases
+    
+    A worker leases one shard at a time and renews the lease while it
+    works. A shard whose lease expired (crashed process or machine) is
+    handed out again. The file can sit on a filesystem shared by several
+    machines, so it keeps the default rollback journal (WAL needs shared
+    memory on a single host).
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                shard_id INTEGER PRIMARY KEY,
+                first_row INTEGER NOT NULL,
+                last_row INTEGER NOT NULL,
+                first_title_id TEXT NOT NULL,
+                last_title_id TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )""")
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+    
+    @contextlib.contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, one writer at a time across processes"""
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.conn
+                self.conn.execute('COMMIT')
+            except BaseException:
+                # COMMIT refusé ("database is locked") compris : ne pas laisser la transaction ouverte
+                if self.conn.in_transaction:
+                    self.conn.execute('ROLLBACK')
+                raise
+    
+    def create(self, title_ids, shard_size, meta):
+        """Replace the queue with shards of shard_size consecutive titles"""
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM shards')
+            conn.execute('DELETE FROM meta')
+            conn.executemany('INSERT INTO shards (shard_id, first_row, last_row, first_title_id, last_title_id) VALUES (?, ?, ?, ?, ?)', [
+                (shard_id, start, min(start + shard_size, len(title_ids)) - 1,
+                 title_ids[start], title_ids[min(start + shard_size, len(title_ids)) - 1])
+                for shard_id, start in enumerate(range(0, len(title_ids), shard_size), 1)])
+            conn.executemany('INSERT INTO meta VALUES (?, ?)', [(key, str(value)) for key, value in meta.items()])
+    
+    def meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+    
+    def lease(self, worker, lease_seconds):
+        """Lease the next pending (or expired) shard, returns its row as a dict or None"""
+        now = time.time()
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT shard_id, first_row, last_row, first_title_id, last_title_id, attempts FROM shards "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) ORDER BY shard_id LIMIT 1",
+                (now,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE shards SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                         "WHERE shard_id = ?", (worker, now + lease_seconds, row[0]))
+        shard = dict(zip(('shard_id', 'first_row', 'last_row', 'first_title_id', 'last_title_id', 'attempts'), row))
+        shard['attempts'] += 1
+        return shard
+    
+    def renew(self, shard_id, worker, lease_seconds):
+        """Extend a lease, False if the shard was handed to someone else meanwhile"""
+        with self.transaction() as conn:
+            cursor = conn.execute("UPDATE shards SET lease_expires = ? WHERE shard_id = ? AND worker = ? AND status = 'leased'",
+                                  (time.time() + lease_seconds, shard_id, worker))
+        return cursor.rowcount == 1
+    
+    def complete(self, shard_id, worker):
+        """Mark a leased shard done, False if the lease was lost"""
+        with self.transaction() as conn:
+            cursor = conn.execute("UPDATE shards SET status = 'done', lease_expires = NULL WHERE shard_id = ? AND worker = ? AND status = 'leased'",
+                                  (shard_id, worker))
+        return cursor.rowcount == 1
+    
+    def shards(self):
+        """Every shard as a dict, in shard order"""
+        columns = ('shard_id', 'first_row', 'last_row', 'first_title_id', 'last_title_id', 'status', 'worker', 'lease_expires', 'attempts')
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {', '.join(columns)} FROM shards ORDER BY shard_id").fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+    
+    def counts(self):
+        """Number of shards per state (pending, leased, expired, done)"""
+        counts = {'pending': 0, 'leased': 0, 'expired': 0, 'done': 0}
+        now = time.time()
+        for shard in self.shards():
+            status = shard['status']
+            if status == 'leased' and shard['lease_expires'] < now:
+                status = 'expired'
+            counts[status] += 1
+        return counts
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+def csv_value(value):
+    """Format a value like pandas.to_csv does (None/NaN -> empty)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    return value
+
+class DedupIndex:
+    """Content-addressed index of update pieces, keyed by (SHA1, size)
+    
+    The same patch often ships under several CUSA IDs, editions and regions.
+    The index keeps one entry per unique piece with every title it appears
+    under, for deduplicated totals and a download plan that fetches each
+    piece once.
+    """
+    
+    PLAN_COLUMNS = ['SHA1_Hash', 'Size_Bytes', 'Filename', 'Download_URL', 'Title_Count', 'Title_IDs']
+    
+    def __init__(self):
+        self.pieces = {}
+        self.references = 0
+        self.total_bytes = 0
+        self.unique_bytes = 0
+    
+    def key(self, sha1, size, url):
+        # Sans hash connu, l'URL sert d'identité
+        return ((sha1 or '').lower() or url, int(size or 0))
+    
+    def add(self, title_id, filename, url, size, sha1):
+        """Register one piece under a title, returns True the first time it is seen"""
+        key = self.key(sha1, size, url)
+        self.references += 1
+        self.total_bytes += key[1]
+        
+        piece = self.pieces.get(key)
+        if piece is None:
+            self.pieces[key] = {'filename': filename, 'url': url, 'title_ids': [title_id]}
+            self.unique_bytes += key[1]
+            return True
+        if title_id not in piece['title_ids']:
+            piece['title_ids'].append(title_id)
+        return False
+    
+    def add_result(self, result):
+        for update in result.get('updates', []):
+            self.add(result['title_id'], update['filename'], update['url'], update['size'], update['hash'])
+    
+    @property
+    def duplicate_bytes(self):
+        return self.total_bytes - self.unique_bytes
+    
+    def summary(self):
+        return (f"{len(self.pieces):,} unique pieces for {self.references:,} links, "
+                f"{self.unique_bytes / (1024**3):.2f} GB unique of {self.total_bytes / (1024**3):.2f} GB "
+                f"({self.duplicate_bytes / (1024**3):.2f} GB duplicated)")
+    
+    def write_plan(self, f):
+        """Write the download plan: one row per unique piece with the titles that use it"""
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(self.PLAN_COLUMNS)
+        for (sha1, size), piece in self.pieces.items():
+            writer.writerow([sha1 if sha1 != piece['url'] else '', size, piece['filename'], piece['url'],
+                             len(piece['title_ids']), ','.join(piece['title_ids'])])
+
+class ResultsWriter:
+    """Streaming writers for the batch outputs
+    
+    Results are written one at a time, so memory stays flat whatever the
+    catalog size: the summary CSV, the download links CSV and a complete
+    NDJSON of every result (one JSON object per line). Files are written
+    next to their final name and moved into place by close(), which keeps
+    the replaced summary and links CSVs as ps4_titles_previous_*.csv for
+    the snapshot diff.
+    """
+    
+    SUMMARY_COLUMNS = ['Title_ID', 'Title_Name', 'Sony_Game_Name', 'Editions', 'Has_Updates',
+                       'Update_Count', 'Latest_Version', 'Total_Size_MB', 'Status']
+    LINKS_COLUMNS = ['Title_ID', 'Title_Name', 'Sony_Game_Name', 'Editions', 'Version',
+                     'Size_MB', 'Size_Bytes', 'Filename', 'Download_URL', 'SHA1_Hash']
+    STATS_COLUMNS = ['Total_Titles_Processed', 'Titles_With_Updates', 'Total_Errors',
+                     'Success_Rate_Percent', 'Total_Update_Size_GB', 'Average_Update_Size_MB',
+                     'Unique_Update_Size_GB']
+    
+    def __init__(self, download_path):
+        self.download_path = Path(download_path)
+        self.detailed_file = self.download_path / "ps4_titles_with_updates.ndjson"
+        self.summary_file = self.download_path / "ps4_titles_update_summary.csv"
+        self.links_file = self.download_path / "ps4_titles_download_links.csv"
+        self.stats_file = self.download_path / "ps4_titles_statistics.csv"
+        self.plan_file = self.download_path / "ps4_titles_download_plan.csv"
+        self.changelog_file = self.download_path / "ps4_titles_changelog.csv"
+        self.open_files = []
+        self.kept_previous = []
+        self.links_count = 0
+        self.dedup = DedupIndex()
+        
+        self.detailed = self.open(self.detailed_file)
+        self.summary = csv.writer(self.open(self.summary_file), lineterminator=os.linesep)
+        self.summary.writerow(self.SUMMARY_COLUMNS)
+        self.links = None
+    
+    def open(self, path):
+        tmp_path = path.with_name(path.name + '.tmp')
+        f = open(tmp_path, 'w', newline='', encoding='utf-8')
+        self.open_files.append((f, tmp_path, path))
+        return f
+    
+    def write(self, result):
+        """Write one result to every output"""
+        self.detailed.write(json.dumps(result, ensure_ascii=False, default=record_json) + '\n')
+        
+        self.summary.writerow([csv_value(v) for v in (
+            result['title_id'],
+            result['title_name'],
+            result.get('sony_game_name', ''),
+            result.get('editions', ''),
+            result['has_updates'],
+            result.get('update_count', 0),
+            result.get('latest_version', ''),
+            float(result.get('total_size_mb', 0)),
+            result['status']
+        )])
+        
+        if not result['has_updates']:
+            return
+        
+        # Le CSV des liens n'est créé qu'au premier titre avec des mises à jour
+        if self.links is None:
+            self.links = csv.writer(self.open(self.links_file), lineterminator=os.linesep)
+            self.links.writerow(self.LINKS_COLUMNS)
+        
+        for update in result.get('updates', []):
+            self.links.writerow([csv_value(v) for v in (
+                result['title_id'],
+                result['title_name'],
+                result['sony_game_name'],
+                result.get('editions', ''),
+                update['version'],
+                update['size'] / (1024 * 1024) if update['size'] else 0.0,
+                update['size'],
+                update['filename'],
+                update['url'],
+                update['hash']
+            )])
+            self.links_count += 1
+        
+        self.dedup.add_result(result)
+    
+    def write_plan(self):
+        """Write the deduplicated download plan"""
+        self.dedup.write_plan(self.open(self.plan_file))
+    
+    def write_statistics(self, stats):
+        """Write the one-row statistics CSV"""
+        writer = csv.writer(self.open(self.stats_file), lineterminator=os.linesep)
+        writer.writerow(self.STATS_COLUMNS)
+        writer.writerow([
+            stats['processed'],
+            stats['found_updates'],
+            stats['errors'],
+            (stats['found_updates']/stats['processed'])*100 if stats['processed'] > 0 else 0,
+            stats['total_size_bytes']/(1024**3),
+            (stats['total_size_bytes']/stats['found_updates'])/(1024**2) if stats['found_updates'] > 0 else 0,
+            stats.get('unique_size_bytes', stats['total_size_bytes'])/(1024**3)
+        ])
+    
+    def previous_path(self, path):
+        """Where close() keeps the last run's copy of an output"""
+        return path.with_name(path.name.replace('ps4_titles_', 'ps4_titles_previous_', 1))
+    
+    def keep_previous(self, path):
+        """Hard link (or copy) an output before it gets replaced"""
+        previous = self.previous_path(path)
+        previous.unlink(missing_ok=True)
+        # La copie Parquet de l'ancien snapshot serait plus récente que lui
+        ColumnarCatalog().parquet_path(previous).unlink(missing_ok=True)
+        try:
+            os.link(path, previous)
+        except OSError:
+            shutil.copy2(path, previous)
+        self.kept_previous.append(path)
+    
+    def close(self):
+        """Close every output and move it into place"""
+        for f, tmp_path, path in self.open_files:
+            f.close()
+            if path in (self.summary_file, self.links_file) and path.exists():
+                self.keep_previous(path)
+            os.replace(tmp_path, path)
+        self.open_files = []
+    
+    def abort(self):
+        """Close and delete every output without replacing existing files"""
+        for f, tmp_path, path in self.open_files:
+            f.close()
+            tmp_path.unlink()
+        self.open_files = []
+
+class SnapshotDiff:
+    """Keyed comparison of two update links snapshots
+    
+    A snapshot is a download links CSV (with the update summary CSV next to
+    it when present) or a result store SQLite file. Pieces are keyed on
+    (Title_ID, Version, Filename): a key only in the new snapshot is added,
+    only in the old one removed, in both with another SHA1 or size changed.
+    Titles whose latest version moved get a new_version row. Titles that
+    failed or are missing in the new snapshot are left out, a network
+    error is not a removed patch.
+    """
+    
+    CHANGELOG_COLUMNS = ['Change', 'Title_ID', 'Title_Name', 'Old_Version', 'Version', 'Filename',
+                         'Size_Bytes', 'SHA1_Hash', 'Old_SHA1_Hash', 'Download_URL']
+    
+    def __init__(self):
+        self.changes = []
+        self.counts = {'new_version': 0, 'added': 0, 'changed': 0, 'removed': 0}
+    
+    def load(self, path):
+        """(pieces, titles, failed Title_IDs) of a snapshot
+        
+        pieces maps (Title_ID, Version, Filename) to (SHA1, size, URL) and
+        titles maps Title_ID to (name, latest version).
+        """
+        path = Path(path)
+        pieces = {}
+        titles = {}
+        failed = set()
+        
+        if path.suffix in ('.sqlite', '.db'):
+            conn = sqlite3.connect(str(path))
+            try:
+                for (data,) in conn.execute('SELECT result FROM results'):
+                    result = json.loads(data)
+                    title_id = result['title_id']
+                    if result['status'] == 'error':
+                        failed.add(title_id)
+                        continue
+                    titles[title_id] = (result['title_name'], result.get('latest_version', ''))
+                    for update in result.get('updates', []):
+                        pieces[(title_id, update['version'], update['filename'])] = (
+                            update['hash'], int(update['size'] or 0), update['url'])
+            finally:
+                conn.close()
+            return pieces, titles, failed
+        
+        catalog = ColumnarCatalog()
+        summary_csv = path.with_name(path.name.replace('download_links.csv', 'update_summary.csv'))
+        if summary_csv != path and summary_csv.exists():
+            for row in catalog.load_records(summary_csv, columns=['Title_ID', 'Title_Name', 'Latest_Version', 'Status']):
+                if row['Status'] == 'error':
+                    failed.add(row['Title_ID'])
+                else:
+                    titles[row['Title_ID']] = (csv_value(row['Title_Name']), csv_value(row['Latest_Version']))
+        
+        if path.exists():
+            columns = ['Title_ID', 'Title_Name', 'Version', 'Size_Bytes', 'Filename', 'Download_URL', 'SHA1_Hash']
+            for row in catalog.load_records(path, columns=columns):
+                version = csv_value(row['Version'])
+                pieces[(row['Title_ID'], version, row['Filename'])] = (
+                    csv_value(row['SHA1_Hash']), int(row['Size_Bytes'] or 0), row['Download_URL'])
+                # Sans résumé, la première pièce d'un titre porte sa dernière version
+                titles.setdefault(row['Title_ID'], (csv_value(row['Title_Name']), version))
+        return pieces, titles, failed
+    
+    def change(self, change, title_id, title_name, old_version='', version='', filename='',
+               size='', sha1='', old_sha1='', url=''):
+        self.counts[change] += 1
+        self.changes.append({'Change': change, 'Title_ID': title_id, 'Title_Name': title_name,
+                             'Old_Version': old_version, 'Version': version, 'Filename': filename,
+                             'Size_Bytes': size, 'SHA1_Hash': sha1, 'Old_SHA1_Hash': old_sha1,
+                             'Download_URL': url})
+    
+    def compare(self, old_snapshot, new_snapshot):
+        """Diff two snapshots, returns the list of changelog rows"""
+        old_pieces, old_titles, _ = self.load(old_snapshot)
+        new_pieces, new_titles, failed = self.load(new_snapshot)
+        self.changes = []
+        self.counts = dict.fromkeys(self.counts, 0)
+        
+        for title_id, (name, version) in new_titles.items():
+            old_version = old_titles.get(title_id, ('', ''))[1]
+            if version and version != old_version:
+                self.change('new_version', title_id, name, old_version, version)
+        
+        for key, (sha1, size, url) in new_pieces.items():
+            title_id, version, filename = key
+            name = new_titles[title_id][0]
+            old = old_pieces.get(key)
+            if old is None:
+                self.change('added', title_id, name, '', version, filename, size, sha1, '', url)
+            elif (old[0], old[1]) != (sha1, size):
+                self.change('changed', title_id, name, version, version, filename, size, sha1, old[0], url)
+        
+        for key, (sha1, size, url) in old_pieces.items():
+            title_id, version, filename = key
+            # Seuls les titres revus avec succès peuvent perdre des pièces
+            if key not in new_pieces and title_id in new_titles and title_id not in failed:
+                name = new_titles[title_id][0]
+                self.change('removed', title_id, name, version, '', filename, size, sha1, '', url)
+        
+        order = {change: i for i, change in enumerate(self.counts)}
+        self.changes.sort(key=lambda row: (row['Title_ID'], order[row['Change']], row['Version'], row['Filename']))
+        return self.changes
+    
+    def write(self, changelog_csv):
+        """Write the changelog CSV"""
+        tmp_file = Path(changelog_csv).with_name(Path(changelog_csv).name + '.tmp')
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.CHANGELOG_COLUMNS, lineterminator=os.linesep)
+            writer.writeheader()
+            writer.writerows(self.changes)
+        os.replace(tmp_file, changelog_csv)
+    
+    def changed_title_ids(self):
+        """Titles with added or changed pieces, in Title_ID order"""
+        return sorted({row['Title_ID'] for row in self.changes if row['Change'] in ('added', 'changed')})
+    
+    def summary(self):
+        return ", ".join(f"{count:,} {change}" for change, count in self.counts.items())
+
+class BatchMetrics:
+    """Latency histograms and counters per batch phase
+    
+    Phases are limiter_wait, ver_xml_fetch, ver_xml_parse, manifest_fetch,
+    manifest_parse and result_write. Fetch phases also count requests per
+    HTTP status and bytes received. Everything can be scraped as Prometheus
+    text (serve) or dumped periodically as JSON (start_dump).
+    """
+    
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # phase -> {'buckets', 'count', 'sum'}
+        self.requests = {}    # (phase, status) -> nombre de requêtes
+        self.bytes = {}       # phase -> octets reçus
+        self.retries = 0
+        self.started = time.time()
+        self.server = None
+        self.dump_stop = None
+        self.dump_path = None
+    
+    def observe(self, phase, seconds):
+        index = bisect.bisect_left(self.BUCKETS, seconds)
+        with self.lock:
+            histogram = self.histograms.get(phase)
+            if histogram is None:
+                histogram = self.histograms[phase] = {'buckets': [0] * (len(self.BUCKETS) + 1), 'count': 0, 'sum': 0.0}
+            histogram['buckets'][index] += 1
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+    
+    @contextlib.contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+    
+    def record_request(self, phase, status, size, seconds):
+        """Count one HTTP request of a fetch phase (status None for network errors)"""
+        self.observe(phase, seconds)
+        key = (phase, str(status) if status is not None else 'error')
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes[phase] = self.bytes.get(phase, 0) + size
+    
+    def count_retry(self):
+        with self.lock:
+            self.retries += 1
+    
+    def quantile(self, histogram, q):
+        """Upper bound of the bucket holding quantile q (seconds)"""
+        rank = q * histogram['count']
+        seen = 0
+        for bound, count in zip(self.BUCKETS + (float('inf'),), histogram['buckets']):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+    
+    def snapshot(self):
+        """Current metrics as a JSON-serializable dict"""
+        with self.lock:
+            phases = {}
+            for phase, histogram in sorted(self.histograms.items()):
+                phases[phase] = {
+                    'count': histogram['count'],
+                    'total_seconds': round(histogram['sum'], 3),
+                    'mean_ms': round(histogram['sum'] / histogram['count'] * 1000, 2) if histogram['count'] else 0.0,
+                    'p50_ms_le': self.quantile(histogram, 0.5) * 1000,
+                    'p99_ms_le': self.quantile(histogram, 0.99) * 1000,
+                    'buckets': dict(zip([str(b) for b in self.BUCKETS] + ['+Inf'], histogram['buckets'])),
+                }
+            requests_by_status = {}
+            for (phase, status), count in sorted(self.requests.items()):
+                requests_by_status.setdefault(phase, {})[status] = count
+            return {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'uptime_seconds': round(time.time() - self.started, 1),
+                'phases': phases,
+                'requests': requests_by_status,
+                'bytes': dict(self.bytes),
+                'retries': self.retries,
+            }
+    
+    def render_prometheus(self):
+        """Current metrics in the Prometheus text exposition format"""
+        with self.lock:
+            lines = ['# HELP ps4_phase_duration_seconds Time spent per batch phase',
+                     '# TYPE ps4_phase_duration_seconds histogram']
+            for phase, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip([str(b) for b in self.BUCKETS] + ['+Inf'], histogram['buckets']):
+                    cumulative += count
+                    lines.append(f'ps4_phase_duration_seconds_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+                lines.append(f'ps4_phase_duration_seconds_sum{{phase="{phase}"}} {histogram["sum"]:.6f}')
+                lines.append(f'ps4_phase_duration_seconds_count{{phase="{phase}"}} {histogram["count"]}')
+            
+            lines += ['# HELP ps4_http_requests_total HTTP requests per phase and status',
+                      '# TYPE ps4_http_requests_total counter']
+            for (phase, status), count in sorted(self.requests.items()):
+                lines.append(f'ps4_http_requests_total{{phase="{phase}",status="{status}"}} {count}')
+            
+            lines += ['# HELP ps4_http_response_bytes_total Response bytes received per phase',
+                      '# TYPE ps4_http_response_bytes_total counter']
+            for phase, size in sorted(self.bytes.items()):
+                lines.append(f'ps4_http_response_bytes_total{{phase="{phase}"}} {size}')
+            
+            lines += ['# HELP ps4_title_retries_total Titles deferred to a retry round',
+                      '# TYPE ps4_title_retries_total counter',
+                      f'ps4_title_retries_total {self.retries}']
+        return '\n'.join(lines) + '\n'
+    
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics (Prometheus text) and /metrics.json from a background thread"""
+        metrics = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = metrics.render_prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = json.dumps(metrics.snapshot(), indent=2), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📡 Metrics on http://{host}:{self.server.server_address[1]}/metrics")
+    
+    def dump(self, path):
+        tmp_path = Path(str(path) + '.tmp')
+        tmp_path.write_text(json.dumps(self.snapshot(), indent=2), encoding='utf-8')
+        os.replace(tmp_path, path)
+    
+    def start_dump(self, path, interval=60):
+        """Write the JSON snapshot to path every interval seconds until stop()"""
+        self.dump_stop = threading.Event()
+        
+        def loop(stop):
+            while not stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as e:
+                    print(f"⚠️ Could not write metrics: {e}")
+        
+        threading.Thread(target=loop, args=(self.dump_stop,), daemon=True).start()
+        self.dump_path = path
+    
+    def stop(self):
+        """Stop the periodic dump (after a final one) and the metrics server"""
+        if self.dump_stop is not None:
+            self.dump_stop.set()
+            self.dump_stop = None
+            self.dump(self.dump_path)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+    
+    def summary(self):
+        lines = []
+        for phase, data in self.snapshot()['phases'].items():
+            lines.append(f"{phase}: {data['count']:,} x {data['mean_ms']:.1f} ms avg, "
+                         f"p99 <= {data['p99_ms_le']:.0f} ms, {data['total_seconds']:.0f}s total")
+        return lines
+
+class TraceRecorder:
+    """Chrome trace-event writer for per-title and per-request spans
+    
+    Events are streamed to a JSON array file as spans end, so a run of any
+    length can be opened in chrome://tracing or Perfetto, even if it was
+    interrupted. Spans on worker threads are complete ('X') events on their
+    thread's track; spans inside asyncio tasks are async ('b'/'e') events
+    keyed by task, since they overlap on the event loop thread.
+    """
+    
+    enabled = True
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write('[')
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.threads = set()
+        self.count = 0
+    
+    def emit(self, event):
+        with self.lock:
+            if self.file is None:
+                return
+            tid = event['tid']
+            if tid not in self.threads:
+                self.threads.add(tid)
+                self.write({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                            'args': {'name': threading.current_thread().name}})
+            self.write(event)
+    
+    def write(self, event):
+        self.file.write((',\n' if self.count else '\n') + json.dumps(event))
+        self.count += 1
+    
+    @contextlib.contextmanager
+    def span(self, name, cat, **args):
+        """Time the block as one span, the yielded args dict can be filled in"""
+        begin = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            event = {'name': name, 'cat': cat, 'pid': self.pid, 'tid': threading.get_ident(),
+                     'ts': round((begin - self.origin) * 1e6, 1), 'args': args}
+            try:
+                task = asyncio.current_task()
+            except RuntimeError:
+                task = None
+            
+            if task is None:
+                event.update(ph='X', dur=round((end - begin) * 1e6, 1))
+                self.emit(event)
+            else:
+                event.update(ph='b', id=hex(id(task)))
+                self.emit(event)
+                self.emit(dict(event, ph='e', ts=round((end - self.origin) * 1e6, 1), args={}))
+    
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.write('\n]\n')
+                self.file.close()
+                self.file = None
+
+class NullTracer:
+    """Tracer used when tracing is off, a span only costs a call"""
+    
+    enabled = False
+    
+    def span(self, name, cat, **args):
+        return contextlib.nullcontext(args)
+    
+    def close(self):
+        pass
+
+NULL_TRACER = NullTracer()
+
+class TitleIDBitmap:
+    """Compact bitmap over the CUSA00000-CUSA99999 ID space (12.5 KB)"""
+    
+    SIZE = 100000
+    
+    def __init__(self, data=None):
+        self.bits = bytearray(data) if data else bytearray(self.SIZE // 8 + 1)
+    
+    def set(self, number):
+        self.bits[number >> 3] |= 1 << (number & 7)
+    
+    def __contains__(self, number):
+        return bool(self.bits[number >> 3] & (1 << (number & 7)))
+    
+    def __len__(self):
+        return sum(bin(byte).count('1') for byte in self.bits)
+    
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):
+            if byte:
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield (index << 3) | bit
+
+# Résolveur d'origine, pour les appels qui croisent le dernier uninstall()
+SYSTEM_GETADDRINFO = socket.getaddrinfo
+
+class DNSCache:
+    """Process-wide socket.getaddrinfo cache with a TTL
+    
+    install()/uninstall() are counted: socket.getaddrinfo is patched while
+    at least one downloader uses the cache and restored after the last one.
+    """
+    
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.original = None
+        self.users = 0
+    
+    def install(self):
+        """Route socket.getaddrinfo through the cache"""
+        with self.lock:
+            self.users += 1
+            if self.original is None:
+                self.original = socket.getaddrinfo
+                socket.getaddrinfo = self.getaddrinfo
+    
+    def uninstall(self):
+        """Release one install(), the last one restores socket.getaddrinfo"""
+        with self.lock:
+            self.users = max(self.users - 1, 0)
+            if self.users or self.original is None:
+                return
+            # Ne pas écraser un autre patch posé après le nôtre
+            if socket.getaddrinfo == self.getaddrinfo:
+                socket.getaddrinfo = self.original
+            self.original = None
+            self.entries.clear()
+    
+    def getaddrinfo(self, *args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            # Lu sous le verrou : uninstall() peut le remettre à None pendant la résolution
+            original = self.original
+        
+        if original is None:
+            return SYSTEM_GETADDRINFO(*args, **kwargs)
+        result = original(*args, **kwargs)
+        with self.lock:
+            if self.original is not None:
+                self.entries[key] = (now + self.ttl, result)
+        return result
+
+DNS_CACHE = DNSCache()
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter keeping one pool of pool_size keep-alive connections per host
+    
+    pool_block=True makes threads wait for a free connection instead of
+    opening extra ones that are thrown away after the request.
+    """
+    
+    def __init__(self, pool_size, max_hosts=16):
+        super().__init__(pool_connections=max_hosts, pool_maxsize=pool_size, pool_block=True)
+    
+    def connection_stats(self):
+        """{host: (new connections, requests)} for every live pool"""
+        stats = {}
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is not None:
+                new, requests_count = stats.get(pool.host, (0, 0))
+                stats[pool.host] = (new + pool.num_connections, requests_count + pool.num_requests)
+        return stats
+
+class PS4UpdateDownloader:
+    """PS4 update downloader pour les titles"""
+    
+    UPDATE_BASE_URL = 'https://gs-sec.ww.np.dl.playstation.net'
+    UPDATE_HMAC_KEY = 'AD62E37F905E06BC19593142281C112CEC0E7EC3E97EFDCAEFCDBAAFA6378D84'
+    
+    def __init__(self, download_path='./ps4_titles_updates/', cache_dir=None, limiter=None):
+        self.download_path = Path(download_path)
+        self.download_path.mkdir(parents=True, exist_ok=True)
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
+        })
+        self.adapter = None
+        self.configure_connections(10)
+        DNS_CACHE.install()
+        self.closed = False
+        # Cache HTTP sur disque pour ver.xml et manifests (optionnel)
+        self.cache = HTTPCache(cache_dir) if cache_dir else None
+        # Débit adaptatif par hôte (gs-sec et hôtes des manifests)
+        self.limiter = limiter or AdaptiveHostLimiter()
+        # Titres en échec temporaire, relancés en fin de batch
+        self.max_retry_rounds = 3
+        # Histogrammes par phase ; metrics_port expose aussi /metrics pendant les lots
+        self.metrics = BatchMetrics()
+        self.metrics_port = None
+        # trace_path active l'export Chrome trace des lots
+        self.tracer = NULL_TRACER
+        self.trace_path = None
+        # verbose=False coupe les lignes par titre (mode --quiet / --json)
+        self.verbose = True
+        # Manifests de tous les titres sur un pool partagé, URLs identiques en vol fusionnées
+        self.manifest_workers = 16
+        self.manifest_pool = None
+        self.manifest_lock = threading.Lock()
+        self.inflight_manifests = {}
+        self.coalesced_manifests = 0
+        self.retry_base_delay = 30
+        # Résultats validés un par un, pour reprendre après un crash
+        self.store_path = self.download_path / "titles_update_results.sqlite"
+        # Lots limités (max_titles, test du menu) : store séparé, le store complet reste intact
+        self.limited_store_path = self.download_path / "titles_update_results_limited.sqlite"
+        self.store = None
+        self.history_path = self.download_path / "ps4_titles_refresh_history.sqlite"
+        self.history = None
+        self.resumed = 0
+        self.last_processed = None
+        self.stats = None
+        # Posé depuis un autre thread (bail de shard perdu...) : le lot s'arrête sans écrire ses fichiers
+        self.stop_event = threading.Event()
+    
+    def configure_connections(self, pool_size):
+        """Give every host its own keep-alive pool of pool_size connections"""
+        # Fermer l'ancien adaptateur, sinon ses sockets en pool restent ouvertes
+        if self.adapter is not None:
+            self.adapter.close()
+        self.adapter = PooledHTTPAdapter(pool_size)
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+    
+    def close(self):
+        """Close the HTTP session and its pools and release the DNS cache"""
+        if self.closed:
+            return
+        self.closed = True
+        self.close_manifest_pool()
+        self.session.close()
+        DNS_CACHE.uninstall()
+    
+    def connection_summary(self):
+        """One line per host: new connections (handshakes) vs reused ones"""
+        lines = []
+        for host, (new, requests_count) in sorted(self.adapter.connection_stats().items()):
+            reused = max(requests_count - new, 0)
+            lines.append(f"{host}: {requests_count:,} requests, {new:,} new connections, "
+                         f"{reused:,} reused ({reused / requests_count * 100 if requests_count else 0:.1f}%)")
+        return lines
+    
+    def limited_get(self, url, phase='fetch', **kwargs):
+        """session.get under the adaptive per-host limiter"""
+        host = urlparse(url).netloc
+        with self.tracer.span('limiter_wait', 'limiter', host=host), self.metrics.timer('limiter_wait'):
+            self.limiter.acquire(host)
+        start = time.monotonic()
+        status = None
+        size = 0
+        with self.tracer.span(phase, 'http', url=url) as span:
+            try:
+                response = self.session.get(url, **kwargs)
+                status = response.status_code
+                size = len(response.content)
+                return response
+            finally:
+                latency = time.monotonic() - start
+                self.limiter.release(host, status)
+                self.metrics.record_request(phase, status, size, latency)
+                span.update(status=status, bytes=size)
+    
+    def http_get(self, url, verify=True, timeout=30, phase='fetch'):
+        """GET a URL through the HTTP cache if enabled, returns (status, body)"""
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        response = self.limited_get(url, phase, headers=headers, verify=verify, timeout=timeout)
+        
+        if self.cache:
+            if response.status_code == 304:
+                body = self.cache.load_body(url)
+                if body is not None:
+                    return 200, body
+                # Entrée disparue entre-temps : refaire une requête complète
+                response = self.limited_get(url, phase, verify=verify, timeout=timeout)
+            if response.status_code == 200:
+                self.cache.store(url, response.headers, response.content)
+        
+        return response.status_code, response.content
+    
+    def normalize_title_id(self, title_id):
+        """Clean and format a title ID as CUSAxxxxx"""
+        title_id = title_id.strip().upper()
+        if not title_id.startswith('CUSA'):
+            if title_id.startswith('CUSA-'):
+                title_id = title_id.replace('CUSA-', 'CUSA')
+            elif title_id.isdigit():
+                title_id = f"CUSA{title_id.zfill(5)}"
+            else:
+                title_id = f"CUSA{title_id.upper()}"
+        
+        # Remove any dashes
+        return title_id.replace('-', '')
+    
+    def build_update_url(self, title_id):
+        """Build the HMAC-signed ver.xml URL for a title"""
+        title_id = self.normalize_title_id(title_id)
+        id_bytes = bytes('np_' + title_id, 'UTF-8')
+        key = bytearray.fromhex(self.UPDATE_HMAC_KEY)
+        hash_val = hmac.new(key, id_bytes, hashlib.sha256).hexdigest()
+        return f'{self.UPDATE_BASE_URL}/plo/np/{title_id}/{hash_val}/{title_id}-ver.xml'
+    
+    def parse_update_xml(self, content, title_id):
+        """Parse a ver.xml document, returns (root, game_name)"""
+        root = ET.fromstring(content)
+        name_elem = root.find('./tag/package/paramsfo/')
+        name = name_elem.text.replace('\n', ' ') if name_elem is not None else self.normalize_title_id(title_id)
+        return root, name
+    
+    def is_transient_status(self, status):
+        """429 and 5xx are worth retrying; 404 means the title has no updates"""
+        return status == 429 or status >= 500
+    
+    def check_update_response(self, status, body, title_id):
+        """Turn a ver.xml response into (root, game_name) or (None, reason)
+        
+        Raises TransientError for answers that should be retried later.
+        """
+        if self.is_transient_status(status):
+            raise TransientError(f"HTTP {status}")
+        if status == 200 and body:
+            try:
+                with self.metrics.timer('ver_xml_parse'):
+                    return self.parse_update_xml(body, title_id)
+            except ET.ParseError as e:
+                # Réponse tronquée : on réessaiera plus tard
+                raise TransientError(f"Invalid ver.xml: {e}")
+        return None, f"No updates available (HTTP {status})"
+    
+    def request_update(self, title_id):
+        """Request PS4 update info from Sony servers
+        
+        Returns (None, reason) when the title has no updates and raises
+        TransientError on timeouts, connection errors and 429/5xx answers.
+        """
+        xml_url = self.build_update_url(title_id)
+        
+        try:
+            status, body = self.http_get(xml_url, verify=False, phase='ver_xml_fetch')
+        except requests.RequestException as e:
+            raise TransientError(f"{type(e).__name__}: {e}")
+        
+        return self.check_update_response(status, body, title_id)
+    
+    def get_filename_from_url(self, url):
+        """Extract filename from URL"""
+        if not url:
+            return "unknown_file.pkg"
+        
+        parsed = urlparse(url)
+        filename = os.path.basename(parsed.path)
+        
+        if not filename or not filename.endswith('.pkg'):
+            path_parts = parsed.path.split('/')
+            for part in reversed(path_parts):
+                if '.pkg' in part:
+                    filename = part
+                    break
+            else:
+                filename = "ps4_update.pkg"
+        
+        return filename
+    
+    def iter_manifests(self, root):
+        """Yield (version, manifest_url) for every package listed in a ver.xml"""
+        for item in root.iter('package'):
+            ver = item.get('version')
+            man_url = item.get('manifest_url')
+            if man_url and ver:
+                yield ver, man_url
+    
+    def parse_manifest(self, content, game_name, ver, title_id):
+        """Parse a manifest JSON into the list of update files for one version"""
+        json_cont = json.loads(content)
+        
+        version_files = []
+        for piece in json_cont.get('pieces', []):
+            version_files.append(UpdatePiece(
+                game_name=game_name,
+                version=ver,
+                url=piece.get('url'),
+                hash=piece.get('hashValue'),
+                size=piece.get('fileSize'),
+                title_id=title_id,
+                filename=self.get_filename_from_url(piece.get('url'))
+            ))
+        
+        if version_files and self.verbose:
+            print(f"      🔍 Version {ver}: {len(version_files)} files, "
+                  f"{sum(f['size'] for f in version_files if f['size'])/(1024*1024):.1f} MB")
+        
+        return version_files
+    
+    def manifest_executor(self):
+        """Shared manifest thread pool, created on first use"""
+        with self.manifest_lock:
+            if self.manifest_pool is None:
+                self.manifest_pool = ThreadPoolExecutor(max_workers=self.manifest_workers,
+                                                        thread_name_prefix='manifest')
+            return self.manifest_pool
+    
+    def close_manifest_pool(self):
+        with self.manifest_lock:
+            pool, self.manifest_pool = self.manifest_pool, None
+        if pool is not None:
+            pool.shutdown()
+    
+    def fetch_manifest(self, man_url):
+        """Fetch a manifest on the shared pool, returns a Future of (status, body)
+        
+        A URL already in flight for another title shares its Future instead
+        of sending the same request twice.
+        """
+        executor = self.manifest_executor()
+        with self.manifest_lock:
+            future = self.inflight_manifests.get(man_url)
+            if future is not None:
+                self.coalesced_manifests += 1
+                return future
+            future = executor.submit(self.http_get, man_url, phase='manifest_fetch')
+            self.inflight_manifests[man_url] = future
+        
+        def forget(done):
+            with self.manifest_lock:
+                if self.inflight_manifests.get(man_url) is done:
+                    del self.inflight_manifests[man_url]
+        
+        future.add_done_callback(forget)
+        return future
+    
+    def get_update_info(self, title_id):
+        """Get update information for a PS4 title - Enhanced for multiple versions
+        
+        Every manifest of the title is fetched at once on the shared manifest
+        pool, so a title with many versions waits for its slowest manifest
+        rather than for all of them in a row.
+        """
+        root, game_name = self.request_update(title_id)
+        
+        if root is None:
+            return None
+        
+        updates = []
+        versions_found = set()
+        
+        # Parcourir TOUS les packages (versions)
+        manifests = [(ver, self.fetch_manifest(man_url)) for ver, man_url in self.iter_manifests(root)]
+        for ver, future in manifests:
+            # Un manifest en échec temporaire rend le titre incomplet : tout le titre sera relancé
+            try:
+                status, body = future.result()
+            except requests.RequestException as e:
+                raise TransientError(f"Manifest v{ver}: {type(e).__name__}: {e}")
+            if self.is_transient_status(status):
+                raise TransientError(f"Manifest v{ver}: HTTP {status}")
+            
+            try:
+                with self.metrics.timer('manifest_parse'):
+                    version_files = self.parse_manifest(body, game_name, ver, title_id)
+                
+                if version_files:
+                    versions_found.add(ver)
+                    updates.extend(version_files)
+            
+            except Exception as e:
+                print(f"⚠️ Error parsing manifest for {title_id} v{ver}: {e}")
+                continue
+        
+        if updates and self.verbose:
+            print(f"    📦 Total: {len(versions_found)} versions, {len(updates)} files")
+        
+        return updates if updates else None
+    
+    def build_result(self, title_data, updates):
+        """Build the result dict for a title from its update files"""
+        title_id = title_data['Title_ID']
+        title_name = title_data['Name']
+        editions = title_data['Editions']
+        
+        if updates:
+            total_size = sum(u['size'] for u in updates if u['size'])
+            
+            return UpdateResult(
+                title_id=title_id,
+                title_name=title_name,
+                sony_game_name=updates[0]['game_name'],
+                editions=editions,
+                has_updates=True,
+                update_count=len(updates),
+                latest_version=updates[0]['version'],
+                total_size_bytes=total_size,
+                total_size_mb=total_size / (1024 * 1024),
+                updates=updates,
+                status='found'
+            )
+        
+        return UpdateResult(
+            title_id=title_id,
+            title_name=title_name,
+            editions=editions,
+            has_updates=False,
+            update_count=0,
+            status='no_updates'
+        )
+    
+    def version_count(self, result):
+        """Distinct versions (one manifest each) among a result's update files"""
+        return len(set(update['version'] for update in result.get('updates') or ()))
+    
+    def build_error_result(self, title_data, error, retryable=False):
+        """Build the result dict for a title that failed
+        
+        Retryable failures get the 'retry' status and are queued by the batch
+        instead of being stored.
+        """
+        return UpdateResult(
+            title_id=title_data['Title_ID'],
+            title_name=title_data['Name'],
+            editions=title_data['Editions'],
+            has_updates=False,
+            status='retry' if retryable else 'error',
+            error=str(error)
+        )
+    
+    def process_single_title(self, title_data):
+        """Process a single title and return update links"""
+        with self.tracer.span(title_data['Title_ID'], 'title') as span:
+            try:
+                updates = self.get_update_info(title_data['Title_ID'])
+                result = self.build_result(title_data, updates)
+                
+            except TransientError as e:
+                result = self.build_error_result(title_data, e, retryable=True)
+            except Exception as e:
+                result = self.build_error_result(title_data, e)
+            span.update(status=result['status'], versions=self.version_count(result))
+        return result
+    
+    def load_titles(self, csv_file, max_titles=None):
+        """Load title records from a titles CSV"""
+        return [TitleRecord(**row) for row in ColumnarCatalog().load_records(
+            csv_file, columns=['Title_ID', 'Name', 'Editions'], max_rows=max_titles)]
+    
+    def start_batch(self, titles, resume=False, refresh=False, budget=None, limited=False):
+        """Open the result store and build the initial stats, returns (pending titles, stats)
+        
+        Limited runs (max_titles) use limited_store_path so they never clear
+        the store of an interrupted full run. With resume=True titles already committed to the store (except errors)
+        are skipped and counted in the stats; otherwise the store is cleared.
+        With refresh=True the store is kept too, and only titles without a
+        stored result or due per the refresh history are checked, at most
+        budget of them: titles without a result first, then never checked,
+        then recently patched ones. Titles over the budget wait for a later
+        run, those without a result are left out of this run's outputs.
+        """
+        self.store = ResultStore(self.limited_store_path if limited else self.store_path)
+        if not (resume or refresh):
+            self.store.clear()
+        self.store.set_finished(False)
+        self.history = RefreshScheduler(self.history_path)
+        
+        # Nouvelles métriques pour chaque lot, JSON réécrit chaque minute
+        self.metrics.stop()
+        self.metrics = BatchMetrics()
+        self.metrics.start_dump(self.download_path / "ps4_titles_metrics.json", 60)
+        if self.metrics_port is not None:
+            self.metrics.serve(self.metrics_port)
+        self.tracer.close()
+        self.tracer = TraceRecorder(self.trace_path) if self.trace_path else NULL_TRACER
+        
+        stats = {
+            'total_titles': len(titles),
+            'processed': 0,
+            'found_updates': 0,
+            'total_size_bytes': 0,
+            'errors': 0
+        }
+        
+        title_ids = set(title['Title_ID'] for title in titles)
+        stored = dict((row[0], row) for row in self.store.done_rows() if row[0] in title_ids)
+        check = None
+        if refresh:
+            due = self.history.due(title_ids)
+            due_ids = set(due)
+            # Sans résultat stocké (store effacé...) : rien à garder, à vérifier en premier
+            unstored = sorted(title_id for title_id in title_ids if title_id not in stored and title_id not in due_ids)
+            check = unstored + due
+            deferred = check[budget:] if budget is not None else []
+            check = set(check[:budget] if budget is not None else check)
+        
+        done = set()
+        for title_id, (_, has_updates, total_size_bytes) in stored.items():
+            if check is None or title_id not in check:
+                done.add(title_id)
+                stats['processed'] += 1
+                if has_updates:
+                    stats['found_updates'] += 1
+                    stats['total_size_bytes'] += total_size_bytes
+        
+        self.resumed = stats['processed']
+        if refresh:
+            skipped = [title_id for title_id in deferred if title_id not in stored]
+            stats['total_titles'] = len(title_ids) - len(skipped)
+            print(f"🔄 Refresh: {len(check):,} titles to check, {len(done):,} kept from {self.store.path.name}")
+            if deferred:
+                print(f"⏳ Budget of {budget:,} reached: {len(deferred):,} titles left for a later run")
+            if skipped:
+                more = ', ...' if len(skipped) > 5 else ''
+                print(f"   {len(skipped):,} of them have no result yet and are left out of the outputs: {', '.join(skipped[:5])}{more}")
+            return [title for title in titles if title['Title_ID'] in check], stats
+        if resume:
+            print(f"⏭️  Resuming: {len(done):,} titles already in {self.store.path.name}")
+        
+        return [title for title in titles if title['Title_ID'] not in done], stats
+    
+    def finish_batch(self, titles, stats, start_time, return_results=True):
+        """Stream the final outputs from the result store
+        
+        Returns the list of all results, or an empty list with
+        return_results=False to keep memory flat (stats stay in self.stats).
+        """
+        seen = set()
+        title_ids = []
+        for title in titles:
+            if title['Title_ID'] not in seen:
+                seen.add(title['Title_ID'])
+                title_ids.append(title['Title_ID'])
+        
+        results = self.store.iter_results(title_ids)
+        if return_results:
+            results = list(results)
+        
+        # Final save
+        self.save_final_results(results, stats)
+        self.close_manifest_pool()
+        self.store.set_finished(True)
+        self.store.close()
+        self.store = None
+        self.stats = stats
+        self.print_final_stats(stats, time.time() - start_time)
+        self.history.close()
+        self.history = None
+        self.metrics.stop()
+        if self.tracer.enabled:
+            self.tracer.close()
+            print(f"🧵 Trace written to {self.trace_path} ({self.tracer.count:,} events), open it in chrome://tracing or Perfetto")
+            self.tracer = NULL_TRACER
+        
+        return results if return_results else []
+    
+    def abandon_batch(self):
+        """Close a batch stopped through stop_event without writing the output files"""
+        self.close_manifest_pool()
+        store_name = self.store.path.name
+        self.store.close()
+        self.store = None
+        self.history.close()
+        self.history = None
+        self.metrics.stop()
+        if self.tracer.enabled:
+            self.tracer.close()
+            self.tracer = NULL_TRACER
+        print(f"🛑 Batch stopped: results committed so far stay in {store_name}, no output files written")
+        return []
+    
+    def batch_get_update_links(self, csv_file='ps4_titles.csv', max_workers=8, max_titles=None, chunk_size=1000, resume=False, return_results=True, refresh=False, budget=None):
+        """Get update links for all titles in CSV with chunked processing"""
+        try:
+            titles = self.load_titles(csv_file, max_titles)
+            pending, stats = self.start_batch(titles, resume, refresh, budget, limited=max_titles is not None)
+            # Pas de démarrage à froid : autant de requêtes que de workers dès le début
+            self.limiter.warm_start(max_workers)
+            total_titles = len(pending)
+            
+            print(f"🚀 Starting update links collection for {total_titles:,} PS4 titles")
+            print(f"📁 Results will be saved to: {self.download_path}")
+            print(f"🔧 Using {max_workers} worker threads")
+            print(f"📦 Processing in chunks of {chunk_size}")
+            print("=" * 80)
+            
+        except Exception as e:
+            print(f"❌ Error loading CSV: {e}")
+            return []
+        
+        start_time = time.time()
+        retry_queue = []
+        # Un pool par hôte, assez grand pour les threads titres et manifests
+        self.configure_connections(max_workers + self.manifest_workers)
+        
+        # Process in chunks to avoid memory issues
+        for chunk_start in range(0, total_titles, chunk_size):
+            if self.stop_event.is_set():
+                break
+            chunk_end = min(chunk_start + chunk_size, total_titles)
+            chunk_titles = pending[chunk_start:chunk_end]
+            
+            print(f"\n🔄 Processing chunk {chunk_start//chunk_size + 1}/{(total_titles-1)//chunk_size + 1}")
+            print(f"   📋 Titles {chunk_start+1} to {chunk_end}")
+            
+            # Process chunk with threading
+            for title, result in self.iter_processed(chunk_titles, max_workers):
+                self.handle_result(title, result, retry_queue, stats, start_time)
+            
+            # Save chunk progress
+            self.save_progress(stats)
+            print(f"💾 Chunk completed, {stats['processed'] - self.resumed} results committed this run")
+        
+        # Relancer les échecs temporaires avec un délai croissant
+        for attempt in range(1, self.max_retry_rounds + 1):
+            if not retry_queue or self.stop_event.is_set():
+                break
+            retry_titles = self.start_retry_round(retry_queue, attempt)
+            self.stop_event.wait(self.retry_delay(attempt))
+            for title, result in self.iter_processed(retry_titles, max_workers):
+                self.handle_result(title, result, retry_queue, stats, start_time, last_round=attempt == self.max_retry_rounds)
+        
+        if self.stop_event.is_set():
+            return self.abandon_batch()
+        return self.finish_batch(titles, stats, start_time, return_results)
+    
+    def iter_processed(self, titles, max_workers):
+        """Process titles on a thread pool, yields (title, result) as they complete"""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_title = {executor.submit(self.process_single_title, title): title for title in titles}
+            
+            for future in as_completed(future_to_title):
+                if self.stop_event.is_set():
+                    # Titres pas encore commencés annulés, ceux en cours finissent sans être enregistrés
+                    for other in future_to_title:
+                        other.cancel()
+                    return
+                title = future_to_title[future]
+                try:
+                    yield title, future.result()
+                except Exception as e:
+                    yield title, self.build_error_result(title, e)
+    
+    def handle_result(self, title, result, retry_queue, stats, start_time, last_round=False):
+        """Record a result, or defer the title to the retry queue if it failed temporarily"""
+        with self.tracer.span('record', 'result', title_id=result['title_id'], status=result['status']):
+            if result['status'] == 'retry':
+                if not last_round:
+                    retry_queue.append(title)
+                    self.metrics.count_retry()
+                    if self.verbose:
+                        print(f"⏳ {result['title_id']} deferred for retry: {result['error']}")
+                    return
+                result = self.build_error_result(title, f"Still failing after {self.max_retry_rounds} retries: {result['error']}")
+            
+            self.record_result(result, stats, start_time)
+    
+    def retry_delay(self, attempt):
+        """Exponential backoff with jitter before a retry round"""
+        return self.retry_base_delay * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+    
+    def start_retry_round(self, retry_queue, attempt):
+        """Take every queued title for a retry round"""
+        retry_titles = list(retry_queue)
+        retry_queue.clear()
+        print(f"\n🔁 Retry round {attempt}/{self.max_retry_rounds}: {len(retry_titles):,} titles with temporary failures")
+        return retry_titles
+    
+    def record_result(self, result, stats, start_time):
+        """Commit a finished result to the store, update batch stats and print progress"""
+        if self.store is not None:
+            with self.metrics.timer('result_write'):
+                self.store.add(result)
+        if self.history is not None:
+            self.history.record(result)
+        self.last_processed = result['title_id']
+        
+        total_titles = stats['total_titles']
+        stats['processed'] += 1
+        if result['has_updates']:
+            stats['found_updates'] += 1
+            stats['total_size_bytes'] += result.get('total_size_bytes', 0)
+        if result['status'] == 'error':
+            stats['errors'] += 1
+        
+        if not self.verbose:
+            return
+        
+        # Progress update (l'ETA ne compte que les titres traités dans ce run)
+        overall_progress = (stats['processed'] / total_titles) * 100
+        elapsed = time.time() - start_time
+        done_this_run = stats['processed'] - self.resumed
+        eta = (elapsed / done_this_run) * (total_titles - stats['processed']) if done_this_run > 0 else 0
+        
+        status_icon = "✅" if result['has_updates'] else "❌"
+        print(f"{status_icon} {stats['processed']:5d}/{total_titles} ({overall_progress:5.1f}%) - "
+              f"{result['title_id']} - {result['title_name'][:30]:<30} - "
+              f"ETA: {eta/60:.1f}m")
+        
+        if result['has_updates']:
+            versions = self.version_count(result)
+            version_info = f"{versions} versions" if versions > 1 else f"v{result['latest_version']}"
+            print(f"      📦 {result['update_count']} files, {version_info}, "
+                  f"{result['total_size_mb']:.1f} MB")
+    
+    def save_progress(self, stats):
+        """Save current progress"""
+        if not self.last_processed:
+            return
+        
+        progress_file = self.download_path / "titles_update_links_progress.json"
+        with open(progress_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'stats': stats,
+                'results_count': stats['processed'],
+                'last_processed': self.last_processed
+            }, f, indent=2, ensure_ascii=False)
+    
+    def save_final_results(self, results, stats):
+        """Save final comprehensive results, streaming results one at a time"""
+        writer = ResultsWriter(self.download_path)
+        count = 0
+        for result in results:
+            writer.write(result)
+            count += 1
+        
+        if not count:
+            writer.abort()
+            print("❌ No results to save")
+            return
+        
+        stats['unique_size_bytes'] = writer.dedup.unique_bytes
+        writer.write_statistics(stats)
+        if writer.links_count:
+            writer.write_plan()
+        writer.close()
+        
+        # Copies Parquet pour des chargements rapides
+        catalog = ColumnarCatalog()
+        catalog.export(writer.summary_file)
+        if writer.links_count:
+            catalog.export(writer.links_file)
+        
+        changes = None
+        if writer.links_file in writer.kept_previous:
+            changes = SnapshotDiff()
+            changes.compare(writer.previous_path(writer.links_file), writer.links_file)
+            changes.write(writer.changelog_file)
+        
+        print(f"\n📊 Results saved:")
+        print(f"   📄 Detailed data: {writer.detailed_file}")
+        print(f"   📊 Summary: {writer.summary_file}")
+        print(f"   📈 Statistics: {writer.stats_file}")
+        if writer.links_count:
+            print(f"   🔗 Download links: {writer.links_file} ({writer.links_count:,} files)")
+            print(f"   🧩 Download plan: {writer.plan_file} ({len(writer.dedup.pieces):,} unique files)")
+        if changes is not None:
+            print(f"   📰 Changes since last run: {writer.changelog_file} ({changes.summary()})")
+    
+    def load_sweep_state(self, state_file):
+        """Load the (checked, found) bitmaps of a previous sweep, or empty ones"""
+        try:
+            data = state_file.read_bytes()
+            half = len(data) // 2
+            return TitleIDBitmap(data[:half]), TitleIDBitmap(data[half:])
+        except OSError:
+            return TitleIDBitmap(), TitleIDBitmap()
+    
+    def save_sweep_state(self, state_file, checked, found):
+        tmp_file = state_file.with_name(state_file.name + '.tmp')
+        tmp_file.write_bytes(bytes(checked.bits) + bytes(found.bits))
+        os.replace(tmp_file, state_file)
+    
+    def probe_title_id(self, number):
+        """Check one CUSA number against Sony, returns (number, game_name or None)"""
+        root, game_name = self.request_update(f"CUSA{number:05d}")
+        return number, game_name if root is not None else None
+    
+    def sweep_title_ids(self, start=1, end=99999, max_workers=32, block_size=200,
+                        empty_blocks_before_sampling=3, sample_stride=10, resume=False,
+                        output_file=None):
+        """Discover titles by probing CUSA IDs directly against Sony, without SerialStation
+        
+        IDs are probed block by block. After empty_blocks_before_sampling
+        empty blocks in a row, a block is first sampled every sample_stride
+        IDs and only scanned fully if a sample hits. Which IDs were checked
+        and which exist (have a ver.xml) is kept in two bitmaps saved after
+        every block, so resume=True continues an interrupted sweep; IDs
+        whose probe fails stay unchecked for it. Found
+        titles are written as a Title_ID/Name/Editions CSV usable by
+        batch_get_update_links. Returns the list of found title records.
+        """
+        state_file = self.download_path / "cusa_sweep_bitmap.bin"
+        names_file = self.download_path / "cusa_sweep_names.json"
+        output_file = Path(output_file) if output_file else self.download_path / "ps4_titles_sony_sweep.csv"
+        
+        checked, found = self.load_sweep_state(state_file) if resume else (TitleIDBitmap(), TitleIDBitmap())
+        names = {}
+        if resume and names_file.exists():
+            with open(names_file, 'r', encoding='utf-8') as f:
+                names = {int(number): name for number, name in json.load(f).items()}
+        
+        print(f"🛰️  Sweeping CUSA{start:05d}-CUSA{end:05d} directly against Sony")
+        print(f"🔧 {max_workers} worker threads, blocks of {block_size} IDs")
+        if resume:
+            print(f"⏭️  Resuming: {len(checked):,} IDs already checked, {len(found):,} found")
+        print("=" * 80)
+        
+        start_time = time.time()
+        self.configure_connections(max_workers)
+        probes = 0
+        empty_streak = 0
+        retry_numbers = set()
+        # Erreurs inattendues (cache illisible...) : ID laissé non coché, le sweep continue
+        error_numbers = set()
+        
+        def probe(numbers):
+            """Probe numbers in parallel, returns how many exist"""
+            nonlocal probes
+            hits = 0
+            futures = {executor.submit(self.probe_title_id, number): number for number in numbers}
+            for future in as_completed(futures):
+                probes += 1
+                try:
+                    number, game_name = future.result()
+                except TransientError:
+                    # Laissé non coché : sera relancé en fin de sweep ou au prochain resume
+                    retry_numbers.add(futures[future])
+                    continue
+                except Exception as e:
+                    error_numbers.add(futures[future])
+                    print(f"⚠️  CUSA{futures[future]:05d}: probe failed ({type(e).__name__}: {e})")
+                    continue
+                checked.set(number)
+                if game_name is not None:
+                    found.set(number)
+                    names[number] = game_name
+                    hits += 1
+            return hits
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for block_start in range(start, end + 1, block_size):
+                block = [n for n in range(block_start, min(block_start + block_size, end + 1)) if n not in checked]
+                if not block:
+                    continue
+                
+                if empty_streak >= empty_blocks_before_sampling:
+                    # Zone vide : sonder d'abord un ID sur sample_stride
+                    samples = block[::sample_stride]
+                    hits = probe(samples)
+                    if hits:
+                        hits += probe([n for n in block if n not in checked and n not in retry_numbers and n not in error_numbers])
+                    mode = 'sampled'
+                else:
+                    hits = probe(block)
+                    mode = 'full'
+                
+                empty_streak = 0 if hits else empty_streak + 1
+                self.save_sweep_state(state_file, checked, found)
+                
+                elapsed = time.time() - start_time
+                print(f"{'✅' if hits else '▫️ '} CUSA{block_start:05d}+{block_size}: {hits} found ({mode}) - "
+                      f"total {len(found):,} found, {probes:,} probes, {probes / elapsed if elapsed else 0:.0f} probes/s")
+            
+            if retry_numbers:
+                print(f"\n🔁 Retrying {len(retry_numbers):,} IDs with temporary failures")
+                time.sleep(self.retry_delay(1))
+                pending = sorted(retry_numbers)
+                retry_numbers.clear()
+                probe(pending)
+                self.save_sweep_state(state_file, checked, found)
+        
+        with open(names_file, 'w', encoding='utf-8') as f:
+            json.dump({str(number): name for number, name in sorted(names.items())}, f, ensure_ascii=False)
+        
+        titles = [{'Title_ID': f"CUSA{number:05d}", 'Name': names.get(number, ''), 'Editions': ''}
+                  for number in found if start <= number <= end]
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(['Title_ID', 'Name', 'Editions'])
+            for title in titles:
+                writer.writerow([title['Title_ID'], title['Name'], title['Editions']])
+        
+        print(f"\n🎉 Sweep finished in {(time.time() - start_time)/60:.1f} min: {len(titles):,} titles with updates, "
+              f"{probes:,} probes, {len(retry_numbers):,} IDs still failing, {len(error_numbers):,} probe errors")
+        print(f"📄 Titles saved to {output_file}")
+        
+        return titles
+    
+    def print_final_stats(self, stats, duration):
+        """Print final statistics"""
+        print(f"\n" + "=" * 80)
+        print(f"🎉 PS4 TITLES UPDATE LINKS COLLECTION COMPLETED!")
+        print(f"=" * 80)
+        print(f"⏱️  Duration: {duration/3600:.1f} hours")
+        print(f"🎮 Total titles processed: {stats['processed']:,}")
+        print(f"📦 Titles with updates: {stats['found_updates']:,}")
+        print(f"❌ Errors: {stats['errors']:,}")
+        if stats['processed'] > 0:
+            print(f"📈 Success rate: {(stats['found_updates']/stats['processed'])*100:.1f}%")
+        print(f"💾 Total update size: {stats['total_size_bytes']/(1024**3):.2f} GB")
+        
+        if stats['found_updates'] > 0:
+            avg_size = (stats['total_size_bytes'] / stats['found_updates']) / (1024**2)
+            print(f"📊 Average update size: {avg_size:.1f} MB per title")
+        if 'unique_size_bytes' in stats:
+            print(f"🧩 Unique update size (deduplicated): {stats['unique_size_bytes']/(1024**3):.2f} GB")
+        
+        if self.cache:
+            print(f"🗄️  HTTP cache: {self.cache.summary()}")
+        if self.coalesced_manifests:
+            print(f"🔗 Manifests: {self.coalesced_manifests:,} requests coalesced with identical ones in flight")
+        if self.history is not None:
+            history = self.history.summary()
+            print(f"🔄 Refresh history: {history['tracked']:,} titles tracked, "
+                  f"{history['recently_changed']:,} changed in the last week, {history['due']:,} due now")
+        
+        for line in self.limiter.summary():
+            print(f"🚦 {line}")
+        
+        for line in self.connection_summary():
+            print(f"🔌 {line}")
+        for line in self.metrics.summary():
+            print(f"⏱️  {line}")
+        print(f"🌐 DNS cache: {DNS_CACHE.hits:,} hits, {DNS_CACHE.misses:,} lookups")
+
+class AsyncPS4UpdateDownloader(PS4UpdateDownloader):
+    """Asyncio engine for batch update links collection
+    
+    Same inputs and result dicts as PS4UpdateDownloader, but keeps hundreds of
+    ver.xml and manifest requests in flight instead of one per thread.
+    Output files are written from the result store in CSV order, so they
+    are identical to the threaded engine's.
+    """
+    
+    def __init__(self, download_path='./ps4_titles_updates/', per_host_limit=64, cache_dir=None, limiter=None):
+        # per_host_limit plafonne la concurrence que le limiteur adaptatif peut atteindre
+        super().__init__(download_path, cache_dir, limiter or AdaptiveHostLimiter(max_concurrency=per_host_limit))
+        self.per_host_limit = per_host_limit
+        self.async_connections = {}
+    
+    def trace_config(self):
+        """aiohttp trace hooks counting new vs reused connections per host"""
+        def counter(host, kind):
+            new, reused = self.async_connections.get(host, (0, 0))
+            self.async_connections[host] = (new + 1, reused) if kind == 'new' else (new, reused + 1)
+        
+        async def on_request_start(session, context, params):
+            context.host = params.url.host
+        
+        async def on_connection_create_end(session, context, params):
+            counter(context.host, 'new')
+        
+        async def on_connection_reuseconn(session, context, params):
+            counter(context.host, 'reused')
+        
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+    
+    def connection_summary(self):
+        lines = []
+        for host, (new, reused) in sorted(self.async_connections.items()):
+            total = new + reused
+            lines.append(f"{host}: {total:,} requests, {new:,} new connections, "
+                         f"{reused:,} reused ({reused / total * 100 if total else 0:.1f}%)")
+        return lines
+    
+    async def limited_fetch(self, http, url, headers=None, verify=True, timeout=30, phase='fetch'):
+        """GET a URL under the adaptive per-host limiter, returns (status, headers, body)
+        
+        verify=False skips certificate checks for this request only, like
+        http_get (the gs-sec ver.xml host), every other host is verified.
+        """
+        host = urlparse(url).netloc
+        with self.tracer.span('limiter_wait', 'limiter', host=host), self.metrics.timer('limiter_wait'):
+            await self.limiter.acquire_async(host)
+        start = time.monotonic()
+        status = None
+        size = 0
+        options = {} if verify else {'ssl': False}
+        with self.tracer.span(phase, 'http', url=url) as span:
+            try:
+                async with http.get(url, headers=headers or {}, timeout=aiohttp.ClientTimeout(total=timeout), **options) as response:
+                    body = await response.read()
+                    status = response.status
+                    size = len(body)
+                    return status, response.headers, body
+            finally:
+                latency = time.monotonic() - start
+                self.limiter.release(host, status)
+                self.metrics.record_request(phase, status, size, latency)
+                span.update(status=status, bytes=size)
+    
+    async def fetch(self, http, url, verify=True, timeout=30, phase='fetch'):
+        """GET a URL through the HTTP cache if enabled, returns (status, body)
+        
+        Cache files are read and written on the default executor so disk
+        I/O never blocks the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        headers = await loop.run_in_executor(None, self.cache.conditional_headers, url) if self.cache else {}
+        status, response_headers, body = await self.limited_fetch(http, url, headers, verify, timeout, phase)
+        
+        if self.cache:
+            if status == 304:
+                cached = await loop.run_in_executor(None, self.cache.load_body, url)
+                if cached is not None:
+                    return 200, cached
+                status, response_headers, body = await self.limited_fetch(http, url, verify=verify, timeout=timeout, phase=phase)
+            if status == 200:
+                await loop.run_in_executor(None, self.cache.store, url, response_headers, body)
+        
+        return status, body
+    
+    async def async_request_update(self, http, title_id):
+        """Async version of request_update"""
+        try:
+            status, body = await self.fetch(http, self.build_update_url(title_id), verify=False, phase='ver_xml_fetch')
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TransientError(f"{type(e).__name__}: {e}")
+        
+        return self.check_update_response(status, body, title_id)
+    
+    async def async_fetch_manifest(self, http, man_url):
+        """Async version of fetch_manifest, waiters of a URL in flight share one task"""
+        task = self.inflight_manifests.get(man_url)
+        if task is None:
+            task = asyncio.ensure_future(self.fetch(http, man_url, phase='manifest_fetch'))
+            self.inflight_manifests[man_url] = task
+            task.add_done_callback(lambda done: self.inflight_manifests.pop(man_url, None))
+        else:
+            self.coalesced_manifests += 1
+        # shield : un titre annulé n'annule pas la requête des autres
+        return await asyncio.shield(task)
+    
+    async def async_get_update_info(self, http, title_id):
+        """Async version of get_update_info, manifests are fetched concurrently"""
+        root, game_name = await self.async_request_update(http, title_id)
+        
+        if root is None:
+            return None
+        
+        async def fetch_manifest(ver, man_url):
+            try:
+                status, body = await self.async_fetch_manifest(http, man_url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise TransientError(f"Manifest v{ver}: {type(e).__name__}: {e}")
+            if self.is_transient_status(status):
+                raise TransientError(f"Manifest v{ver}: HTTP {status}")
+            
+            try:
+                with self.metrics.timer('manifest_parse'):
+                    return self.parse_manifest(body, game_name, ver, title_id)
+            except Exception as e:
+                print(f"⚠️ Error parsing manifest for {title_id} v{ver}: {e}")
+                return []
+        
+        manifests = list(self.iter_manifests(root))
+        # gather garde l'ordre du ver.xml, comme la version synchrone
+        per_version = await asyncio.gather(*(fetch_manifest(ver, url) for ver, url in manifests))
+        
+        updates = []
+        versions_found = set()
+        for (ver, _), version_files in zip(manifests, per_version):
+            if version_files:
+                versions_found.add(ver)
+                updates.extend(version_files)
+        
+        if updates and self.verbose:
+            print(f"    📦 Total: {len(versions_found)} versions, {len(updates)} files")
+        
+        return updates if updates else None
+    
+    async def async_process_single_title(self, http, title_data, slots):
+        """Async version of process_single_title"""
+        async with slots:
+            with self.tracer.span(title_data['Title_ID'], 'title') as span:
+                try:
+                    updates = await self.async_get_update_info(http, title_data['Title_ID'])
+                    result = self.build_result(title_data, updates)
+                except TransientError as e:
+                    result = self.build_error_result(title_data, e, retryable=True)
+                except Exception as e:
+                    result = self.build_error_result(title_data, e)
+                span.update(status=result['status'], versions=self.version_count(result))
+            return result
+    
+    async def async_batch(self, titles, max_workers, chunk_size, stats, start_time):
+        """Run all chunks on one event loop and HTTP session
+        
+        Results are committed (store, refresh history, stats, progress) by a
+        single writer thread, in completion order, so SQLite commits never
+        stall the fetches; the loop waits for the writer at the end of each
+        chunk and retry round.
+        """
+        total_titles = len(titles)
+        retry_queue = []
+        slots = asyncio.Semaphore(max_workers)
+        loop = asyncio.get_running_loop()
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='result-writer')
+        # Un pool keep-alive par hôte, DNS mis en cache par aiohttp
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.per_host_limit,
+                                         ttl_dns_cache=300, keepalive_timeout=30)
+        
+        async def process(titles, last_round=False):
+            writes = []
+            try:
+                async for title, result in self.async_process_titles(http, titles, slots):
+                    if self.stop_event.is_set():
+                        # asyncio.run annule les titres encore en vol
+                        return False
+                    writes.append(loop.run_in_executor(writer, functools.partial(
+                        self.handle_result, title, result, retry_queue, stats, start_time, last_round=last_round)))
+            finally:
+                if writes:
+                    await asyncio.gather(*writes)
+            return True
+        
+        try:
+            async with aiohttp.ClientSession(connector=connector, headers=dict(self.session.headers),
+                                             trace_configs=[self.trace_config()]) as http:
+                for chunk_start in range(0, total_titles, chunk_size):
+                    chunk_end = min(chunk_start + chunk_size, total_titles)
+                    chunk_titles = titles[chunk_start:chunk_end]
+                    
+                    print(f"\n🔄 Processing chunk {chunk_start//chunk_size + 1}/{(total_titles-1)//chunk_size + 1}")
+                    print(f"   📋 Titles {chunk_start+1} to {chunk_end}")
+                    
+                    if not await process(chunk_titles):
+                        return
+                    
+                    # Save chunk progress
+                    self.save_progress(stats)
+                    print(f"💾 Chunk completed, {stats['processed'] - self.resumed} results committed this run")
+                
+                # Relancer les échecs temporaires avec un délai croissant
+                for attempt in range(1, self.max_retry_rounds + 1):
+                    if not retry_queue or self.stop_event.is_set():
+                        break
+                    retry_titles = self.start_retry_round(retry_queue, attempt)
+                    await asyncio.sleep(self.retry_delay(attempt))
+                    if not await process(retry_titles, last_round=attempt == self.max_retry_rounds):
+                        return
+        finally:
+            # Plus aucune écriture après la fermeture du store par finish/abandon_batch
+            writer.shutdown(wait=True)
+    
+    async def async_process_titles(self, http, titles, slots):
+        """Process titles concurrently, yields (title, result) as they complete"""
+        async def process(title):
+            return title, await self.async_process_single_title(http, title, slots)
+        
+        for future in asyncio.as_completed([process(title) for title in titles]):
+            yield await future
+    
+    def batch_get_update_links(self, csv_file='ps4_titles.csv', max_workers=200, max_titles=None, chunk_size=1000, resume=False, return_results=True, refresh=False, budget=None):
+        """Get update links for all titles in CSV, max_workers titles in flight"""
+        if not AIOHTTP_AVAILABLE:
+            print("❌ aiohttp not available. Please install: pip install aiohttp")
+            return []
+        
+        try:
+            titles = self.load_titles(csv_file, max_titles)
+            pending, stats = self.start_batch(titles, resume, refresh, budget, limited=max_titles is not None)
+            # Pas de démarrage à froid : autant de requêtes que de workers dès le début
+            self.limiter.warm_start(max_workers)
+            total_titles = len(pending)
+            
+            print(f"🚀 Starting async update links collection for {total_titles:,} PS4 titles")
+            print(f"📁 Results will be saved to: {self.download_path}")
+            print(f"🔧 Up to {max_workers} titles in flight, {self.per_host_limit} requests per host")
+            print(f"📦 Processing in chunks of {chunk_size}")
+            print("=" * 80)
+            
+        except Exception as e:
+            print(f"❌ Error loading CSV: {e}")
+            return []
+        
+        start_time = time.time()
+        asyncio.run(self.async_batch(pending, max_workers, chunk_size, stats, start_time))
+        
+        if self.stop_event.is_set():
+            return self.abandon_batch()
+        return self.finish_batch(titles, stats, start_time, return_results)
+
+class ShardedBatch:
+    """Update links collection split over processes or machines
+    
+    init() cuts the titles CSV into shards of consecutive titles (Title_ID
+    ranges when the CSV is sorted) in a WorkQueue kept in the output
+    directory. work() leases shards one by one and runs the usual resumable
+    batch for each in shards/shard_NNNNN/, renewing the lease from a
+    heartbeat thread, so a shard taken over after a crash resumes from its
+    result store. merge() streams every shard's results, in shard order,
+    into the standard summary, links and statistics files: the same files
+    a single-process run writes. run() does all three with local processes.
+    """
+    
+    def __init__(self, output_dir='./ps4_titles_updates/', cache_dir=None, lease_seconds=300):
+        self.output_dir = Path(output_dir)
+        self.queue_path = self.output_dir / "ps4_titles_work_queue.sqlite"
+        self.shards_dir = self.output_dir / "shards"
+        self.cache_dir = cache_dir
+        self.lease_seconds = lease_seconds
+        self.titles_cache = {}
+    
+    def shard_dir(self, shard_id):
+        return self.shards_dir / f"shard_{shard_id:05d}"
+    
+    def load_titles(self, titles_csv, max_titles=None):
+        """Titles of the CSV in file order, first row of each Title_ID"""
+        titles = []
+        seen = set()
+        for title in ColumnarCatalog().load_records(titles_csv, columns=['Title_ID', 'Name', 'Editions'], max_rows=max_titles):
+            if title['Title_ID'] not in seen:
+                seen.add(title['Title_ID'])
+                titles.append(TitleRecord(**title))
+        return titles
+    
+    def init(self, titles_csv, shard_size=1000, max_titles=None):
+        """Start over: new queue for titles_csv, previous shard outputs removed"""
+        titles = self.load_titles(titles_csv, max_titles)
+        if self.shards_dir.exists():
+            shutil.rmtree(self.shards_dir)
+        self.shards_dir.mkdir(parents=True)
+        
+        queue = WorkQueue(self.queue_path)
+        stat = os.stat(titles_csv)
+        queue.create([title['Title_ID'] for title in titles], shard_size, {
+            'titles_csv': Path(titles_csv).resolve(), 'max_titles': max_titles or 0, 'created': time.time(),
+            'titles_size': stat.st_size, 'titles_mtime': stat.st_mtime})
+        shard_count = len(queue.shards())
+        queue.close()
+        print(f"🧩 {len(titles):,} titles split into {shard_count:,} shards of up to {shard_size:,} in {self.queue_path}")
+        return shard_count
+    
+    def check_titles_csv(self, queue):
+        """Raise if the titles CSV changed since init(): shard row ranges would point at other titles"""
+        titles_csv = queue.meta('titles_csv')
+        expected = (queue.meta('titles_size'), queue.meta('titles_mtime'))
+        if expected == (None, None):
+            return  # file d'attente créée avant l'enregistrement de l'empreinte
+        try:
+            stat = os.stat(titles_csv)
+        except OSError as e:
+            raise RuntimeError(f"titles CSV of the work queue is unreadable: {e}")
+        if (str(stat.st_size), str(stat.st_mtime)) != expected:
+            raise RuntimeError(f"{titles_csv} changed since the shards were created, run 'shard init' again")
+    
+    def shard_titles(self, queue, shard):
+        """Titles of one shard, the titles CSV being loaded once per worker"""
+        key = (queue.meta('titles_csv'), int(queue.meta('max_titles', 0)) or None)
+        if key not in self.titles_cache:
+            self.titles_cache = {key: self.load_titles(*key)}
+        return self.titles_cache[key][shard['first_row']:shard['last_row'] + 1]
+    
+    def write_shard_csv(self, titles, csv_file):
+        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Title_ID', 'Name', 'Editions'])
+            for title in titles:
+                writer.writerow([csv_value(title[column]) for column in ('Title_ID', 'Name', 'Editions')])
+    
+    def work(self, worker=None, max_workers=8, use_async=False):
+        """Lease and process shards until none is left, returns the number completed"""
+        worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        if not self.queue_path.exists():
+            print(f"❌ No work queue in {self.output_dir}, run the init step first")
+            return 0
+        
+        queue = WorkQueue(self.queue_path)
+        completed = 0
+        try:
+            try:
+                self.check_titles_csv(queue)
+            except RuntimeError as e:
+                print(f"❌ [{worker}] {e}")
+                return 0
+            while True:
+                shard = queue.lease(worker, self.lease_seconds)
+                if shard is None:
+                    break
+                shard_id = shard['shard_id']
+                print(f"\n🧩 [{worker}] Shard {shard_id}: {shard['first_title_id']} - {shard['last_title_id']}"
+                      f" (attempt {shard['attempts']})")
+                
+                shard_dir = self.shard_dir(shard_id)
+                shard_dir.mkdir(parents=True, exist_ok=True)
+                shard_csv = shard_dir / "shard_titles.csv"
+                self.write_shard_csv(self.shard_titles(queue, shard), shard_csv)
+                
+                engine = AsyncPS4UpdateDownloader if use_async else PS4UpdateDownloader
+                downloader = engine(shard_dir, cache_dir=self.cache_dir)
+                downloader.verbose = False
+                
+                # Battement de cœur : le bail est renouvelé tant que le shard tourne
+                stop = threading.Event()
+                lost = threading.Event()
+                
+                def heartbeat():
+                    delay = self.lease_seconds / 3
+                    while not stop.wait(delay):
+                        try:
+                            renewed = queue.renew(shard_id, worker, self.lease_seconds)
+                        except sqlite3.OperationalError as e:
+                            # "database is locked" : réessayer vite, le bail court encore
+                            print(f"⚠️  [{worker}] Lease renewal of shard {shard_id} failed ({e}), retrying")
+                            delay = min(5.0, self.lease_seconds / 10)
+                            continue
+                        delay = self.lease_seconds / 3
+                        if not renewed:
+                            # Un autre worker a repris le shard : arrêter le lot avant qu'il n'écrive
+                            lost.set()
+                            downloader.stop_event.set()
+                            return
+                
+                thread = threading.Thread(target=heartbeat, daemon=True)
+                thread.start()
+                try:
+                    downloader.batch_get_update_links(shard_csv, max_workers=max_workers, resume=True, return_results=False)
+                finally:
+                    stop.set()
+                    thread.join()
+                    downloader.close()
+                
+                if lost.is_set() or not queue.complete(shard_id, worker):
+                    print(f"⚠️  [{worker}] Lease on shard {shard_id} expired, another worker took it over, shard abandoned")
+                    continue
+                completed += 1
+        finally:
+            queue.close()
+        return completed
+    
+    def merge(self):
+        """Write the standard outputs from every shard, returns (merged shards, missing shards)"""
+        queue = WorkQueue(self.queue_path)
+        try:
+            self.check_titles_csv(queue)
+            shards = queue.shards()
+            titles = self.load_titles(queue.meta('titles_csv'), int(queue.meta('max_titles', 0)) or None)
+        finally:
+            queue.close()
+        
+        missing = [shard for shard in shards if shard['status'] != 'done']
+        if missing:
+            print(f"⚠️  {len(missing):,} shards not done yet, they are left out of the merge")
+        
+        stats = {'total_titles': len(titles), 'processed': 0, 'found_updates': 0, 'total_size_bytes': 0, 'errors': 0}
+        
+        def results():
+            # Générateur : les stats se remplissent pendant que save_final_results écrit
+            for shard in shards:
+                store_path = self.shard_dir(shard['shard_id']) / "titles_update_results.sqlite"
+                if shard['status'] != 'done' or not store_path.exists():
+                    continue
+                store = ResultStore(store_path)
+                try:
+                    shard_ids = [title['Title_ID'] for title in titles[shard['first_row']:shard['last_row'] + 1]]
+                    for result in store.iter_results(shard_ids):
+                        stats['processed'] += 1
+                        if result['has_updates']:
+                            stats['found_updates'] += 1
+                            stats['total_size_bytes'] += result.get('total_size_bytes', 0)
+                        if result['status'] == 'error':
+                            stats['errors'] += 1
+                        yield result
+                finally:
+                    store.close()
+        
+        downloader = PS4UpdateDownloader(self.output_dir)
+        downloader.save_final_results(results(), stats)
+        downloader.stats = stats
+        downloader.close()
+        print(f"🧩 Merged {len(shards) - len(missing):,}/{len(shards):,} shards: {stats['processed']:,} titles, "
+              f"{stats['found_updates']:,} with updates, {stats['errors']:,} errors")
+        return len(shards) - len(missing), len(missing), stats
+    
+    def run(self, titles_csv, processes=4, shard_size=1000, max_workers=8, use_async=False, max_titles=None, resume=False):
+        """init (unless resuming an existing queue), work with local processes, merge"""
+        if not (resume and self.queue_path.exists()):
+            self.init(titles_csv, shard_size, max_titles)
+        
+        print(f"🚀 {processes} worker processes, {max_workers} {'titles in flight' if use_async else 'threads'} each, "
+              f"logs in {self.shards_dir}/worker_N.log")
+        start_time = time.time()
+        completed = 0
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(run_shard_worker, str(self.output_dir), self.cache_dir, self.lease_seconds,
+                                       f"{socket.gethostname()}:{i}", max_workers, use_async)
+                       for i in range(1, processes + 1)]
+            for future in as_completed(futures):
+                completed += future.result()
+        print(f"✅ {completed:,} shards completed in {(time.time() - start_time)/60:.1f} min")
+        return self.merge()
+
+def run_shard_worker(output_dir, cache_dir, lease_seconds, worker, max_workers, use_async):
+    """Worker process entry point of ShardedBatch.run, output goes to a log file"""
+    batch = ShardedBatch(output_dir, cache_dir, lease_seconds)
+    log_file = batch.shards_dir / f"worker_{worker.rsplit(':', 1)[-1]}.log"
+    with open(log_file, 'a', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        return batch.work(worker, max_workers, use_async)
+
+class StreamingSHA1:
+    """SHA1 of a file written out of order by several range segments
+    
+    Data arriving at the current hash position is hashed straight from
+    memory; data written further ahead is hashed back from the file (still
+    in the page cache) as soon as the gap before it is filled, so the hash
+    is ready when the last byte lands, without a separate read pass.
+    """
+    
+    READ_BLOCK = 8 * 1024 * 1024
+    
+    def __init__(self, path):
+        self.sha1 = hashlib.sha1()
+        self.pos = 0
+        self.ranges = {}      # début -> fin des plages écrites mais pas encore hachées
+        self.range_ends = {}  # fin -> début
+        self.lock = threading.Lock()
+        self.reader = open(path, 'rb')
+    
+    def feed(self, offset, data):
+        """Register data already written at offset"""
+        with self.lock:
+            end = offset + len(data)
+            if offset == self.pos:
+                self.sha1.update(data)
+                self.pos = end
+            elif offset > self.pos:
+                self.add_range(offset, end)
+            elif end > self.pos:
+                # Chevauchement (reprise) : ne hacher que la partie nouvelle
+                self.sha1.update(data[self.pos - offset:])
+                self.pos = end
+            self.catch_up()
+    
+    def mark_written(self, start, end):
+        """Register a range already on disk (resumed download)"""
+        with self.lock:
+            self.add_range(start, end)
+            self.catch_up()
+    
+    def add_range(self, start, end):
+        if start in self.range_ends:
+            start = self.range_ends.pop(start)
+        if end in self.ranges:
+            old_end = self.ranges.pop(end)
+            del self.range_ends[old_end]
+            end = old_end
+        self.ranges[start] = end
+        self.range_ends[end] = start
+    
+    def catch_up(self):
+        """Hash every written range that now starts at the hash position"""
+        while self.pos in self.ranges:
+            end = self.ranges.pop(self.pos)
+            del self.range_ends[end]
+            self.reader.seek(self.pos)
+            while self.pos < end:
+                block = self.reader.read(min(self.READ_BLOCK, end - self.pos))
+                if not block:
+                    raise IOError("File shorter than its written ranges")
+                self.sha1.update(block)
+                self.pos += len(block)
+    
+    def hexdigest(self):
+        return self.sha1.hexdigest()
+    
+    def close(self):
+        self.reader.close()
+
+class PackageDownloader:
+    """Parallel .pkg downloader for the download links CSV
+    
+    Several files are fetched at once, and files larger than
+    min_segment_size are split into up to connections_per_file HTTP range
+    requests. Partial downloads live in <file>.part with a <file>.part.json
+    sidecar holding each segment's progress, so an interrupted download
+    resumes where it stopped. SHA1 is computed while streaming
+    (StreamingSHA1) and checked against the catalog hash.
+    """
+    
+    CHUNK_SIZE = 1024 * 1024
+    
+    def __init__(self, dest_dir='./ps4_pkgs/', max_files=4, connections_per_file=4,
+                 min_segment_size=64 * 1024 * 1024, max_retries=3):
+        self.dest_dir = Path(dest_dir)
+        self.dest_dir.mkdir(parents=True, exist_ok=True)
+        self.max_files = max_files
+        self.connections_per_file = connections_per_file
+        self.min_segment_size = min_segment_size
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'
+        })
+        adapter = PooledHTTPAdapter(max_files * connections_per_file)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def supports_ranges(self, url):
+        """True if the server answers a one-byte range request with 206"""
+        try:
+            with self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, verify=False, timeout=30) as response:
+                return response.status_code == 206
+        except requests.RequestException:
+            return False
+    
+    def plan_segments(self, url, size):
+        """Split a file into [start, end, done] segments"""
+        count = 1
+        if size >= 2 * self.min_segment_size and self.supports_ranges(url):
+            count = min(self.connections_per_file, size // self.min_segment_size)
+        step = max(-(-size // count), 1)
+        return [[start, min(start + step, size), start] for start in range(0, size, step)] or [[0, 0, 0]]
+    
+    def load_state(self, state_file, url, size):
+        """Segments of a previous partial download of the same URL, or None"""
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('url') != url or state.get('size') != size:
+            return None
+        return state['segments']
     
-    def request_update(self, title_id):
-        """Request PS4 update info from Sony servers"""
-        try:
-            # Clean and format title_id
-            title_id = title_id.strip().upper()
-            if not title_id.startswith('CUSA'):
-                if title_id.startswith('CUSA-'):
-                    title_id = title_id.replace('CUSA-', 'CUSA')
-                elif title_id.isdigit():
-                    title_id = f"CUSA{title_id.zfill(5)}"
-                else:
-                    title_id = f"CUSA{title_id.upper()}"
-            
-            # Remove any dashes
-            title_id = title_id.replace('-', '')
-            
-            id_bytes = bytes('np_' + title_id, 'UTF-8')
-            key = bytearray.fromhex('AD62E37F905E06BC19593142281C112CEC0E7EC3E97EFDCAEFCDBAAFA6378D84')
-            hash_val = hmac.new(key, id_bytes, hashlib.sha256).hexdigest()
-            xml_url = f'https://gs-sec.ww.np.dl.playstation.net/plo/np/{title_id}/{hash_val}/{title_id}-ver.xml'
-            
-            response = self.session.get(xml_url, verify=False, timeout=30)
-            if response.status_code == 200 and response.text:
-                root = ET.fromstring(response.content)
-                name_elem = root.find('./tag/package/paramsfo/')
-                name = name_elem.text.replace('\n', ' ') if name_elem is not None else title_id
-                return root, name
-            else:
-                return None, f"No updates available (HTTP {response.status_code})"
-        except Exception as e:
-            return None, f"Error: {e}"
+    def save_state(self, state_file, url, size, segments, lock):
+        # Tout sous le verrou : les segments partagent le même fichier .tmp
+        with lock:
+            data = json.dumps({'url': url, 'size': size, 'segments': segments})
+            tmp_file = state_file.with_name(state_file.name + '.tmp')
+            tmp_file.write_text(data, encoding='utf-8')
+            os.replace(tmp_file, state_file)
     
-    def get_filename_from_url(self, url):
-        """Extract filename from URL"""
-        if not url:
-            return "unknown_file.pkg"
-        
-        parsed = urlparse(url)
-        filename = os.path.basename(parsed.path)
-        
-        if not filename or not filename.endswith('.pkg'):
-            path_parts = parsed.path.split('/')
-            for part in reversed(path_parts):
-                if '.pkg' in part:
-                    filename = part
-                    break
-            else:
-                filename = "ps4_update.pkg"
-        
-        return filename
+    def download_segment(self, url, part_file, segment, hasher, lock, save):
+        """Fetch one byte range into the part file, retrying from where it stopped"""
+        for attempt in range(self.max_retries + 1):
+            start, end, done = segment
+            if done >= end:
+                return
+            try:
+                headers = {'Range': f'bytes={done}-{end - 1}'} if (done or end) else {}
+                with self.session.get(url, headers=headers, stream=True, verify=False, timeout=60) as response:
+                    if response.status_code not in (200, 206):
+                        raise TransientError(f"HTTP {response.status_code}")
+                    if response.status_code == 200 and done:
+                        raise TransientError("Server ignored the Range header")
+                    
+                    with open(part_file, 'r+b') as f:
+                        f.seek(done)
+                        unsaved = 0
+                        for chunk in response.iter_content(self.CHUNK_SIZE):
+                            chunk = chunk[:end - done]
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            f.flush()
+                            hasher.feed(done, chunk)
+                            done += len(chunk)
+                            with lock:
+                                segment[2] = done
+                            unsaved += len(chunk)
+                            if unsaved >= 32 * self.CHUNK_SIZE:
+                                save()
+                                unsaved = 0
+                if done >= end:
+                    return
+                raise TransientError("Connection closed before the end of the range")
+            except (requests.RequestException, TransientError) as e:
+                save()
+                if attempt == self.max_retries:
+                    raise TransientError(f"Segment {start}-{end}: {e}")
+                time.sleep(2 ** attempt)
     
-    def get_update_info(self, title_id):
-        """Get update information for a PS4 title - Enhanced for multiple versions"""
-        root, game_name = self.request_update(title_id)
+    def download_unsized(self, url, part_file):
+        """Fetch a file of unknown size in one plain GET (no range, no resume), returns its SHA1"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                sha1 = hashlib.sha1()
+                with self.session.get(url, stream=True, verify=False, timeout=60) as response:
+                    if response.status_code != 200:
+                        raise TransientError(f"HTTP {response.status_code}")
+                    with open(part_file, 'wb') as f:
+                        for chunk in response.iter_content(self.CHUNK_SIZE):
+                            f.write(chunk)
+                            sha1.update(chunk)
+                return sha1.hexdigest()
+            except (requests.RequestException, TransientError) as e:
+                if attempt == self.max_retries:
+                    raise TransientError(str(e))
+                time.sleep(2 ** attempt)
+    
+    def download_file(self, url, dest_path, size, sha1=None):
+        """Download one file, returns 'downloaded', 'skipped', 'corrupt' or 'failed: ...'
         
-        if root is None:
-            return None
+        A size of 0 means unknown (empty Size_Bytes): the file is then
+        fetched in a single GET and an existing copy is kept as is.
+        """
+        dest_path = Path(dest_path)
+        if dest_path.exists() and (not size or dest_path.stat().st_size == size):
+            return 'skipped'
         
-        updates = []
-        versions_found = set()
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        part_file = dest_path.with_name(dest_path.name + '.part')
+        state_file = dest_path.with_name(dest_path.name + '.part.json')
         
-        # Parcourir TOUS les packages (versions)
-        for item in root.iter('package'):
-            ver = item.get('version')
-            man_url = item.get('manifest_url')
-            
-            if man_url and ver:
-                try:
-                    json_response = self.session.get(man_url, timeout=30)
-                    json_cont = json.loads(json_response.content)
-                    
-                    # Pour chaque version, récupérer TOUS les fichiers
-                    version_files = []
-                    for piece in json_cont.get('pieces', []):
-                        update_info = {
-                            'game_name': game_name,
-                            'version': ver,
-                            'url': piece.get('url'),
-                            'hash': piece.get('hashValue'),
-                            'size': piece.get('fileSize'),
-                            'title_id': title_id,
-                            'filename': self.get_filename_from_url(piece.get('url'))
-                        }
-                        version_files.append(update_info)
-                        updates.append(update_info)
-                    
-                    if version_files:
-                        versions_found.add(ver)
-                        print(f"      🔍 Version {ver}: {len(version_files)} files, "
-                              f"{sum(f['size'] for f in version_files if f['size'])/(1024*1024):.1f} MB")
-                
-                except Exception as e:
-                    print(f"⚠️ Error parsing manifest for {title_id} v{ver}: {e}")
-                    continue
+        if not size:
+            try:
+                digest = self.download_unsized(url, part_file)
+            except TransientError as e:
+                return f"failed: {e}"
+            return self.finish_file(part_file, state_file, dest_path, digest, sha1)
         
-        if updates:
-            print(f"    📦 Total: {len(versions_found)} versions, {len(updates)} files")
+        segments = self.load_state(state_file, url, size) if part_file.exists() else None
+        if segments is None:
+            segments = self.plan_segments(url, size)
+            with open(part_file, 'wb') as f:
+                f.truncate(size)
         
-        return updates if updates else None
-    
-    def process_single_title(self, title_data):
-        """Process a single title and return update links"""
-        title_id = title_data['Title_ID']
-        title_name = title_data['Name']
-        editions = title_data['Editions']
+        lock = threading.Lock()
+        save = lambda: self.save_state(state_file, url, size, segments, lock)
+        save()
         
+        hasher = StreamingSHA1(part_file)
         try:
-            updates = self.get_update_info(title_id)
-            
-            if updates:
-                total_size = sum(u['size'] for u in updates if u['size'])
-                
-                result = {
-                    'title_id': title_id,
-                    'title_name': title_name,
-                    'sony_game_name': updates[0]['game_name'],
-                    'editions': editions,
-                    'has_updates': True,
-                    'update_count': len(updates),
-                    'latest_version': updates[0]['version'],
-                    'total_size_bytes': total_size,
-                    'total_size_mb': total_size / (1024 * 1024),
-                    'updates': updates,
-                    'status': 'found'
-                }
-            else:
-                result = {
-                    'title_id': title_id,
-                    'title_name': title_name,
-                    'editions': editions,
-                    'has_updates': False,
-                    'update_count': 0,
-                    'status': 'no_updates'
-                }
+            # Reprise : les plages déjà téléchargées sont relues une fois pour le hash
+            for start, end, done in segments:
+                if done > start:
+                    hasher.mark_written(start, done)
             
-            return result
+            with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                futures = [executor.submit(self.download_segment, url, part_file, segment, hasher, lock, save)
+                           for segment in segments]
+                for future in futures:
+                    future.result()
             
-        except Exception as e:
-            return {
-                'title_id': title_id,
-                'title_name': title_name,
-                'editions': editions,
-                'has_updates': False,
-                'status': 'error',
-                'error': str(e)
-            }
+            digest = hasher.hexdigest()
+        except TransientError as e:
+            return f"failed: {e}"
+        finally:
+            hasher.close()
+        
+        return self.finish_file(part_file, state_file, dest_path, digest, sha1)
     
-    def batch_get_update_links(self, csv_file='ps4_titles.csv', max_workers=8, max_titles=None, chunk_size=1000):
-        """Get update links for all titles in CSV with chunked processing"""
+    def finish_file(self, part_file, state_file, dest_path, digest, sha1):
+        """Check the SHA1 and move the part file in place"""
+        if sha1 and digest != sha1.lower():
+            # Fichier corrompu : on repartira de zéro la prochaine fois
+            part_file.unlink()
+            state_file.unlink(missing_ok=True)
+            return 'corrupt'
+        
+        os.replace(part_file, dest_path)
+        state_file.unlink(missing_ok=True)
+        return 'downloaded'
+    
+    def link_file(self, source, dest_path, size):
+        """Put an already downloaded piece under another title (hard link, copy as a fallback)"""
+        if dest_path.exists():
+            if dest_path.stat().st_size == size:
+                return 'skipped'
+            dest_path.unlink()
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
         try:
-            df = pd.read_csv(csv_file)
-            if max_titles:
-                df = df.head(max_titles)
-            
-            titles = df.to_dict('records')
-            total_titles = len(titles)
-            
-            print(f"🚀 Starting update links collection for {total_titles:,} PS4 titles")
-            print(f"📁 Results will be saved to: {self.download_path}")
-            print(f"🔧 Using {max_workers} worker threads")
-            print(f"📦 Processing in chunks of {chunk_size}")
-            print("=" * 80)
-            
-        except Exception as e:
-            print(f"❌ Error loading CSV: {e}")
-            return []
+            os.link(source, dest_path)
+        except OSError:
+            # Pas de liens physiques (autre volume, FAT32...) : copie
+            shutil.copyfile(source, dest_path)
+        return 'linked'
+    
+    def download_links(self, links_csv='./ps4_titles_updates/ps4_titles_download_links.csv', title_ids=None, max_files=None,
+                       changelog_csv=None):
+        """Download every file of the links CSV (optionally only some titles)
         
-        all_results = []
-        stats = {
-            'total_titles': total_titles,
-            'processed': 0,
-            'found_updates': 0,
-            'total_size_bytes': 0,
-            'errors': 0
-        }
+        Files shared by several titles (same SHA1 and size) are downloaded
+        once and linked under the other titles. With changelog_csv, only the
+        files added or changed since the previous run are fetched.
+        """
+        rows = ColumnarCatalog().load_records(
+            links_csv, columns=['Title_ID', 'Filename', 'Download_URL', 'Size_Bytes', 'SHA1_Hash'])
+        if title_ids:
+            wanted = set(title_ids)
+            rows = [row for row in rows if row['Title_ID'] in wanted]
+        if changelog_csv:
+            with open(changelog_csv, newline='', encoding='utf-8') as f:
+                delta = {(row['Title_ID'], row['Filename']) for row in csv.DictReader(f)
+                         if row['Change'] in ('added', 'changed')}
+            rows = [row for row in rows if (row['Title_ID'], row['Filename']) in delta]
+        if max_files:
+            rows = rows[:max_files]
+        
+        # Chaque pièce unique (SHA1 + taille) n'est téléchargée qu'une fois
+        dedup = DedupIndex()
+        groups = {}
+        for row in rows:
+            row['Size_Bytes'] = int(row['Size_Bytes'] or 0)
+            dedup.add(row['Title_ID'], row['Filename'], row['Download_URL'], row['Size_Bytes'], row['SHA1_Hash'])
+            groups.setdefault(dedup.key(row['SHA1_Hash'], row['Size_Bytes'], row['Download_URL']), []).append(row)
         
+        print(f"📥 Downloading {len(groups):,} unique files ({dedup.unique_bytes / (1024**3):.2f} GB) to {self.dest_dir}")
+        if dedup.duplicate_bytes:
+            print(f"🧩 {len(rows) - len(groups):,} duplicate files ({dedup.duplicate_bytes / (1024**3):.2f} GB) will be linked instead")
+        print(f"🔧 {self.max_files} files at once, up to {self.connections_per_file} connections per file")
+        print("=" * 80)
+        
+        results = []
+        counts = {}
         start_time = time.time()
         
-        # Process in chunks to avoid memory issues
-        for chunk_start in range(0, total_titles, chunk_size):
-            chunk_end = min(chunk_start + chunk_size, total_titles)
-            chunk_titles = titles[chunk_start:chunk_end]
-            
-            print(f"\n🔄 Processing chunk {chunk_start//chunk_size + 1}/{(total_titles-1)//chunk_size + 1}")
-            print(f"   📋 Titles {chunk_start+1} to {chunk_end}")
-            
-            chunk_results = []
-            
-            # Process chunk with threading
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_title = {executor.submit(self.process_single_title, title): title for title in chunk_titles}
-                
-                for i, future in enumerate(as_completed(future_to_title), 1):
-                    title = future_to_title[future]
-                    
+        def download(group):
+            file_start = time.time()
+            first = group[0]
+            source = self.dest_dir / first['Title_ID'] / first['Filename']
+            try:
+                status = self.download_file(first['Download_URL'], source, first['Size_Bytes'], first['SHA1_Hash'])
+            except Exception as e:
+                # Une erreur inattendue ne fait échouer que ce fichier, pas tout le lot
+                status = f"failed: {type(e).__name__}: {e}"
+            statuses = [status]
+            for row in group[1:]:
+                if status in ('downloaded', 'skipped'):
                     try:
-                        result = future.result()
-                        chunk_results.append(result)
-                        all_results.append(result)
-                        
-                        stats['processed'] += 1
-                        if result['has_updates']:
-                            stats['found_updates'] += 1
-                            stats['total_size_bytes'] += result.get('total_size_bytes', 0)
-                        
-                        # Progress update
-                        overall_progress = (stats['processed'] / total_titles) * 100
-                        chunk_progress = (i / len(chunk_titles)) * 100
-                        elapsed = time.time() - start_time
-                        eta = (elapsed / stats['processed']) * (total_titles - stats['processed']) if stats['processed'] > 0 else 0
-                        
-                        status_icon = "✅" if result['has_updates'] else "❌"
-                        print(f"{status_icon} {stats['processed']:5d}/{total_titles} ({overall_progress:5.1f}%) - "
-                              f"{result['title_id']} - {result['title_name'][:30]:<30} - "
-                              f"ETA: {eta/60:.1f}m")
-                        
-                        if result['has_updates']:
-                            version_info = f"{result['version_count']} versions" if result.get('version_count', 0) > 1 else f"v{result['latest_version']}"
-                            print(f"      📦 {result['update_count']} files, {version_info}, "
-                                  f"{result['total_size_mb']:.1f} MB")
-                        
-                    except Exception as e:
-                        print(f"❌ Error processing {title['Title_ID']}: {e}")
-                        stats['errors'] += 1
-                    
-                    # Rate limiting
-                    time.sleep(random.uniform(0.3, 0.8))
-            
-            # Save chunk progress
-            self.save_progress(all_results, stats)
-            print(f"💾 Chunk completed, {len(all_results)} total results saved")
+                        statuses.append(self.link_file(source, self.dest_dir / row['Title_ID'] / row['Filename'], row['Size_Bytes']))
+                    except OSError as e:
+                        statuses.append(f"failed: {e}")
+                else:
+                    statuses.append(status)
+            return group, statuses, time.time() - file_start
         
-        # Final save
-        self.save_final_results(all_results, stats)
-        self.print_final_stats(stats, time.time() - start_time)
+        with ThreadPoolExecutor(max_workers=self.max_files) as executor:
+            futures = [executor.submit(download, group) for group in groups.values()]
+            for i, future in enumerate(as_completed(futures), 1):
+                group, statuses, duration = future.result()
+                for row, status in zip(group, statuses):
+                    key = status.split(':')[0]
+                    counts[key] = counts.get(key, 0) + 1
+                    results.append({'Title_ID': row['Title_ID'], 'Filename': row['Filename'], 'Status': status})
+                
+                row, status = group[0], statuses[0]
+                key = status.split(':')[0]
+                size_mb = row['Size_Bytes'] / (1024 * 1024)
+                icon = {'downloaded': '✅', 'skipped': '⏭️ ', 'corrupt': '💥'}.get(key, '❌')
+                speed = f", {size_mb / duration:.1f} MB/s" if key == 'downloaded' and duration > 0 else ""
+                linked_count = statuses.count('linked')
+                linked = f" + {linked_count} linked" if linked_count else ""
+                print(f"{icon} {i:5d}/{len(groups)} {row['Title_ID']} {row['Filename']} ({size_mb:.1f} MB{speed}) - {status}{linked}")
         
-        return all_results
+        print(f"\n📊 Downloads finished in {(time.time() - start_time)/60:.1f} min: "
+              + ", ".join(f"{count:,} {status}" for status, count in sorted(counts.items())))
+        return results
+
+def sha1_file(path, block_size=64 * 1024 * 1024):
+    """SHA1 of a file through a memory map (runs in the audit worker processes)"""
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, size, block_size):
+                        sha1.update(view[offset:offset + block_size])
+                finally:
+                    view.release()
+    return path, sha1.hexdigest()
+
+class LibraryAuditor:
+    """Check a local .pkg library against the SHA1s of the download links CSV
     
-    def save_progress(self, results, stats):
-        """Save current progress"""
-        if not results:
-            return
-        
-        progress_file = self.download_path / "titles_update_links_progress.json"
-        with open(progress_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'stats': stats,
-                'results_count': len(results),
-                'last_processed': results[-1]['title_id'] if results else None
-            }, f, indent=2, ensure_ascii=False)
+    Files are matched to catalog entries by filename and size, then hashed
+    in a process pool (one file per worker, memory-mapped reads) so a full
+    audit runs at disk speed rather than single-core SHA1 speed. Every
+    file ends up verified, corrupt or unknown, and every catalog entry
+    with no local copy is reported missing.
+    """
     
-    def save_final_results(self, results, stats):
-        """Save final comprehensive results"""
-        if not results:
-            print("❌ No results to save")
-            return
+    SKIP_SUFFIXES = ('.part', '.part.json', '.tmp')
+    
+    def __init__(self, links_csv='./ps4_titles_updates/ps4_titles_download_links.csv', max_workers=None):
+        self.links_csv = links_csv
+        self.max_workers = max_workers or os.cpu_count() or 4
+    
+    def load_catalog(self):
+        """Index catalog entries by filename, then by size"""
+        rows = ColumnarCatalog().load_records(
+            self.links_csv, columns=['Title_ID', 'Filename', 'Size_Bytes', 'SHA1_Hash'])
+        catalog = {}
+        for row in rows:
+            if not row['Filename']:
+                continue
+            sizes = catalog.setdefault(row['Filename'], {})
+            entry = sizes.setdefault(int(row['Size_Bytes'] or 0), {'sha1': (row['SHA1_Hash'] or '').lower(), 'title_ids': []})
+            entry['title_ids'].append(row['Title_ID'])
+        return catalog
+    
+    def scan(self, library_dir):
+        """Yield (path, filename, size, (st_dev, st_ino)) for every file under library_dir"""
+        stack = [str(library_dir)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and not entry.name.endswith(self.SKIP_SUFFIXES):
+                        stat = entry.stat()
+                        if not stat.st_ino:
+                            # Windows : scandir ne remplit pas st_ino/st_dev
+                            stat = os.stat(entry.path)
+                        yield entry.path, entry.name, stat.st_size, (stat.st_dev, stat.st_ino)
+    
+    def audit(self, library_dir, report_file=None):
+        """Audit library_dir, write the CSV report and return the status counts"""
+        catalog = self.load_catalog()
+        report_file = Path(report_file or Path(self.links_csv).parent / 'ps4_library_audit.csv')
+        counts = {'verified': 0, 'corrupt': 0, 'missing': 0, 'unknown': 0}
+        found = set()
+        to_hash = []
+        # Liens physiques (pièces partagées entre titres) : un seul hash par inode
+        links = {}
+        report_rows = []
         
-        # 1. Detailed JSON report (sample only for large datasets)
-        if len(results) > 5000:
-            sample_results = results[:1000] + results[-1000:]  # First and last 1000
-            detailed_file = self.download_path / "ps4_titles_sample_with_updates.json"
-            with open(detailed_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'stats': stats,
-                    'note': 'Sample of first and last 1000 results due to file size',
-                    'results': sample_results
-                }, f, indent=2, ensure_ascii=False)
-        else:
-            detailed_file = self.download_path / "ps4_titles_with_updates.json"
-            with open(detailed_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'stats': stats,
-                    'results': results
-                }, f, indent=2, ensure_ascii=False)
-        
-        # 2. Summary CSV
-        summary_data = []
-        for result in results:
-            summary_data.append({
-                'Title_ID': result['title_id'],
-                'Title_Name': result['title_name'],
-                'Sony_Game_Name': result.get('sony_game_name', ''),
-                'Editions': result.get('editions', ''),
-                'Has_Updates': result['has_updates'],
-                'Update_Count': result.get('update_count', 0),
-                'Latest_Version': result.get('latest_version', ''),
-                'Total_Size_MB': result.get('total_size_mb', 0),
-                'Status': result['status']
-            })
-        
-        summary_file = self.download_path / "ps4_titles_update_summary.csv"
-        pd.DataFrame(summary_data).to_csv(summary_file, index=False, encoding='utf-8')
-        
-        # 3. Update links CSV (MOST IMPORTANT!)
-        titles_with_updates = [r for r in results if r['has_updates']]
-        if titles_with_updates:
-            links_data = []
-            for result in titles_with_updates:
-                for update in result.get('updates', []):
-                    links_data.append({
-                        'Title_ID': result['title_id'],
-                        'Title_Name': result['title_name'],
-                        'Sony_Game_Name': result['sony_game_name'],
-                        'Editions': result.get('editions', ''),
-                        'Version': update['version'],
-                        'Size_MB': update['size'] / (1024 * 1024) if update['size'] else 0,
-                        'Size_Bytes': update['size'],
-                        'Filename': update['filename'],
-                        'Download_URL': update['url'],
-                        'SHA1_Hash': update['hash']
-                    })
-            
-            links_file = self.download_path / "ps4_titles_download_links.csv"
-            pd.DataFrame(links_data).to_csv(links_file, index=False, encoding='utf-8')
-        
-        # 4. Statistics CSV
-        stats_data = [{
-            'Total_Titles_Processed': stats['processed'],
-            'Titles_With_Updates': stats['found_updates'],
-            'Total_Errors': stats['errors'],
-            'Success_Rate_Percent': (stats['found_updates']/stats['processed'])*100 if stats['processed'] > 0 else 0,
-            'Total_Update_Size_GB': stats['total_size_bytes']/(1024**3),
-            'Average_Update_Size_MB': (stats['total_size_bytes']/stats['found_updates'])/(1024**2) if stats['found_updates'] > 0 else 0
-        }]
-        
-        stats_file = self.download_path / "ps4_titles_statistics.csv"
-        pd.DataFrame(stats_data).to_csv(stats_file, index=False, encoding='utf-8')
+        def report(path, filename, size, status, entry=None, actual_sha1=''):
+            counts[status] += 1
+            report_rows.append([path, filename, size, status, ','.join(entry['title_ids']) if entry else '',
+                                entry['sha1'] if entry else '', actual_sha1])
         
-        print(f"\n📊 Results saved:")
-        print(f"   📄 Detailed data: {detailed_file}")
-        print(f"   📊 Summary: {summary_file}")
-        print(f"   📈 Statistics: {stats_file}")
-        if titles_with_updates:
-            print(f"   🔗 Download links: {links_file}")
-    
-    def print_final_stats(self, stats, duration):
-        """Print final statistics"""
-        print(f"\n" + "=" * 80)
-        print(f"🎉 PS4 TITLES UPDATE LINKS COLLECTION COMPLETED!")
-        print(f"=" * 80)
-        print(f"⏱️  Duration: {duration/3600:.1f} hours")
-        print(f"🎮 Total titles processed: {stats['processed']:,}")
-        print(f"📦 Titles with updates: {stats['found_updates']:,}")
-        print(f"❌ Errors: {stats['errors']:,}")
-        if stats['processed'] > 0:
-            print(f"📈 Success rate: {(stats['found_updates']/stats['processed'])*100:.1f}%")
-        print(f"💾 Total update size: {stats['total_size_bytes']/(1024**3):.2f} GB")
+        print(f"🔍 Scanning {library_dir}...")
+        for path, filename, size, inode in self.scan(library_dir):
+            sizes = catalog.get(filename)
+            if sizes is None:
+                report(path, filename, size, 'unknown')
+            elif size not in sizes:
+                # Taille différente du catalogue : fichier tronqué ou remplacé
+                entry = None
+                if len(sizes) == 1:
+                    expected_size, entry = next(iter(sizes.items()))
+                    found.add((filename, expected_size))
+                report(path, filename, size, 'corrupt', entry)
+            else:
+                found.add((filename, size))
+                if inode in links:
+                    links[inode].append((path, filename, size, sizes[size]))
+                else:
+                    links[inode] = [(path, filename, size, sizes[size])]
+                    to_hash.append((path, filename, size, sizes[size], inode))
         
-        if stats['found_updates'] > 0:
-            avg_size = (stats['total_size_bytes'] / stats['found_updates']) / (1024**2)
-            print(f"📊 Average update size: {avg_size:.1f} MB per title")
+        total_bytes = sum(item[2] for item in to_hash)
+        linked = sum(len(paths) - 1 for paths in links.values())
+        print(f"🔐 Hashing {len(to_hash):,} files ({total_bytes / (1024**3):.2f} GB) with {self.max_workers} processes"
+              f"{f', {linked:,} extra hard links not hashed again' if linked else ''}...")
+        start_time = time.time()
+        hashed_bytes = 0
+        
+        # Les plus gros fichiers d'abord pour équilibrer les processus
+        to_hash.sort(key=lambda item: item[2], reverse=True)
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(sha1_file, item[0]): item for item in to_hash}
+            for i, future in enumerate(as_completed(futures), 1):
+                path, filename, size, entry, inode = futures[future]
+                try:
+                    _, digest = future.result()
+                except OSError as e:
+                    for path, filename, size, entry in links[inode]:
+                        report(path, filename, size, 'corrupt', entry)
+                        print(f"⚠️  Could not read {path}: {e}")
+                    continue
+                hashed_bytes += size
+                for path, filename, size, entry in links[inode]:
+                    if not entry['sha1'] or digest == entry['sha1']:
+                        report(path, filename, size, 'verified', entry, digest)
+                    else:
+                        report(path, filename, size, 'corrupt', entry, digest)
+                        print(f"💥 SHA1 mismatch: {path}")
+                
+                if i % 100 == 0:
+                    elapsed = time.time() - start_time
+                    print(f"📈 Hashed {i:,}/{len(to_hash):,} files - {hashed_bytes / (1024**2) / max(elapsed, 0.001):.0f} MB/s")
+        
+        for filename, sizes in catalog.items():
+            for size, entry in sizes.items():
+                if (filename, size) not in found:
+                    report('', filename, size, 'missing', entry)
+        
+        with open(report_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator=os.linesep)
+            writer.writerow(['Path', 'Filename', 'Size_Bytes', 'Status', 'Title_IDs', 'Expected_SHA1', 'Actual_SHA1'])
+            writer.writerows(report_rows)
+        
+        duration = time.time() - start_time
+        print(f"\n📊 Audit finished in {duration:.1f}s ({hashed_bytes / (1024**2) / max(duration, 0.001):.0f} MB/s)")
+        print(f"   ✅ Verified: {counts['verified']:,}")
+        print(f"   💥 Corrupt: {counts['corrupt']:,}")
+        print(f"   ❓ Missing: {counts['missing']:,}")
+        print(f"   👽 Unknown: {counts['unknown']:,}")
+        print(f"   📄 Report: {report_file}")
+        return counts
+
+def print_updates(title_id, updates):
+    """Print the update files found for one title"""
+    print(f"\n✅ Found {len(updates)} updates for {title_id}:")
+    print("=" * 60)
+    
+    for i, update in enumerate(updates):
+        size_mb = update['size'] / (1024 * 1024) if update['size'] else 0
+        print(f"\nUpdate {i+1}:")
+        print(f"  🎮 Game: {update['game_name']}")
+        print(f"  📦 Version: {update['version']}")
+        print(f"  📏 Size: {size_mb:.1f} MB")
+        print(f"  📁 Filename: {update['filename']}")
+        print(f"  🔗 URL: {update['url']}")
+        print(f"  🔐 Hash: {update['hash']}")
+
+def count_editions(titles):
+    """Edition counts over title records, most common first"""
+    editions_count = {}
+    for title in titles:
+        editions = (title.get('Editions') or 'Unknown').split(',')
+        for edition in editions:
+            edition = edition.strip()
+            editions_count[edition] = editions_count.get(edition, 0) + 1
+    return sorted(editions_count.items(), key=lambda x: x[1], reverse=True)
+
+def find_titles_csv(candidates=('ps4_titles.csv', 'ps4_titles_partial.csv')):
+    """First existing titles CSV, or None"""
+    for file in candidates:
+        if os.path.exists(file):
+            return file
+    return None
+
+def print_catalog_record(record):
+    """Print a title and its updates from the local catalog index"""
+    print(f"\n📚 {record['Title_ID']} - {record['Name'] or record['Sony_Game_Name']} (local catalog)")
+    if record['Sony_Game_Name'] and record['Sony_Game_Name'] != record['Name']:
+        print(f"   🎮 Sony name: {record['Sony_Game_Name']}")
+    if record['Editions']:
+        print(f"   🏷️  Editions: {record['Editions']}")
+    
+    if record['updates']:
+        print_updates(record['Title_ID'], record['updates'])
+    else:
+        print(f"❌ No updates found for {record['Title_ID']} at the last collection ({record['Status'] or 'unknown'})")
+
+def print_search_results(matches):
+    """Print catalog search results as a table"""
+    print(f"\n📋 {len(matches)} matching titles:")
+    print("-" * 90)
+    print(f"{'Title_ID':<12} {'Name':<38} {'Sony name':<30} {'Updates':>7}")
+    print("-" * 90)
+    for record in matches:
+        if record['Has_Updates'] is None or record['Status'] in ('error', 'retry'):
+            updates = '?'
+        else:
+            # Sans CSV des liens, le nombre vient du résumé
+            updates = str(len(record['updates']) or record['Update_Count'])
+        print(f"{record['Title_ID']:<12} {record['Name'][:38]:<38} {record['Sony_Game_Name'][:30]:<30} {updates:>7}")
+
+def is_title_id_query(query):
+    """True if a search looks like a CUSA ID rather than a game name"""
+    query = query.strip().upper()
+    return query.startswith('CUSA') or query.replace('-', '').isdigit()
 
 def print_banner():
     """Print application banner"""
@@ -612,43 +4358,53 @@ def print_menu():
     │ 1. 🕷️  Start full titles scraping (433 pages)              │
     │ 2. ⏭️  Resume titles scraping from last position           │
     │ 3. 📂 Load existing titles CSV data                        │
-    │ 4. 🔍 Search for PS4 updates by CUSA ID                    │
+    │ 4. 🔍 Search PS4 updates by CUSA ID or name                │
     │ 5. 🔗 Get update links for first 50 titles (test)         │
     │ 6. 📦 Get update links for ALL titles (~43k)              │
     │ 7. 📊 Show statistics from loaded data                     │
     │ 8. 🧪 Test scraping on page 1 of titles                   │
-    │ 9. 🚪 Exit                                                 │
+    │ 9. ⬇️  Download .pkg files from the links CSV              │
+    │ 10. 🔐 Audit local .pkg library against catalog SHA1s      │
+    │ 11. 🚪 Exit                                                │
     └─────────────────────────────────────────────────────────────┘
     """
     print(menu)
 
-def main():
-    """Main CLI application"""
+def interactive_menu():
+    """Interactive menu (run without arguments)"""
     print_banner()
     
     # N'initialiser le scraper que si nécessaire
     scraper = None
-    downloader = PS4UpdateDownloader()
+    downloader = PS4UpdateDownloader(cache_dir='./ps4_titles_updates/http_cache')
     titles_data = []
+    catalog_index = None
     
     try:
         while True:
             print_menu()
             
             try:
-                choice = input("Enter your choice (1-9): ").strip()
+                choice = input("Enter your choice (1-11): ").strip()
                 
-                if choice in ['1', '2', '8']:
-                    # Options qui nécessitent Selenium
-                    if not SELENIUM_AVAILABLE:
+                if choice in ['1', '2', '8'] and scraper is None:
+                    # Le mode HTTP n'a besoin de Selenium qu'en repli
+                    use_browser = input("Use browserless HTTP mode (much faster)? (Y/n): ").strip().lower() == 'n'
+                    
+                    if use_browser and not SELENIUM_AVAILABLE:
                         print("❌ Selenium not available. Please install: pip install selenium")
                         continue
                     
-                    if scraper is None:
-                        scraper = PS4TitlesScraper()
-                        if not scraper.driver:
-                            print("❌ Could not initialize Chrome driver. Please check your installation.")
-                            continue
+                    drivers = 1
+                    if use_browser:
+                        drivers_input = input("Number of Chrome drivers to run in parallel (default 1): ").strip()
+                        drivers = int(drivers_input) if drivers_input.isdigit() and int(drivers_input) > 0 else 1
+                    
+                    scraper = PS4TitlesScraper(use_browser=use_browser, drivers=drivers)
+                    if use_browser and not scraper.driver:
+                        print("❌ Could not initialize Chrome driver. Please check your installation.")
+                        scraper = None
+                        continue
                 
                 if choice == '1':
                     print("\n🚀 Starting full scrape of PS4 Titles...")
@@ -669,12 +4425,14 @@ def main():
                     
                 elif choice == '2':
                     try:
-                        df = pd.read_csv('ps4_titles_partial.csv')
+                        if not os.path.exists('ps4_titles_partial.csv'):
+                            raise FileNotFoundError('ps4_titles_partial.csv')
+                        partial_count = ColumnarCatalog().count('ps4_titles_partial.csv')
                         # Estimer la page basée sur le nombre de titres (100 par page environ)
-                        last_page = len(df) // 100 + 1
+                        last_page = partial_count // 100 + 1
                         
                         print(f"\n⏭️  Resuming from approximately page {last_page}")
-                        print(f"📊 Currently have {len(df):,} titles in partial data")
+                        print(f"📊 Currently have {partial_count:,} titles in partial data")
                         confirm = input("Continue? (y/N): ").strip().lower()
                         
                         if confirm == 'y':
@@ -696,8 +4454,7 @@ def main():
                                 break
                         
                         if csv_file:
-                            df = pd.read_csv(csv_file)
-                            titles_data = df.to_dict('records')
+                            titles_data = ColumnarCatalog().load_records(csv_file)
                             print(f"\n✅ Loaded {len(titles_data):,} titles from {csv_file}")
                             
                             # Show sample
@@ -718,32 +4475,43 @@ def main():
                         print(f"❌ Error loading CSV: {e}")
                 
                 elif choice == '4':
-                    cusa_id = input("\n🔍 Enter CUSA ID (e.g., CUSA12345): ").strip()
-                    if cusa_id:
-                        if not cusa_id.upper().startswith('CUSA'):
-                            if cusa_id.isdigit():
-                                cusa_id = f"CUSA{cusa_id.zfill(5)}"
-                            else:
-                                cusa_id = f"CUSA{cusa_id.upper()}"
+                    query = input("\n🔍 Enter CUSA ID or game name (e.g., CUSA12345, Black Flag): ").strip()
+                    if query:
+                        # Index local reconstruit seulement si un CSV source a changé
+                        if catalog_index is None or catalog_index.is_stale():
+                            catalog_index = CatalogIndex(find_titles_csv() or 'ps4_titles.csv', downloader.download_path).build()
                         
-                        print(f"\n🔍 Searching for updates for {cusa_id}...")
-                        updates = downloader.get_update_info(cusa_id)
+                        if not is_title_id_query(query):
+                            matches = catalog_index.search(query)
+                            if not matches:
+                                print(f"❌ No title matching '{query}' in the local catalog")
+                                continue
+                            print_search_results(matches)
+                            query = input("\n🔍 Title ID to show (Enter to skip): ").strip()
+                            if not query:
+                                continue
                         
-                        if updates:
-                            print(f"\n✅ Found {len(updates)} updates for {cusa_id}:")
-                            print("=" * 60)
-                            
-                            for i, update in enumerate(updates):
-                                size_mb = update['size'] / (1024 * 1024) if update['size'] else 0
-                                print(f"\nUpdate {i+1}:")
-                                print(f"  🎮 Game: {update['game_name']}")
-                                print(f"  📦 Version: {update['version']}")
-                                print(f"  📏 Size: {size_mb:.1f} MB")
-                                print(f"  📁 Filename: {update['filename']}")
-                                print(f"  🔗 URL: {update['url']}")
-                                print(f"  🔐 Hash: {update['hash']}")
+                        cusa_id = downloader.normalize_title_id(query)
+                        record = catalog_index.get(cusa_id)
+                        refresh = True
+                        if catalog_index.is_hit(record):
+                            print_catalog_record(record)
+                            refresh = input("\n🔄 Refresh live from Sony? (y/N): ").strip().lower() == 'y'
                         else:
-                            print(f"❌ No updates found for {cusa_id}")
+                            print(f"ℹ️  No update data for {cusa_id} in the local catalog, asking Sony...")
+                        
+                        if refresh:
+                            print(f"\n🔍 Searching for updates for {cusa_id}...")
+                            try:
+                                updates = downloader.get_update_info(cusa_id)
+                            except TransientError as e:
+                                print(f"⚠️  Sony servers did not answer properly ({e}), try again later")
+                                continue
+                            
+                            if updates:
+                                print_updates(cusa_id, updates)
+                            else:
+                                print(f"❌ No updates found for {cusa_id}")
                 
                 elif choice == '5':
                     print("\n🔗 Getting update links for first 50 titles (test)...")
@@ -762,8 +4530,7 @@ def main():
                         
                         # Vérifier le contenu
                         try:
-                            df = pd.read_csv(csv_file)
-                            print(f"✅ Loaded {len(df)} titles from {csv_file}")
+                            print(f"✅ Loaded {ColumnarCatalog().count(csv_file)} titles from {csv_file}")
                             
                             confirm = input("Continue with update links collection for first 50 titles? (y/N): ").strip().lower()
                             
@@ -793,8 +4560,8 @@ def main():
                         print("❌ No CSV file found. Please scrape titles first.")
                         continue
                     
-                    df = pd.read_csv(csv_file)
-                    print(f"\n📦 Getting update links for ALL {len(df):,} titles...")
+                    title_count = ColumnarCatalog().count(csv_file)
+                    print(f"\n📦 Getting update links for ALL {title_count:,} titles...")
                     print("🎯 This is the complete PS4 titles database!")
                     print("⚠️  This will take MANY hours to complete (~6-12 hours)!")
                     print("🔗 Only links will be collected, no downloads")
@@ -802,14 +4569,33 @@ def main():
                     confirm = input("Continue? (y/N): ").strip().lower()
                     
                     if confirm == 'y':
-                        results = downloader.batch_get_update_links(csv_file, max_workers=10, chunk_size=500)
+                        resume = refresh = False
+                        if downloader.store_path.exists():
+                            store = ResultStore(downloader.store_path)
+                            finished = store.is_finished()
+                            store.close()
+                            # Un lot terminé n'a rien à reprendre
+                            if not finished:
+                                resume = input("Resume the previous interrupted run? (Y/n): ").strip().lower() != 'n'
+                            if not resume and downloader.history_path.exists():
+                                refresh = input("Only re-check titles due for a refresh? (y/N): ").strip().lower() == 'y'
                         
-                        with_updates = [r for r in results if r['has_updates']]
-                        total_size_gb = sum(r.get('total_size_bytes', 0) for r in with_updates) / (1024**3)
+                        use_async = AIOHTTP_AVAILABLE and input("Use the asyncio engine (much faster)? (y/N): ").strip().lower() == 'y'
+                        batch_downloader = downloader
+                        if use_async:
+                            batch_downloader = AsyncPS4UpdateDownloader(downloader.download_path, cache_dir=downloader.cache.cache_dir)
+                        port_input = input("Serve Prometheus metrics on port (Enter to skip): ").strip()
+                        batch_downloader.metrics_port = int(port_input) if port_input.isdigit() else None
+                        batch_downloader.batch_get_update_links(csv_file, max_workers=200 if use_async else 10, chunk_size=500,
+                                                                resume=resume, return_results=False, refresh=refresh)
+                        if batch_downloader is not downloader:
+                            batch_downloader.close()
                         
-                        print(f"\n🎉 COMPLETE DATABASE COLLECTION FINISHED!")
-                        print(f"   ✅ Titles with updates: {len(with_updates):,}/{len(df):,}")
-                        print(f"   💾 Total size available: {total_size_gb:.2f} GB")
+                        stats = batch_downloader.stats
+                        if stats:
+                            print(f"\n🎉 COMPLETE DATABASE COLLECTION FINISHED!")
+                            print(f"   ✅ Titles with updates: {stats['found_updates']:,}/{title_count:,}")
+                            print(f"   💾 Total size available: {stats['total_size_bytes'] / (1024**3):.2f} GB")
                         print(f"   📁 Results saved in: {downloader.download_path}")
                 
                 elif choice == '7':
@@ -818,16 +4604,8 @@ def main():
                         print("=" * 40)
                         print(f"Total titles: {len(titles_data):,}")
                         
-                        # Analyze editions
-                        editions_count = {}
-                        for title in titles_data:
-                            editions = title.get('Editions', 'Unknown').split(',')
-                            for edition in editions:
-                                edition = edition.strip()
-                                editions_count[edition] = editions_count.get(edition, 0) + 1
-                        
                         print(f"\n📋 Top 10 Edition Types:")
-                        for edition, count in sorted(editions_count.items(), key=lambda x: x[1], reverse=True)[:10]:
+                        for edition, count in count_editions(titles_data)[:10]:
                             print(f"  {edition}: {count:,}")
                             
                     else:
@@ -835,7 +4613,10 @@ def main():
                 
                 elif choice == '8':
                     print("\n🧪 Testing titles scraping on page 1...")
-                    titles = scraper.scrape_page(1)
+                    if scraper.use_browser:
+                        titles = scraper.scrape_page(1)
+                    else:
+                        titles = scraper.scrape_pages_http([1])[1]
                     
                     if titles:
                         print(f"\n✅ Test successful! Found {len(titles)} titles on page 1")
@@ -858,11 +4639,37 @@ def main():
                         print("❌ Test failed! No titles found on page 1")
                 
                 elif choice == '9':
+                    links_file = downloader.download_path / "ps4_titles_download_links.csv"
+                    if not links_file.exists():
+                        print(f"❌ {links_file} not found. Get update links first (option 5 or 6).")
+                        continue
+                    
+                    ids_input = input("Title IDs to download, comma separated (Enter for all): ").strip()
+                    title_ids = [downloader.normalize_title_id(t) for t in ids_input.split(',') if t.strip()]
+                    files_input = input("Files to download in parallel (default 4): ").strip()
+                    max_files = int(files_input) if files_input.isdigit() and int(files_input) > 0 else 4
+                    
+                    pkg_downloader = PackageDownloader('./ps4_pkgs/', max_files=max_files)
+                    pkg_downloader.download_links(links_file, title_ids=title_ids or None)
+                
+                elif choice == '10':
+                    links_file = downloader.download_path / "ps4_titles_download_links.csv"
+                    if not links_file.exists():
+                        print(f"❌ {links_file} not found. Get update links first (option 5 or 6).")
+                        continue
+                    
+                    library_dir = input("Library directory to audit (default ./ps4_pkgs/): ").strip() or './ps4_pkgs/'
+                    if not os.path.isdir(library_dir):
+                        print(f"❌ {library_dir} is not a directory")
+                        continue
+                    LibraryAuditor(links_file).audit(library_dir)
+                
+                elif choice == '11':
                     print("\n👋 Exiting...")
                     break
                 
                 else:
-                    print("❌ Invalid choice. Please enter 1-9.")
+                    print("❌ Invalid choice. Please enter 1-11.")
             
             except KeyboardInterrupt:
                 print("\n\n⚠️  Operation cancelled by user")
@@ -878,5 +4685,392 @@ def main():
         if scraper:
             scraper.close_driver()
 
+# Codes de sortie de la CLI non interactive
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_NO_DATA = 3       # rien trouvé, ou fichier d'entrée manquant
+EXIT_PARTIAL = 4       # terminé avec des titres en échec / Sony indisponible
+EXIT_INTERRUPTED = 130
+
+def cmd_scrape(args):
+    """scrape: full titles scrape from SerialStation"""
+    scraper = PS4TitlesScraper(use_browser=args.browser, drivers=args.drivers)
+    if args.browser and not scraper.driver:
+        print("❌ Could not initialize Chrome driver. Please check your installation.")
+        return EXIT_ERROR, {'error': 'Chrome driver unavailable'}
+    
+    start_time = time.time()
+    try:
+        scraper.scrape_all_titles(max_pages=args.pages, start_page=args.start_page)
+        count = scraper.save_to_csv(args.output_csv)
+    finally:
+        scraper.close_driver()
+    
+    print(f"\n✅ Titles scraping complete in {(time.time() - start_time)/3600:.1f} hours: {count:,} titles")
+    return (EXIT_OK if count else EXIT_NO_DATA), {'titles': count, 'output': args.output_csv,
+                                                   'seconds': round(time.time() - start_time, 1)}
+
+def cmd_resume(args):
+    """resume: continue an interrupted titles scrape from ps4_titles_partial.csv"""
+    if not os.path.exists('ps4_titles_partial.csv'):
+        print("❌ No partial data found. Use the scrape command to start fresh.")
+        return EXIT_NO_DATA, {'error': 'ps4_titles_partial.csv not found'}
+    
+    partial_count = ColumnarCatalog().count('ps4_titles_partial.csv')
+    # Estimer la page basée sur le nombre de titres (100 par page environ)
+    args.start_page = partial_count // 100 + 1
+    print(f"⏭️  Resuming from approximately page {args.start_page} ({partial_count:,} titles in partial data)")
+    return cmd_scrape(args)
+
+def cmd_lookup(args):
+    """lookup: update check of CUSA IDs, local catalog first then Sony"""
+    downloader = PS4UpdateDownloader(args.output_dir, cache_dir=args.cache_dir)
+    downloader.verbose = args.output == 'text'
+    # Pas de build() : quelques lignes lues dans les CSV suffisent pour un ID
+    index = None if args.refresh else CatalogIndex(find_titles_csv() or 'ps4_titles.csv', args.output_dir)
+    
+    results = {}
+    transient = False
+    for title_id in args.title_ids:
+        title_id = downloader.normalize_title_id(title_id)
+        record = index.lookup(title_id) if index is not None else None
+        if index is not None and index.is_hit(record):
+            print_catalog_record(record)
+            results[title_id] = {'status': 'ok' if record['updates'] else 'no_updates', 'source': 'catalog',
+                                 'updates': record['updates']}
+            continue
+        
+        try:
+            updates = downloader.get_update_info(title_id)
+        except TransientError as e:
+            print(f"⚠️  {title_id}: Sony servers did not answer properly ({e}), try again later")
+            results[title_id] = {'status': 'retry', 'source': 'sony', 'error': str(e), 'updates': []}
+            transient = True
+            continue
+        
+        if updates:
+            print_updates(title_id, updates)
+        else:
+            print(f"❌ No updates found for {title_id}")
+        results[title_id] = {'status': 'ok' if updates else 'no_updates', 'source': 'sony', 'updates': updates or []}
+    downloader.close()
+    
+    if transient:
+        code = EXIT_PARTIAL
+    elif any(result['updates'] for result in results.values()):
+        code = EXIT_OK
+    else:
+        code = EXIT_NO_DATA
+    return code, {'titles': results}
+
+def cmd_search(args):
+    """search: find titles by name in the local catalog"""
+    index = CatalogIndex(args.csv or find_titles_csv() or 'ps4_titles.csv', args.output_dir).build()
+    if not len(index):
+        print("❌ No local catalog found. Run the scrape or batch command first.")
+        return EXIT_NO_DATA, {'error': 'no local catalog'}
+    
+    query = ' '.join(args.query)
+    matches = index.search(query, args.limit)
+    if not matches:
+        print(f"❌ No title matching '{query}' in the local catalog")
+        return EXIT_NO_DATA, {'query': query, 'matches': []}
+    
+    print_search_results(matches)
+    return EXIT_OK, {'query': query, 'matches': [
+        {key: value for key, value in record.items() if key != 'updates'} for record in matches]}
+
+def cmd_batch(args):
+    """batch: collect update links for every title of a titles CSV"""
+    csv_file = args.csv or find_titles_csv()
+    if not csv_file or not os.path.exists(csv_file):
+        print("❌ No titles CSV found. Run the scrape command first or pass --csv.")
+        return EXIT_NO_DATA, {'error': 'titles CSV not found'}
+    
+    if args.use_async:
+        if not AIOHTTP_AVAILABLE:
+            print("❌ aiohttp not available. Please install: pip install aiohttp")
+            return EXIT_ERROR, {'error': 'aiohttp not installed'}
+        downloader = AsyncPS4UpdateDownloader(args.output_dir, cache_dir=args.cache_dir)
+    else:
+        downloader = PS4UpdateDownloader(args.output_dir, cache_dir=args.cache_dir)
+    downloader.verbose = args.output == 'text'
+    downloader.metrics_port = args.metrics_port
+    downloader.trace_path = args.trace
+    if args.max_rate:
+        downloader.limiter.max_rate = args.max_rate
+    
+    workers = args.workers or (200 if args.use_async else 10)
+    downloader.batch_get_update_links(csv_file, max_workers=workers, max_titles=args.max_titles,
+                                      chunk_size=args.chunk_size, resume=args.resume, return_results=False,
+                                      refresh=args.refresh, budget=args.budget)
+    downloader.close()
+    
+    stats = downloader.stats
+    if not stats:
+        return EXIT_ERROR, {'error': f'could not process {csv_file}'}
+    code = EXIT_PARTIAL if stats['errors'] else EXIT_OK
+    return code, dict(stats, csv_file=csv_file, output_dir=str(downloader.download_path))
+
+def cmd_shard(args):
+    """shard: batch split over processes or machines sharing the output directory"""
+    batch = ShardedBatch(args.output_dir, cache_dir=args.cache_dir, lease_seconds=args.lease)
+    needs_csv = args.action == 'init' or (args.action == 'run' and not (args.resume and batch.queue_path.exists()))
+    csv_file = None
+    if needs_csv:
+        csv_file = args.csv or find_titles_csv()
+        if not csv_file or not os.path.exists(csv_file):
+            print("❌ No titles CSV found. Run the scrape command first or pass --csv.")
+            return EXIT_NO_DATA, {'error': 'titles CSV not found'}
+    elif not batch.queue_path.exists():
+        print(f"❌ No work queue in {args.output_dir}. Run 'shard init' or 'shard run' first.")
+        return EXIT_NO_DATA, {'error': 'work queue not found'}
+    
+    if args.action == 'init':
+        shards = batch.init(csv_file, args.shard_size, args.max_titles)
+        return EXIT_OK, {'shards': shards, 'queue_file': str(batch.queue_path)}
+    
+    if args.action == 'status':
+        queue = WorkQueue(batch.queue_path)
+        counts = queue.counts()
+        shards = queue.shards()
+        queue.close()
+        print(f"🧩 {len(shards):,} shards: " + ", ".join(f"{count:,} {state}" for state, count in counts.items()))
+        for shard in shards:
+            if shard['status'] == 'leased':
+                remaining = shard['lease_expires'] - time.time()
+                lease = f"lease {remaining:.0f}s left" if remaining > 0 else "lease expired"
+                print(f"  shard {shard['shard_id']:5d} {shard['first_title_id']}-{shard['last_title_id']} "
+                      f"{shard['worker']} ({lease}, attempt {shard['attempts']})")
+        return EXIT_OK, {'shards': counts}
+    
+    if args.action == 'work':
+        completed = batch.work(args.worker, args.workers, args.use_async)
+        return EXIT_OK, {'completed_shards': completed}
+    
+    if args.action == 'merge':
+        merged, missing, stats = batch.merge()
+    else:
+        merged, missing, stats = batch.run(csv_file, args.processes, args.shard_size, args.workers,
+                                           args.use_async, args.max_titles, args.resume)
+    code = EXIT_PARTIAL if missing or stats['errors'] else EXIT_OK
+    return code, {'merged_shards': merged, 'missing_shards': missing, 'stats': stats}
+
+def cmd_stats(args):
+    """stats: titles catalog and last update collection statistics"""
+    csv_file = args.csv or find_titles_csv()
+    if not csv_file or not os.path.exists(csv_file):
+        print("❌ No titles CSV found. Run the scrape command first or pass --csv.")
+        return EXIT_NO_DATA, {'error': 'titles CSV not found'}
+    
+    titles = ColumnarCatalog().load_records(csv_file, columns=['Editions'])
+    editions = count_editions(titles)
+    print(f"📊 Titles Statistics ({csv_file}):")
+    print("=" * 40)
+    print(f"Total titles: {len(titles):,}")
+    print(f"\n📋 Top 10 Edition Types:")
+    for edition, count in editions[:10]:
+        print(f"  {edition}: {count:,}")
+    payload = {'csv_file': csv_file, 'titles': len(titles), 'editions': dict(editions)}
+    
+    stats_file = Path(args.output_dir) / "ps4_titles_statistics.csv"
+    if stats_file.exists():
+        with open(stats_file, newline='', encoding='utf-8') as f:
+            update_stats = next(csv.DictReader(f), None)
+        if update_stats:
+            print(f"\n📦 Last update links collection ({stats_file}):")
+            for key, value in update_stats.items():
+                print(f"  {key}: {value}")
+            payload['updates'] = update_stats
+    
+    return EXIT_OK, payload
+
+def cmd_games(args):
+    """games: group the collected titles into logical games"""
+    summary_csv = Path(args.output_dir) / "ps4_titles_update_summary.csv"
+    if not summary_csv.exists():
+        print(f"❌ {summary_csv} not found. Run the batch command first.")
+        return EXIT_NO_DATA, {'error': 'update summary CSV not found'}
+    
+    grouper = GameGrouper(args.threshold)
+    start_time = time.time()
+    rows = grouper.group_file(summary_csv)
+    elapsed = time.time() - start_time
+    
+    games = {}
+    for row in rows:
+        games.setdefault(row['Game_ID'], row)
+    shared = sorted(games.values(), key=lambda row: -row['Title_Count'])
+    
+    print(f"🎮 {grouper.stats['titles']:,} titles grouped into {grouper.stats['games']:,} games in {elapsed:.1f}s")
+    print(f"   {grouper.stats['fuzzy_merges']:,} fuzzy merges out of {grouper.stats['candidates']:,} candidate pairs")
+    print(f"\n📋 Games with the most CUSA IDs:")
+    for row in shared[:10]:
+        print(f"  {row['Game_ID']}  {row['Title_Count']:>3}  {row['Game_Name']}")
+    print(f"💾 Groups saved to {summary_csv.with_name('ps4_titles_game_groups.csv')}")
+    
+    return EXIT_OK, dict(grouper.stats, seconds=round(elapsed, 2), groups_file=str(summary_csv.with_name('ps4_titles_game_groups.csv')))
+
+def cmd_diff(args):
+    """diff: changes between two update links snapshots"""
+    output_dir = Path(args.output_dir)
+    old_snapshot = Path(args.old or output_dir / "ps4_titles_previous_download_links.csv")
+    new_snapshot = Path(args.new or output_dir / "ps4_titles_download_links.csv")
+    for snapshot in (old_snapshot, new_snapshot):
+        if not snapshot.exists():
+            print(f"❌ {snapshot} not found. The previous snapshot is kept after a second batch run.")
+            return EXIT_NO_DATA, {'error': f'{snapshot} not found'}
+    
+    changelog_csv = Path(args.changelog or output_dir / "ps4_titles_changelog.csv")
+    diff = SnapshotDiff()
+    start_time = time.time()
+    changes = diff.compare(old_snapshot, new_snapshot)
+    diff.write(changelog_csv)
+    
+    print(f"📰 {old_snapshot} -> {new_snapshot} in {time.time() - start_time:.1f}s")
+    print(f"   {diff.summary()}")
+    for row in changes[:args.limit]:
+        version = f"{row['Old_Version']} -> {row['Version']}" if row['Old_Version'] and row['Version'] else row['Version'] or row['Old_Version']
+        print(f"  {row['Change']:<12} {row['Title_ID']}  v{version}  {row['Filename']}  {row['Title_Name']}")
+    if len(changes) > args.limit:
+        print(f"  ... {len(changes) - args.limit:,} more")
+    print(f"💾 Changelog saved to {changelog_csv}")
+    
+    return EXIT_OK, {'counts': diff.counts, 'changed_titles': diff.changed_title_ids(), 'changelog_file': str(changelog_csv)}
+
+def output_options(default):
+    """--quiet/--json, accepted before or after the command"""
+    options = argparse.ArgumentParser(add_help=False)
+    modes = options.add_mutually_exclusive_group()
+    modes.add_argument('--quiet', '-q', dest='output', action='store_const', const='quiet', default=default,
+                       help="no per-title progress lines")
+    modes.add_argument('--json', dest='output', action='store_const', const='json', default=default,
+                       help="print one JSON result on stdout, logs go to stderr")
+    return options
+
+def build_parser():
+    """argparse parser for the non-interactive CLI"""
+    # Les sous-commandes ne doivent pas écraser un --json donné avant elles
+    output = output_options(argparse.SUPPRESS)
+    
+    parser = argparse.ArgumentParser(
+        prog='ps4_scraper.py', parents=[output_options('text')],
+        description="PS4 titles scraper and update links collector. Without arguments, starts the interactive menu.",
+        epilog="Exit codes: 0 ok, 1 error, 2 usage, 3 nothing found / missing input, 4 partial (failed titles, Sony unavailable), 130 interrupted")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    
+    scrape_options = argparse.ArgumentParser(add_help=False)
+    scrape_options.add_argument('--pages', type=int, default=433, help="number of titles pages (default 433)")
+    scrape_options.add_argument('--browser', action='store_true', help="use Selenium instead of the HTTP mode")
+    scrape_options.add_argument('--drivers', type=int, default=1, help="Chrome drivers in parallel with --browser")
+    scrape_options.add_argument('--output-csv', dest='output_csv', default='ps4_titles.csv', help="titles CSV to write")
+    
+    sony_options = argparse.ArgumentParser(add_help=False)
+    sony_options.add_argument('--output-dir', default='./ps4_titles_updates/', help="results directory")
+    sony_options.add_argument('--cache-dir', default='./ps4_titles_updates/http_cache', help="HTTP cache directory")
+    sony_options.add_argument('--no-cache', dest='cache_dir', action='store_const', const=None, help="disable the HTTP cache")
+    
+    scrape = commands.add_parser('scrape', parents=[output, scrape_options], help="scrape the titles list")
+    scrape.add_argument('--start-page', type=int, default=1, help="first page (default 1)")
+    scrape.set_defaults(func=cmd_scrape)
+    
+    resume = commands.add_parser('resume', parents=[output, scrape_options], help="resume an interrupted titles scrape")
+    resume.set_defaults(func=cmd_resume)
+    
+    lookup = commands.add_parser('lookup', parents=[output, sony_options], help="check updates of CUSA IDs")
+    lookup.add_argument('title_ids', nargs='+', metavar='CUSA_ID')
+    lookup.add_argument('--refresh', action='store_true', help="ask Sony even if the local catalog knows the title")
+    lookup.set_defaults(func=cmd_lookup)
+    
+    search = commands.add_parser('search', parents=[output], help="find titles by name in the local catalog")
+    search.add_argument('query', nargs='+')
+    search.add_argument('--limit', type=int, default=20, help="maximum results (default 20)")
+    search.add_argument('--csv', help="titles CSV (default ps4_titles.csv or ps4_titles_partial.csv)")
+    search.add_argument('--output-dir', default='./ps4_titles_updates/', help="results directory")
+    search.set_defaults(func=cmd_search)
+    
+    batch = commands.add_parser('batch', parents=[output, sony_options], help="collect update links for a titles CSV")
+    batch.add_argument('--csv', help="titles CSV (default ps4_titles.csv or ps4_titles_partial.csv)")
+    batch.add_argument('--workers', type=int, help="worker threads, or titles in flight with --async")
+    batch.add_argument('--max-titles', type=int, help="only the first N titles")
+    batch.add_argument('--chunk-size', type=int, default=500, help="titles per chunk (default 500)")
+    batch.add_argument('--resume', action='store_true', help="skip titles already in the result store")
+    batch.add_argument('--refresh', action='store_true',
+                       help="only re-check titles due per the refresh history, keep the stored results of the others")
+    batch.add_argument('--budget', type=int, help="with --refresh, check at most N titles, new ones included (most likely to have changed first)")
+    batch.add_argument('--async', dest='use_async', action='store_true', help="use the asyncio engine (aiohttp)")
+    batch.add_argument('--max-rate', type=float, help="requests/s per host the adaptive limiter never exceeds (default 1000)")
+    batch.add_argument('--metrics-port', type=int, help="serve Prometheus metrics on this port")
+    batch.add_argument('--trace', help="write a Chrome trace-event JSON timeline to this file")
+    batch.set_defaults(func=cmd_batch)
+    
+    shard = commands.add_parser('shard', parents=[output, sony_options], help="batch split over several processes or machines")
+    shard.add_argument('action', choices=['run', 'init', 'work', 'merge', 'status'],
+                       help="run = init + local worker processes + merge; work joins an existing queue (e.g. from another machine)")
+    shard.add_argument('--csv', help="titles CSV (default ps4_titles.csv or ps4_titles_partial.csv)")
+    shard.add_argument('--processes', type=int, default=4, help="local worker processes for run (default 4)")
+    shard.add_argument('--shard-size', type=int, default=1000, help="titles per shard (default 1000)")
+    shard.add_argument('--workers', type=int, default=8, help="threads per process, or titles in flight with --async (default 8)")
+    shard.add_argument('--async', dest='use_async', action='store_true', help="use the asyncio engine (aiohttp)")
+    shard.add_argument('--max-titles', type=int, help="only the first N titles")
+    shard.add_argument('--resume', action='store_true', help="run: finish an existing queue instead of starting over")
+    shard.add_argument('--lease', type=float, default=300, help="shard lease in seconds, renewed while working (default 300)")
+    shard.add_argument('--worker', help="worker name for work (default host:pid)")
+    shard.set_defaults(func=cmd_shard)
+    
+    stats = commands.add_parser('stats', parents=[output], help="show catalog and collection statistics")
+    stats.add_argument('--csv', help="titles CSV (default ps4_titles.csv or ps4_titles_partial.csv)")
+    stats.add_argument('--output-dir', default='./ps4_titles_updates/', help="results directory")
+    stats.set_defaults(func=cmd_stats)
+    
+    diff = commands.add_parser('diff', parents=[output], help="compare two update links snapshots")
+    diff.add_argument('old', nargs='?', help="old links CSV or result store .sqlite (default: the previous run)")
+    diff.add_argument('new', nargs='?', help="new links CSV or result store .sqlite (default: the last run)")
+    diff.add_argument('--changelog', help="changelog CSV to write (default ps4_titles_changelog.csv)")
+    diff.add_argument('--limit', type=int, default=20, help="changes to print (default 20)")
+    diff.add_argument('--output-dir', default='./ps4_titles_updates/', help="results directory")
+    diff.set_defaults(func=cmd_diff)
+    
+    games = commands.add_parser('games', parents=[output], help="group titles into logical games across regions")
+    games.add_argument('--threshold', type=float, default=0.8, help="trigram similarity to merge two names (default 0.8)")
+    games.add_argument('--output-dir', default='./ps4_titles_updates/', help="results directory")
+    games.set_defaults(func=cmd_games)
+    
+    return parser
+
+def main(argv=None):
+    """Command line entry point, returns the exit code"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        interactive_menu()
+        return EXIT_OK
+    
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return EXIT_USAGE
+    if getattr(args, 'budget', None) is not None and not args.refresh:
+        parser.error("batch: --budget requires --refresh")
+    
+    # En mode JSON, stdout ne reçoit que le résultat final
+    log_stream = sys.stderr if args.output == 'json' else sys.stdout
+    try:
+        with contextlib.redirect_stdout(log_stream):
+            code, payload = args.func(args)
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        if args.output == 'json':
+            print(json.dumps({'command': args.command, 'exit_code': EXIT_ERROR, 'error': str(e)}))
+        return EXIT_ERROR
+    
+    if args.output == 'json':
+        print(json.dumps(dict(payload, command=args.command, exit_code=code), ensure_ascii=False, default=record_json))
+    return code
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""AdaptiveHostLimiter: open start, backoff on sustained errors only"""
+
+import asyncio
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+HOST = 'gs-sec.ww.np.dl.playstation.net'
+
+class AdaptiveHostLimiterTest(unittest.TestCase):
+
+    def run_requests(self, limiter, statuses):
+        for status in statuses:
+            limiter.acquire(HOST)
+            limiter.release(HOST, status)
+        return limiter.hosts[HOST]
+
+    def test_hosts_start_at_the_cap(self):
+        limiter = ps4_scraper.AdaptiveHostLimiter(max_rate=300, max_concurrency=16)
+        state = self.run_requests(limiter, [200])
+
+        self.assertEqual(state['rate'], 300)
+        self.assertEqual(state['limit'], 16)
+
+    def test_isolated_errors_do_not_back_off(self):
+        limiter = ps4_scraper.AdaptiveHostLimiter()
+        statuses = ([200] * 9 + [503]) * 10
+        state = self.run_requests(limiter, statuses)
+
+        self.assertEqual(state['throttled'], 0)
+        self.assertEqual(state['rate'], limiter.max_rate)
+
+    def test_sustained_errors_back_off(self):
+        limiter = ps4_scraper.AdaptiveHostLimiter(max_concurrency=8)
+        state = self.run_requests(limiter, [200] * 10 + [503, None, 502])
+
+        self.assertEqual(state['throttled'], 1)
+        self.assertLess(state['rate'], limiter.max_rate)
+        self.assertEqual(state['limit'], 1.0)
+
+    def test_429_backs_off_at_once(self):
+        limiter = ps4_scraper.AdaptiveHostLimiter()
+        state = self.run_requests(limiter, [200, 429])
+
+        self.assertEqual(state['throttled'], 1)
+
+    def test_concurrency_limit_wakes_waiters(self):
+        limiter = ps4_scraper.AdaptiveHostLimiter(max_concurrency=2)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def request():
+            limiter.acquire(HOST)
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            threading.Event().wait(0.01)
+            with lock:
+                in_flight.pop()
+            limiter.release(HOST, 200)
+
+        threads = [threading.Thread(target=request) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(limiter.hosts[HOST]['requests'], 10)
+        self.assertLessEqual(max(peak), 2)
+
+    def test_async_waiters(self):
+        limiter = ps4_scraper.AdaptiveHostLimiter(max_concurrency=3)
+        peak = []
+
+        async def request():
+            await limiter.acquire_async(HOST)
+            peak.append(limiter.hosts[HOST]['in_flight'])
+            await asyncio.sleep(0.01)
+            limiter.release(HOST, 200)
+
+        async def main():
+            await asyncio.wait_for(asyncio.gather(*(request() for _ in range(20))), 5)
+
+        asyncio.run(main())
+        self.assertEqual(limiter.hosts[HOST]['requests'], 20)
+        self.assertLessEqual(max(peak), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""CatalogIndex: one-shot lookup from the CSVs, full index and search"""
+
+import csv
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+SUMMARY_COLUMNS = ps4_scraper.ResultsWriter.SUMMARY_COLUMNS
+LINKS_COLUMNS = ps4_scraper.ResultsWriter.LINKS_COLUMNS
+
+class CatalogIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        root = Path(self.work_dir.name)
+        self.titles_csv = root / 'ps4_titles.csv'
+        self.download_path = root / 'updates'
+        self.download_path.mkdir()
+
+        self.write(self.titles_csv, ['Title_ID', 'Name', 'Editions'], [
+            ['CUSA00001', 'Gravity Rush™ 2', 'Original'],
+            # Nom sur deux lignes, la seconde commence comme un autre enregistrement
+            ['CUSA00002', 'Line one\nCUSA00003,fake,row', 'Digital, Deluxe'],
+            ['CUSA00003', 'The Last Guardian', 'Original'],
+            ['CUSA00004', 'Failed Title', 'Original'],
+        ])
+        self.write(self.download_path / 'ps4_titles_update_summary.csv', SUMMARY_COLUMNS, [
+            ['CUSA00001', 'Gravity Rush™ 2', 'GRAVITY RUSH 2', 'Original', True, 2, '01.02', 3.0, 'found'],
+            ['CUSA00002', 'Line one\nCUSA00003,fake,row', '', 'Digital, Deluxe', False, 0, '', 0.0, 'no_updates'],
+            ['CUSA00004', 'Failed Title', '', 'Original', False, 0, '', 0.0, 'error'],
+        ])
+        links = []
+        for version in ('01.01', '01.02'):
+            links.append(['CUSA00001', 'Gravity Rush™ 2', 'GRAVITY RUSH 2', 'Original', version,
+                          1.5, 1572864, f'UP_{version}.pkg', f'http://example.com/UP_{version}.pkg', 'ab' * 20])
+        self.write(self.download_path / 'ps4_titles_download_links.csv', LINKS_COLUMNS, links)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def write(self, path, header, rows):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    def index(self):
+        return ps4_scraper.CatalogIndex(self.titles_csv, self.download_path)
+
+    def test_lookup_keeps_multiline_fields(self):
+        record = self.index().lookup('CUSA00002')
+
+        self.assertEqual(record['Name'], 'Line one\nCUSA00003,fake,row')
+        self.assertEqual(record['Editions'], 'Digital, Deluxe')
+        self.assertEqual(record['Status'], 'no_updates')
+
+        record = self.index().lookup('CUSA00003')
+        self.assertEqual(record['Name'], 'The Last Guardian')
+        self.assertIsNone(record['Has_Updates'])
+
+    def test_lookup_matches_build(self):
+        built = self.index().build()
+        index = self.index()
+        for title_id in ('CUSA00001', 'CUSA00002', 'CUSA00003', 'CUSA00004'):
+            self.assertEqual(index.lookup(title_id), built.get(title_id))
+        self.assertIsNone(index.lookup('CUSA09999'))
+
+    def test_hits_and_misses(self):
+        index = self.index()
+
+        record = index.lookup('CUSA00001')
+        self.assertTrue(index.is_hit(record))
+        self.assertEqual([update['version'] for update in record['updates']], ['01.01', '01.02'])
+        self.assertTrue(index.is_hit(index.lookup('CUSA00002')))
+        self.assertFalse(index.is_hit(index.lookup('CUSA00003')))
+        self.assertFalse(index.is_hit(index.lookup('CUSA00004')))
+
+    def test_search(self):
+        index = self.index().build()
+
+        self.assertEqual([r['Title_ID'] for r in index.search('gravity')], ['CUSA00001'])
+        self.assertEqual([r['Title_ID'] for r in index.search('LAST guard')], ['CUSA00003'])
+        self.assertEqual(index.search('   '), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""ColumnarCatalog: Parquet sidecars of the CSVs and their fallbacks"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+TITLES = 'Title_ID,Name,Editions\nCUSA00001,Game 1,Original\nCUSA00002,Game 2,"Digital, Deluxe"\n'
+
+@unittest.skipUnless(ps4_scraper.ARROW_AVAILABLE, "pyarrow not installed")
+class ColumnarCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.csv_file = Path(self.work_dir.name) / 'ps4_titles.csv'
+        self.csv_file.write_text(TITLES, encoding='utf-8')
+        self.catalog = ps4_scraper.ColumnarCatalog()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_sidecar_written_and_used(self):
+        records = self.catalog.load_records(self.csv_file, columns=['Title_ID', 'Editions'])
+
+        self.assertEqual(records[1], {'Title_ID': 'CUSA00002', 'Editions': 'Digital, Deluxe'})
+        self.assertTrue(self.catalog.is_fresh(self.csv_file))
+        self.assertEqual(self.catalog.count(self.csv_file), 2)
+
+    def test_newer_csv_replaces_the_sidecar(self):
+        self.catalog.load_records(self.csv_file)
+        self.csv_file.write_text(TITLES + 'CUSA00003,Game 3,Original\n', encoding='utf-8')
+        parquet_file = self.catalog.parquet_path(self.csv_file)
+        os.utime(parquet_file, (1, 1))
+
+        self.assertEqual(len(self.catalog.load_records(self.csv_file)), 3)
+
+    def test_missing_csv_with_a_sidecar(self):
+        self.catalog.load_records(self.csv_file)
+        self.csv_file.unlink()
+
+        self.assertFalse(self.catalog.is_fresh(self.csv_file))
+        with self.assertRaises(FileNotFoundError):
+            self.catalog.load_records(self.csv_file)
+
+    def test_sidecar_cannot_be_written(self):
+        # Comme un dossier en lecture seule : l'écriture du .parquet échoue
+        class Unwritable(ps4_scraper.ColumnarCatalog):
+            def parquet_path(self, csv_file):
+                return Path(csv_file).parent / 'missing' / 'ps4_titles.parquet'
+
+        catalog = Unwritable()
+        records = catalog.load_records(self.csv_file, columns=['Title_ID'])
+
+        self.assertEqual(records, [{'Title_ID': 'CUSA00001'}, {'Title_ID': 'CUSA00002'}])
+        self.assertEqual(catalog.count(self.csv_file), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""DedupIndex: content-addressed update pieces shared across titles"""
+
+import io
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+SHA1 = 'AB' * 20
+
+class DedupIndexTest(unittest.TestCase):
+
+    def test_same_piece_under_several_titles(self):
+        dedup = ps4_scraper.DedupIndex()
+
+        self.assertTrue(dedup.add('CUSA00001', 'a.pkg', 'http://x/a.pkg', 100, SHA1))
+        self.assertFalse(dedup.add('CUSA00002', 'a.pkg', 'http://y/a.pkg', 100, SHA1.lower()))
+        self.assertFalse(dedup.add('CUSA00002', 'a.pkg', 'http://y/a.pkg', 100, SHA1))
+
+        self.assertEqual(len(dedup.pieces), 1)
+        self.assertEqual(dedup.references, 3)
+        self.assertEqual((dedup.total_bytes, dedup.unique_bytes, dedup.duplicate_bytes), (300, 100, 200))
+        self.assertEqual(dedup.pieces[(SHA1.lower(), 100)]['title_ids'], ['CUSA00001', 'CUSA00002'])
+
+    def test_size_is_part_of_the_key(self):
+        dedup = ps4_scraper.DedupIndex()
+        dedup.add('CUSA00001', 'a.pkg', 'http://x/a.pkg', 100, SHA1)
+
+        self.assertTrue(dedup.add('CUSA00002', 'a.pkg', 'http://x/a.pkg', 101, SHA1))
+
+    def test_pieces_without_hash_are_keyed_by_url(self):
+        dedup = ps4_scraper.DedupIndex()
+
+        self.assertTrue(dedup.add('CUSA00001', 'a.pkg', 'http://x/a.pkg', 100, ''))
+        self.assertFalse(dedup.add('CUSA00002', 'a.pkg', 'http://x/a.pkg', 100, None))
+        self.assertTrue(dedup.add('CUSA00003', 'b.pkg', 'http://x/b.pkg', 100, ''))
+
+    def test_add_result(self):
+        dedup = ps4_scraper.DedupIndex()
+        piece = ps4_scraper.UpdatePiece(game_name='Game', version='01.01', url='http://x/a.pkg', hash=SHA1,
+                                        size=100, title_id='CUSA00001', filename='a.pkg')
+        dedup.add_result({'title_id': 'CUSA00001', 'updates': [piece]})
+        dedup.add_result({'title_id': 'CUSA00002', 'updates': [piece]})
+
+        self.assertEqual(dedup.unique_bytes, 100)
+        self.assertEqual(dedup.duplicate_bytes, 100)
+
+    def test_plan(self):
+        dedup = ps4_scraper.DedupIndex()
+        dedup.add('CUSA00001', 'a.pkg', 'http://x/a.pkg', 100, SHA1)
+        dedup.add('CUSA00002', 'a.pkg', 'http://y/a.pkg', 100, SHA1)
+        dedup.add('CUSA00003', 'b.pkg', 'http://x/b.pkg', 50, '')
+        f = io.StringIO()
+        dedup.write_plan(f)
+
+        lines = f.getvalue().splitlines()
+        self.assertEqual(lines[0], ','.join(dedup.PLAN_COLUMNS))
+        self.assertEqual(lines[1], f'{SHA1.lower()},100,a.pkg,http://x/a.pkg,2,"CUSA00001,CUSA00002"')
+        self.assertEqual(lines[2], ',50,b.pkg,http://x/b.pkg,1,CUSA00003')
+
+if __name__ == '__main__':
+    unittest.main()
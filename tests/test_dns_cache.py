@@ -0,0 +1,53 @@
+"""DNSCache: counted install/uninstall of the socket.getaddrinfo patch"""
+
+import socket
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+class DNSCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.system = socket.getaddrinfo
+
+    def tearDown(self):
+        socket.getaddrinfo = self.system
+
+    def test_install_is_counted(self):
+        cache = ps4_scraper.DNSCache()
+        cache.install()
+        cache.install()
+        self.assertEqual(socket.getaddrinfo, cache.getaddrinfo)
+
+        cache.uninstall()
+        self.assertEqual(socket.getaddrinfo, cache.getaddrinfo)
+        cache.uninstall()
+        self.assertIs(socket.getaddrinfo, self.system)
+
+    def test_lookups_are_cached(self):
+        cache = ps4_scraper.DNSCache()
+        cache.install()
+        try:
+            first = socket.getaddrinfo('localhost', 80)
+            second = socket.getaddrinfo('localhost', 80)
+        finally:
+            cache.uninstall()
+        self.assertEqual(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_resolving_after_the_last_uninstall(self):
+        # Un thread qui tient encore cache.getaddrinfo pendant le dernier uninstall()
+        cache = ps4_scraper.DNSCache()
+        cache.install()
+        resolve = socket.getaddrinfo
+        cache.uninstall()
+
+        self.assertTrue(resolve('localhost', 80))
+        self.assertEqual(cache.entries, {})
+
+if __name__ == '__main__':
+    unittest.main()
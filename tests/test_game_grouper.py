@@ -0,0 +1,68 @@
+"""GameGrouper: name keys and grouping of CUSA IDs into games"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+def title(title_id, name, sony_name=''):
+    return {'Title_ID': title_id, 'Title_Name': name, 'Sony_Game_Name': sony_name}
+
+class GameGrouperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.grouper = ps4_scraper.GameGrouper()
+
+    def test_normalize_name(self):
+        normalize = self.grouper.normalize_name
+        self.assertEqual(normalize("Assassin's Creed® Origins – Gold Edition"), 'assassins creed origins')
+        self.assertEqual(normalize('The Witcher III: Wild Hunt Game of the Year Edition'), 'witcher 3 wild hunt')
+        self.assertEqual(normalize('Pokémon™ Quest'), 'pokemon quest')
+        self.assertEqual(normalize('Rocket League® Trial Version'), 'rocket league')
+        self.assertEqual(normalize(None), '')
+
+    def test_edition_words_inside_the_title_stay(self):
+        normalize = self.grouper.normalize_name
+        self.assertEqual(normalize('Gold Rush: The Game'), 'gold rush')
+        self.assertEqual(normalize('Game Dev Tycoon'), 'game dev tycoon')
+        self.assertEqual(normalize('Definitive Fighter'), 'definitive fighter')
+        self.assertEqual(normalize('Ultimate Chicken Horse'), 'ultimate chicken horse')
+        self.assertEqual(normalize('Ultimate Chicken Horse Deluxe Edition'), 'ultimate chicken horse')
+
+    def test_group(self):
+        games = self.grouper.group([
+            title('CUSA00003', 'The Witcher 3: Wild Hunt'),
+            title('CUSA00001', 'The Witcher® 3: Wild Hunt – Game of the Year Edition', 'THE WITCHER 3: WILD HUNT'),
+            title('CUSA00002', 'Witcher 3 Wild Hunt Complete Edition'),
+            title('CUSA00010', 'FIFA 19'),
+            title('CUSA00011', 'FIFA 20'),
+            title('CUSA00012', 'Horizon Zero Dawn'),
+            title('CUSA00013', 'Horizon Zero Dawm'),
+            title('CUSA00020', ''),
+        ])
+
+        self.assertEqual(games['CUSA00001'], 'CUSA00001')
+        self.assertEqual(games['CUSA00002'], 'CUSA00001')
+        self.assertEqual(games['CUSA00003'], 'CUSA00001')
+        self.assertNotEqual(games['CUSA00010'], games['CUSA00011'])
+        self.assertEqual(games['CUSA00013'], 'CUSA00012')
+        self.assertEqual(games['CUSA00020'], 'CUSA00020')
+        self.assertEqual(self.grouper.stats['games'], 5)
+
+    def test_sony_name_links_different_store_names(self):
+        games = self.grouper.group([
+            title('CUSA00001', 'Biohazard 7', 'RESIDENT EVIL 7 biohazard'),
+            title('CUSA00002', 'Resident Evil 7: Biohazard'),
+        ])
+
+        self.assertEqual(games['CUSA00002'], 'CUSA00001')
+
+    def test_game_name_prefers_sony(self):
+        members = [title('CUSA00001', 'Biohazard 7', 'RESIDENT EVIL 7 biohazard'), title('CUSA00002', 'Resident Evil 7')]
+        self.assertEqual(self.grouper.game_name(members), 'RESIDENT EVIL 7 biohazard')
+
+if __name__ == '__main__':
+    unittest.main()
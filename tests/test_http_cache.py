@@ -0,0 +1,127 @@
+"""HTTPCache: validators, 304 revalidation, expiry and eviction"""
+
+import hashlib
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+URL = 'https://gs-sec.ww.np.dl.playstation.net/plo/np/CUSA00001/h/CUSA00001-ver.xml'
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Serves a fixed body with an ETag, 304 when the client already has it"""
+
+    protocol_version = 'HTTP/1.1'
+    body = b'<titlepatch titleid="CUSA00001"/>'
+    seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        etag = '"' + hashlib.md5(self.body).hexdigest() + '"'
+        self.seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+class HTTPCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.work_dir.name) / 'cache'
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_validators_round_trip(self):
+        cache = ps4_scraper.HTTPCache(self.cache_dir)
+        self.assertEqual(cache.conditional_headers(URL), {})
+
+        cache.store(URL, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}, b'body')
+
+        self.assertEqual(cache.conditional_headers(URL), {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        self.assertEqual(cache.load_body(URL), b'body')
+        self.assertEqual(cache.stats['hits'], 1)
+        self.assertEqual(list(self.cache_dir.glob('*/*.tmp')), [])
+
+    def test_responses_without_validators_are_not_stored(self):
+        cache = ps4_scraper.HTTPCache(self.cache_dir)
+        cache.store(URL, {}, b'body')
+
+        self.assertEqual(cache.conditional_headers(URL), {})
+        self.assertEqual(cache.stats['stores'], 0)
+
+    def test_304_renews_the_entry(self):
+        cache = ps4_scraper.HTTPCache(self.cache_dir, max_age=60)
+        cache.store(URL, {'ETag': '"v1"'}, b'body')
+        meta_file, _ = cache.paths(cache.key(URL))
+        meta = json.loads(meta_file.read_text(encoding='utf-8'))
+        meta['stored_at'] = time.time() - 50
+        meta_file.write_text(json.dumps(meta), encoding='utf-8')
+
+        cache.load_body(URL)
+
+        self.assertGreater(cache.load_meta(URL)['stored_at'], time.time() - 5)
+
+    def test_expired_entries_send_no_validators(self):
+        cache = ps4_scraper.HTTPCache(self.cache_dir, max_age=60)
+        cache.store(URL, {'ETag': '"v1"'}, b'body')
+        meta_file, _ = cache.paths(cache.key(URL))
+        meta = json.loads(meta_file.read_text(encoding='utf-8'))
+        meta['stored_at'] = time.time() - 120
+        meta_file.write_text(json.dumps(meta), encoding='utf-8')
+
+        self.assertEqual(cache.conditional_headers(URL), {})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ps4_scraper.HTTPCache(self.cache_dir, max_bytes=250)
+        for i in range(3):
+            cache.store(f'{URL}?{i}', {'ETag': f'"{i}"'}, bytes(100))
+            # Accès distincts pour un ordre LRU stable
+            cache.index[cache.key(f'{URL}?{i}')] = (100, time.time() + i)
+
+        self.assertLessEqual(cache.total_bytes, 250)
+        self.assertEqual(cache.conditional_headers(f'{URL}?0'), {})
+        self.assertEqual(cache.conditional_headers(f'{URL}?2'), {'If-None-Match': '"2"'})
+
+    def test_downloader_revalidates_with_the_server(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/CUSA00001-ver.xml'
+        ETagHandler.seen.clear()
+        downloader = ps4_scraper.PS4UpdateDownloader(Path(self.work_dir.name) / 'out', cache_dir=self.cache_dir)
+        try:
+            first = downloader.http_get(url)
+            second = downloader.http_get(url)
+        finally:
+            downloader.close()
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(first, (200, ETagHandler.body))
+        self.assertEqual(second, (200, ETagHandler.body))
+        self.assertIsNone(ETagHandler.seen[0])
+        self.assertIsNotNone(ETagHandler.seen[1])
+        self.assertEqual(downloader.cache.stats['hits'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
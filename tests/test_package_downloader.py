@@ -0,0 +1,151 @@
+"""PackageDownloader: segmented downloads with concurrent progress saves"""
+
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+PAYLOAD = os.urandom(2 * 1024 * 1024)
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD at any path, honouring single byte ranges"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/missing/'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = PAYLOAD
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(PAYLOAD) - 1
+            body = PAYLOAD[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(PAYLOAD)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class PackageDownloaderTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/EP0000-CUSA00001_00-A0100-V0100.pkg"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.dest_dir = Path(self.work_dir.name)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_concurrent_state_saves(self):
+        # Tous les segments écrivent le même .part.json en même temps
+        downloader = ps4_scraper.PackageDownloader(self.dest_dir)
+        state_file = self.dest_dir / 'x.pkg.part.json'
+        segments = [[i * 100, (i + 1) * 100, i * 100] for i in range(8)]
+        lock = threading.Lock()
+        errors = []
+
+        def save_many():
+            try:
+                for _ in range(200):
+                    downloader.save_state(state_file, self.url, 800, segments, lock)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=save_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        state = json.loads(state_file.read_text(encoding='utf-8'))
+        self.assertEqual(state['segments'], segments)
+        self.assertEqual(list(self.dest_dir.glob('*.tmp')), [])
+
+    def test_segmented_download(self):
+        downloader = ps4_scraper.PackageDownloader(self.dest_dir, connections_per_file=4,
+                                                   min_segment_size=256 * 1024)
+        # Petits morceaux : chaque segment sauvegarde sa progression plusieurs fois
+        downloader.CHUNK_SIZE = 4 * 1024
+        dest_path = self.dest_dir / 'CUSA00001' / 'update.pkg'
+
+        status = downloader.download_file(self.url, dest_path, len(PAYLOAD), hashlib.sha1(PAYLOAD).hexdigest())
+
+        self.assertEqual(status, 'downloaded')
+        self.assertEqual(dest_path.read_bytes(), PAYLOAD)
+        self.assertFalse(dest_path.with_name('update.pkg.part.json').exists())
+
+    def test_unknown_size(self):
+        # Size_Bytes vide : 0, un seul GET sans Range
+        downloader = ps4_scraper.PackageDownloader(self.dest_dir, max_retries=0)
+        dest_path = self.dest_dir / 'CUSA00001' / 'update.pkg'
+
+        self.assertEqual(downloader.plan_segments(self.url, 0), [[0, 0, 0]])
+        status = downloader.download_file(self.url, dest_path, 0, hashlib.sha1(PAYLOAD).hexdigest())
+
+        self.assertEqual(status, 'downloaded')
+        self.assertEqual(dest_path.read_bytes(), PAYLOAD)
+        self.assertEqual(downloader.download_file(self.url, dest_path, 0), 'skipped')
+
+    def test_failed_files_do_not_stop_the_run(self):
+        base = self.url.rsplit('/', 1)[0]
+        links_csv = self.dest_dir / 'links.csv'
+        with open(links_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Title_ID', 'Filename', 'Download_URL', 'Size_Bytes', 'SHA1_Hash'])
+            writer.writerow(['CUSA00001', 'a.pkg', f'{base}/a.pkg', len(PAYLOAD), hashlib.sha1(PAYLOAD).hexdigest()])
+            writer.writerow(['CUSA00002', 'b.pkg', f'{base}/missing/b.pkg', 10, ''])
+            writer.writerow(['CUSA00003', 'c.pkg', f'{base}/c.pkg', '', ''])
+            writer.writerow(['CUSA00004', 'd.pkg', f'{base}/d.pkg', 11, ''])
+
+        class Broken(ps4_scraper.PackageDownloader):
+            def download_file(self, url, dest_path, size, sha1=None):
+                if url.endswith('d.pkg'):
+                    raise OSError("disk full")
+                return super().download_file(url, dest_path, size, sha1)
+
+        downloader = Broken(self.dest_dir / 'pkgs', max_retries=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = downloader.download_links(str(links_csv))
+
+        statuses = {row['Title_ID']: row['Status'] for row in results}
+        self.assertEqual(statuses['CUSA00001'], 'downloaded')
+        self.assertEqual(statuses['CUSA00002'], 'failed: Segment 0-10: HTTP 404')
+        self.assertEqual(statuses['CUSA00003'], 'downloaded')
+        self.assertEqual(statuses['CUSA00004'], 'failed: OSError: disk full')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""SnapshotDiff: added, changed, removed pieces and new versions between two runs"""
+
+import csv
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+SUMMARY_COLUMNS = ps4_scraper.ResultsWriter.SUMMARY_COLUMNS
+LINKS_COLUMNS = ps4_scraper.ResultsWriter.LINKS_COLUMNS
+
+def link(title_id, version, filename, sha1, size=100):
+    return [title_id, f'Game {title_id}', '', 'Original', version, size / 1024 / 1024, size, filename,
+            f'http://x/{filename}', sha1]
+
+def summary(title_id, version, status='found'):
+    return [title_id, f'Game {title_id}', '', 'Original', bool(version), 1, version, 0.1, status]
+
+class SnapshotDiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.work_dir.name)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def snapshot(self, name, links, summaries):
+        folder = self.root / name
+        folder.mkdir()
+        for file_name, header, rows in (('ps4_titles_download_links.csv', LINKS_COLUMNS, links),
+                                        ('ps4_titles_update_summary.csv', SUMMARY_COLUMNS, summaries)):
+            with open(folder / file_name, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+        return folder / 'ps4_titles_download_links.csv'
+
+    def test_changes(self):
+        old = self.snapshot('old', [
+            link('CUSA00001', '01.01', 'a1.pkg', 'aa' * 20),
+            link('CUSA00002', '01.00', 'b.pkg', 'bb' * 20),
+            link('CUSA00003', '01.00', 'c.pkg', 'cc' * 20),
+            link('CUSA00004', '01.00', 'd.pkg', 'dd' * 20),
+        ], [summary('CUSA00001', '01.01'), summary('CUSA00002', '01.00'),
+            summary('CUSA00003', '01.00'), summary('CUSA00004', '01.00')])
+        new = self.snapshot('new', [
+            link('CUSA00002', '01.00', 'b.pkg', 'ee' * 20),
+            link('CUSA00001', '01.02', 'a2.pkg', 'ab' * 20),
+            link('CUSA00001', '01.01', 'a1.pkg', 'aa' * 20),
+        ], [summary('CUSA00001', '01.02'), summary('CUSA00002', '01.00'),
+            summary('CUSA00003', ''), summary('CUSA00004', '', status='error')])
+
+        diff = ps4_scraper.SnapshotDiff()
+        changes = diff.compare(old, new)
+
+        self.assertEqual([(row['Change'], row['Title_ID'], row['Filename']) for row in changes], [
+            ('new_version', 'CUSA00001', ''),
+            ('added', 'CUSA00001', 'a2.pkg'),
+            ('changed', 'CUSA00002', 'b.pkg'),
+            ('removed', 'CUSA00003', 'c.pkg'),
+        ])
+        self.assertEqual(changes[0]['Old_Version'], '01.01')
+        self.assertEqual(changes[2]['Old_SHA1_Hash'], 'bb' * 20)
+        self.assertEqual(diff.counts, {'new_version': 1, 'added': 1, 'changed': 1, 'removed': 1})
+        self.assertEqual(diff.changed_title_ids(), ['CUSA00001', 'CUSA00002'])
+
+    def test_identical_snapshots(self):
+        rows = [link('CUSA00001', '01.01', 'a1.pkg', 'aa' * 20)]
+        old = self.snapshot('old', rows, [summary('CUSA00001', '01.01')])
+        new = self.snapshot('new', rows, [summary('CUSA00001', '01.01')])
+
+        self.assertEqual(ps4_scraper.SnapshotDiff().compare(old, new), [])
+
+    def test_result_store_snapshot(self):
+        old = self.snapshot('old', [link('CUSA00001', '01.01', 'a1.pkg', 'aa' * 20)], [summary('CUSA00001', '01.01')])
+        store_file = self.root / 'titles_update_results.sqlite'
+        store = ps4_scraper.ResultStore(store_file)
+        store.add({'title_id': 'CUSA00001', 'title_name': 'Game CUSA00001', 'status': 'found', 'has_updates': True,
+                   'latest_version': '01.01', 'total_size_bytes': 100,
+                   'updates': [{'version': '01.01', 'filename': 'a1.pkg', 'hash': 'ff' * 20, 'size': 100,
+                                'url': 'http://x/a1.pkg'}]})
+        store.close()
+
+        changes = ps4_scraper.SnapshotDiff().compare(old, store_file)
+
+        self.assertEqual([(row['Change'], row['SHA1_Hash']) for row in changes], [('changed', 'ff' * 20)])
+
+    def test_write(self):
+        old = self.snapshot('old', [], [])
+        new = self.snapshot('new', [link('CUSA00001', '01.01', 'a1.pkg', 'aa' * 20)], [summary('CUSA00001', '01.01')])
+        diff = ps4_scraper.SnapshotDiff()
+        diff.compare(old, new)
+        changelog = self.root / 'changelog.csv'
+        diff.write(changelog)
+
+        with open(changelog, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['Change'] for row in rows], ['new_version', 'added'])
+        self.assertEqual(rows[1]['Download_URL'], 'http://x/a1.pkg')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+"""Update links batch: result store, resume, refresh budget"""
+
+import asyncio
+import contextlib
+import csv
+import io
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+class UpdateHandler(BaseHTTPRequestHandler):
+    """Fake gs-sec: CUSA numbers divisible by 3 have no update, the others one"""
+
+    protocol_version = 'HTTP/1.1'
+    requests_seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        host = self.headers['Host']
+        if self.path.endswith('-ver.xml'):
+            title_id = self.path.rsplit('/', 1)[-1].split('-')[0]
+            if int(title_id[4:]) % 3 == 0:
+                return self.reply(404, b'')
+            body = (f'<titlepatch titleid="{title_id}"><tag name="x">'
+                    f'<package version="01.01" manifest_url="http://{host}/m/{title_id}.json">'
+                    f'<paramsfo><title>Game {title_id}</title></paramsfo></package></tag></titlepatch>')
+        elif self.path.startswith('/m/'):
+            key = self.path[3:-5]
+            body = json.dumps({'pieces': [{'url': f'http://{host}/{key}.pkg', 'hashValue': '0' * 40, 'fileSize': 1000}]})
+        else:
+            return self.reply(404, b'')
+        self.reply(200, body.encode())
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class LocalDownloader(ps4_scraper.PS4UpdateDownloader):
+    port = None
+
+    def build_update_url(self, title_id):
+        title_id = self.normalize_title_id(title_id)
+        return f'http://127.0.0.1:{self.port}/plo/np/{title_id}/h/{title_id}-ver.xml'
+
+class LocalAsyncDownloader(LocalDownloader, ps4_scraper.AsyncPS4UpdateDownloader):
+    pass
+
+class RecordingSession:
+    """Stands in for aiohttp.ClientSession, keeps the options of every GET"""
+
+    def __init__(self):
+        self.calls = []
+
+    @contextlib.asynccontextmanager
+    async def get(self, url, **options):
+        self.calls.append((url, options))
+
+        class Response:
+            status = 200
+            headers = {}
+
+            async def read(self):
+                return b''
+
+        yield Response()
+
+class UpdateBatchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), UpdateHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        LocalDownloader.port = cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.out_dir = Path(self.work_dir.name) / 'out'
+        self.titles_csv = Path(self.work_dir.name) / 'titles.csv'
+        with open(self.titles_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Title_ID', 'Name', 'Editions'])
+            for i in range(1, 13):
+                writer.writerow([f'CUSA{i:05d}', f'Game {i}', 'Original'])
+        UpdateHandler.requests_seen.clear()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def run_batch(self, engine=None, **kwargs):
+        downloader = (engine or LocalDownloader)(self.out_dir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                downloader.batch_get_update_links(str(self.titles_csv), max_workers=4, return_results=False, **kwargs)
+        finally:
+            downloader.close()
+        return downloader, output.getvalue()
+
+    def store_rows(self, path):
+        store = ps4_scraper.ResultStore(path)
+        try:
+            return len(store), store.is_finished()
+        finally:
+            store.close()
+
+    def test_full_run(self):
+        downloader, _ = self.run_batch()
+
+        self.assertEqual(downloader.stats['processed'], 12)
+        self.assertEqual(downloader.stats['found_updates'], 8)
+        self.assertEqual(self.store_rows(downloader.store_path), (12, True))
+
+    def test_limited_run_keeps_the_full_store(self):
+        downloader, _ = self.run_batch()
+        limited, _ = self.run_batch(max_titles=3)
+
+        self.assertEqual(limited.stats['processed'], 3)
+        self.assertEqual(self.store_rows(downloader.store_path), (12, True))
+        self.assertEqual(self.store_rows(limited.limited_store_path), (3, True))
+
+    def test_stopped_run_is_not_finished(self):
+        downloader = LocalDownloader(self.out_dir)
+        downloader.stop_event.set()
+        with contextlib.redirect_stdout(io.StringIO()):
+            downloader.batch_get_update_links(str(self.titles_csv), max_workers=4, return_results=False)
+        downloader.close()
+
+        self.assertEqual(self.store_rows(downloader.store_path), (0, False))
+
+    def test_resume_skips_stored_titles(self):
+        self.run_batch()
+        UpdateHandler.requests_seen.clear()
+        downloader, output = self.run_batch(resume=True)
+
+        self.assertIn('Resuming: 12 titles', output)
+        self.assertEqual(UpdateHandler.requests_seen, [])
+        self.assertEqual(downloader.stats['found_updates'], 8)
+
+    def test_refresh_budget_counts_new_titles(self):
+        downloader, output = self.run_batch(refresh=True, budget=5)
+
+        self.assertIn('5 titles to check', output)
+        self.assertEqual(self.store_rows(downloader.store_path), (5, True))
+        ver_requests = [path for path in UpdateHandler.requests_seen if path.endswith('-ver.xml')]
+        self.assertEqual(len(ver_requests), 5)
+
+    @unittest.skipUnless(ps4_scraper.AIOHTTP_AVAILABLE, "aiohttp not installed")
+    def test_async_engine_matches_sync(self):
+        sync, _ = self.run_batch()
+        sync_summary = (self.out_dir / 'ps4_titles_update_summary.csv').read_bytes()
+        downloader, _ = self.run_batch(engine=LocalAsyncDownloader)
+
+        self.assertEqual(downloader.stats['found_updates'], sync.stats['found_updates'])
+        self.assertEqual((self.out_dir / 'ps4_titles_update_summary.csv').read_bytes(), sync_summary)
+
+    @unittest.skipUnless(ps4_scraper.AIOHTTP_AVAILABLE, "aiohttp not installed")
+    def test_async_results_are_committed_off_the_event_loop(self):
+        threads = set()
+
+        class Recording(LocalAsyncDownloader):
+            def record_result(self, result, stats, start_time):
+                threads.add(threading.current_thread().name)
+                super().record_result(result, stats, start_time)
+
+        downloader, _ = self.run_batch(engine=Recording, chunk_size=5)
+
+        self.assertEqual(downloader.stats['processed'], 12)
+        self.assertEqual(self.store_rows(downloader.store_path), (12, True))
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.main_thread().name, threads)
+
+    @unittest.skipUnless(ps4_scraper.AIOHTTP_AVAILABLE, "aiohttp not installed")
+    def test_async_engine_only_skips_tls_checks_for_ver_xml(self):
+        downloader = ps4_scraper.AsyncPS4UpdateDownloader(self.out_dir)
+        http = RecordingSession()
+
+        async def fetch_both():
+            await downloader.async_request_update(http, 'CUSA00001')
+            await downloader.async_fetch_manifest(http, 'https://gs2.ww.prod.dl.playstation.net/x.json')
+
+        try:
+            asyncio.run(fetch_both())
+        finally:
+            downloader.close()
+        (ver_url, ver_options), (manifest_url, manifest_options) = http.calls
+        self.assertTrue(ver_url.endswith('CUSA00001-ver.xml'))
+        self.assertIs(ver_options.get('ssl'), False)
+        self.assertNotIn('ssl', manifest_options)
+
+    def test_sweep_records_probe_errors(self):
+        class Flaky(LocalDownloader):
+            def probe_title_id(self, number):
+                if number == 7:
+                    raise OSError("cache unreadable")
+                return super().probe_title_id(number)
+
+        downloader = Flaky(self.out_dir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                titles = downloader.sweep_title_ids(1, 30, max_workers=4, block_size=10)
+        finally:
+            downloader.close()
+
+        found = [title['Title_ID'] for title in titles]
+        self.assertEqual(found, [f'CUSA{n:05d}' for n in range(1, 31) if n % 3 and n != 7])
+        self.assertIn('CUSA00007: probe failed (OSError: cache unreadable)', output.getvalue())
+        self.assertIn('1 probe errors', output.getvalue())
+        checked, _ = downloader.load_sweep_state(self.out_dir / 'cusa_sweep_bitmap.bin')
+        self.assertEqual(len(checked), 29)
+
+if __name__ == '__main__':
+    unittest.main()
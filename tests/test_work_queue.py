@@ -0,0 +1,137 @@
+"""WorkQueue: shard leases, takeover of expired leases, titles CSV guard"""
+
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ps4_scraper
+
+TITLE_IDS = [f'CUSA{i:05d}' for i in range(1, 11)]
+
+class WorkQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.queue = ps4_scraper.WorkQueue(Path(self.work_dir.name) / 'queue.sqlite')
+        self.queue.create(TITLE_IDS, 4, {'titles_csv': 'titles.csv', 'max_titles': 0})
+
+    def tearDown(self):
+        self.queue.close()
+        self.work_dir.cleanup()
+
+    def test_shards_cover_the_titles(self):
+        shards = self.queue.shards()
+
+        self.assertEqual([(s['first_row'], s['last_row']) for s in shards], [(0, 3), (4, 7), (8, 9)])
+        self.assertEqual([(s['first_title_id'], s['last_title_id']) for s in shards],
+                         [('CUSA00001', 'CUSA00004'), ('CUSA00005', 'CUSA00008'), ('CUSA00009', 'CUSA00010')])
+        self.assertEqual(self.queue.meta('max_titles'), '0')
+        self.assertEqual(self.queue.meta('missing', 'x'), 'x')
+
+    def test_leases_in_shard_order_until_none_is_left(self):
+        leased = [self.queue.lease('a', 60) for _ in range(3)]
+
+        self.assertEqual([shard['shard_id'] for shard in leased], [1, 2, 3])
+        self.assertEqual([shard['attempts'] for shard in leased], [1, 1, 1])
+        self.assertIsNone(self.queue.lease('b', 60))
+        self.assertEqual(self.queue.counts(), {'pending': 0, 'leased': 3, 'expired': 0, 'done': 0})
+
+    def test_expired_lease_is_taken_over(self):
+        first = self.queue.lease('a', -1)
+        self.assertEqual(self.queue.counts()['expired'], 1)
+
+        second = self.queue.lease('b', 60)
+
+        self.assertEqual(second['shard_id'], first['shard_id'])
+        self.assertEqual(second['attempts'], 2)
+        # L'ancien worker a perdu le shard : ni renouvellement ni fin
+        self.assertFalse(self.queue.renew(first['shard_id'], 'a', 60))
+        self.assertFalse(self.queue.complete(first['shard_id'], 'a'))
+        self.assertTrue(self.queue.renew(second['shard_id'], 'b', 60))
+        self.assertTrue(self.queue.complete(second['shard_id'], 'b'))
+
+    def test_renewed_lease_is_not_taken_over(self):
+        shard = self.queue.lease('a', -1)
+        self.assertTrue(self.queue.renew(shard['shard_id'], 'a', 60))
+
+        self.assertEqual(self.queue.lease('b', 60)['shard_id'], 2)
+
+    def test_done_shards_are_not_leased_again(self):
+        shard = self.queue.lease('a', 60)
+        self.assertTrue(self.queue.complete(shard['shard_id'], 'a'))
+
+        self.assertFalse(self.queue.complete(shard['shard_id'], 'a'))
+        self.assertFalse(self.queue.renew(shard['shard_id'], 'a', 60))
+        self.assertEqual([self.queue.lease('b', 60)['shard_id'] for _ in range(2)], [2, 3])
+        self.assertEqual(self.queue.counts(), {'pending': 0, 'leased': 2, 'expired': 0, 'done': 1})
+
+    def test_create_replaces_the_queue(self):
+        self.queue.lease('a', 60)
+        self.queue.create(TITLE_IDS[:2], 4, {'titles_csv': 'other.csv'})
+
+        self.assertEqual(self.queue.counts(), {'pending': 1, 'leased': 0, 'expired': 0, 'done': 0})
+        self.assertEqual(self.queue.meta('titles_csv'), 'other.csv')
+        self.assertIsNone(self.queue.meta('max_titles'))
+
+class ShardedBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.titles_csv = Path(self.work_dir.name) / 'titles.csv'
+        self.write_titles(TITLE_IDS)
+        self.batch = ps4_scraper.ShardedBatch(Path(self.work_dir.name) / 'out')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.batch.init(self.titles_csv, shard_size=4)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def write_titles(self, title_ids):
+        with open(self.titles_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Title_ID', 'Name', 'Editions'])
+            for title_id in title_ids:
+                writer.writerow([title_id, f'Game {title_id}', 'Original'])
+
+    def test_shard_titles_follow_the_row_ranges(self):
+        queue = ps4_scraper.WorkQueue(self.batch.queue_path)
+        try:
+            self.batch.check_titles_csv(queue)
+            shard = queue.lease('a', 60)
+            titles = self.batch.shard_titles(queue, queue.lease('a', 60))
+        finally:
+            queue.close()
+
+        self.assertEqual(shard['shard_id'], 1)
+        self.assertEqual([title['Title_ID'] for title in titles], TITLE_IDS[4:8])
+
+    def test_changed_titles_csv_stops_the_workers(self):
+        # Un titre inséré en tête décale toutes les plages de lignes
+        self.write_titles(['CUSA00000'] + TITLE_IDS)
+        os.utime(self.titles_csv, (1, 1))
+
+        queue = ps4_scraper.WorkQueue(self.batch.queue_path)
+        try:
+            with self.assertRaises(RuntimeError):
+                self.batch.check_titles_csv(queue)
+        finally:
+            queue.close()
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(self.batch.work('a'), 0)
+        self.assertIn("changed since the shards were created", output.getvalue())
+
+        queue = ps4_scraper.WorkQueue(self.batch.queue_path)
+        try:
+            self.assertEqual(queue.counts()['pending'], 3)
+        finally:
+            queue.close()
+
+if __name__ == '__main__':
+    unittest.main()